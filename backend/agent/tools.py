@@ -1,5 +1,6 @@
 from database import get_session, Candidate, Interview, InterviewStatus, Draft, session_scope
-from sqlalchemy import or_
+from search_index import apply_candidate_search
+from loading import load_policy
 from datetime import datetime
 import json
 import logging
@@ -13,63 +14,25 @@ class AgentTools:
     
     def search_candidates(self, query=None, first_name=None, last_name=None, email=None, phone=None, country=None):
         with session_scope() as session:
-            q = session.query(Candidate)
+            q = session.query(Candidate).options(*load_policy('candidate.to_dict'))
 
-            # 1. Structured Search (High Precision)
+            # 1. Structured Search (High Precision): each field only matches its own column
             if first_name or last_name or email or phone:
-                if first_name:
-                    q = q.filter(Candidate.first_name.ilike(f'%{first_name}%'))
-                if last_name:
-                    q = q.filter(Candidate.last_name.ilike(f'%{last_name}%'))
-                if email:
-                    q = q.filter(Candidate.email.ilike(f'%{email}%'))
-                if phone:
-                    # Strip non-digits for better matching if needed, but simple ilike for now
-                    q = q.filter(Candidate.phone.ilike(f'%{phone}%'))
-            
-            # 2. Fallback / "Smart" Query Search (if query string provided)
-            elif query:
-                # Split query for "First Last" search
-                parts = query.split()
-                if len(parts) >= 2:
-                    first_part = parts[0]
-                    last_part = " ".join(parts[-1:]) # simple heuristic: first word is first name, last word is last name
-                    # or better:
-                    # AND logic for split parts vs OR logic for full string
-                    
-                    # Let's try to find matches where ANY field matches the full query
-                    # OR where first/last match the parts
-                    
-                    conditions = [
-                        Candidate.first_name.ilike(f'%{query}%'),
-                        Candidate.last_name.ilike(f'%{query}%'),
-                        Candidate.email.ilike(f'%{query}%'),
-                        Candidate.phone.ilike(f'%{query}%')
-                    ]
-                    
-                    # Split logic: First matches First AND Last matches Last
-                    split_condition = (
-                        Candidate.first_name.ilike(f'%{parts[0]}%') & 
-                        Candidate.last_name.ilike(f'%{parts[-1]}%')
-                    )
-                    conditions.append(split_condition)
-                    
-                    q = q.filter(or_(*conditions))
-                else:
-                    # Single word query
-                    q = q.filter(
-                        or_(
-                            Candidate.first_name.ilike(f'%{query}%'),
-                            Candidate.last_name.ilike(f'%{query}%'),
-                            Candidate.email.ilike(f'%{query}%'),
-                            Candidate.phone.ilike(f'%{query}%')
-                        )
-                    )
+                q, rank = apply_candidate_search(
+                    q, first_name=first_name, last_name=last_name, email=email, phone=phone
+                )
+
+            # 2. Fallback / "Smart" Query Search: every word of the query must match
+            # some field, so "First Last" finds the candidate as well
+            else:
+                q, rank = apply_candidate_search(q, query)
 
             # Fuzzy country matching if provided
             if country:
                 q = q.filter(Candidate.country.ilike(f'%{country}%'))
                 
+            if rank is not None:
+                q = q.order_by(rank, Candidate.id)
             results = q.limit(20).all()
             logger.debug("Agent search_candidates", extra={"result_count": len(results)})
             # Return PII-reduced view for the agent / LLM.
@@ -150,7 +113,9 @@ class AgentTools:
 
     def get_schedule(self, limit=20):
         with session_scope() as session:
-            interviews = session.query(Interview).filter(
+            interviews = session.query(Interview).options(
+                *load_policy('interview.to_dict')
+            ).filter(
                 Interview.interview_date >= datetime.now()
             ).order_by(Interview.interview_date).limit(limit).all()
             
@@ -0,0 +1,416 @@
+"""
+Campaign analytics backed by incrementally maintained rollup tables.
+
+Every sent email, open and click adds to per-campaign counters in
+``tracking_rollups`` at three granularities: ``hour``, ``day`` and ``all``
+(one lifetime row per campaign). Time from send to first open feeds a
+fixed-bucket histogram in ``time_to_open_rollups``, and the recipients seen
+in each bucket are folded into HyperLogLog sketches (``tracking_sketches``)
+so distinct openers/clickers can be estimated for any date range by merging
+a handful of buckets. Dashboard queries read these small tables instead of
+scanning ``email_tracking``.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_
+
+from config import Config
+from database import (
+    dialect_insert, session_scope, EmailTracking, EmailClick, TrackingArchive, TrackingRollup, TimeToOpenRollup,
+    TrackingSketch,
+)
+from hll import HyperLogLog
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ('hour', 'day', 'all')
+ROLLUP_COUNTERS = ('sent', 'opens', 'unique_opens', 'clicks', 'unique_clicks', 'prefetch_opens', 'prefetch_unique_opens')
+SKETCH_EVENTS = ('open', 'click')
+
+# Bucket start used for the single lifetime ('all') row of each campaign
+ALL_TIME_BUCKET = datetime(1970, 1, 1)
+
+# Upper bounds (seconds) of the time-to-open histogram; the last bucket is open-ended
+TIME_TO_OPEN_BUCKETS = (60, 300, 900, 3600, 3 * 3600, 6 * 3600, 12 * 3600, 86400, 2 * 86400, 7 * 86400, None)
+
+# Rows fetched per round-trip while backfilling
+_BACKFILL_BATCH_SIZE = 5000
+
+
+def bucket_start(at, granularity):
+    """Truncate a datetime to the start of its rollup bucket."""
+    if granularity == 'hour':
+        return at.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        return at.replace(hour=0, minute=0, second=0, microsecond=0)
+    return ALL_TIME_BUCKET
+
+
+def time_to_open_bucket(seconds):
+    """Index of the histogram bucket for a send-to-first-open delay."""
+    for index, upper in enumerate(TIME_TO_OPEN_BUCKETS):
+        if upper is None or seconds < upper:
+            return index
+    return len(TIME_TO_OPEN_BUCKETS) - 1
+
+
+class RollupDeltas:
+    """
+    Counter increments collected while ingesting a batch of events.
+
+    Callers ``add`` events as they process them and ``apply`` once per
+    transaction, which issues one upsert per touched bucket and merges the
+    batch's sketches into the stored ones.
+    """
+
+    def __init__(self):
+        self._counters = defaultdict(lambda: dict.fromkeys(ROLLUP_COUNTERS, 0))
+        self._time_to_open = defaultdict(int)
+        self._sketches = {}
+
+    def __bool__(self):
+        return bool(self._counters or self._time_to_open or self._sketches)
+
+    def add(self, campaign_id, at, granularities=GRANULARITIES, **counts):
+        for granularity in granularities:
+            counters = self._counters[(campaign_id, granularity, bucket_start(at, granularity))]
+            for name, value in counts.items():
+                counters[name] += value
+
+    def add_prefetch(self, campaign_id, first_open_at, opens, unique):
+        """
+        Prefetch (image proxy/scanner) opens of one message, as classified by enrichment.
+
+        Tracking rows only keep the time of the first open, so hour/day
+        buckets get the first open (``unique``) in the bucket of
+        ``first_open_at``, where that open was counted too, and only the
+        lifetime bucket gets all ``opens``. Bucketed prefetch counts thus
+        never exceed the opens of the bucket; repeat prefetch opens show up
+        in lifetime totals only.
+        """
+        self.add(campaign_id, first_open_at, ('hour', 'day'), prefetch_opens=unique, prefetch_unique_opens=unique)
+        self.add(campaign_id, first_open_at, ('all',), prefetch_opens=opens, prefetch_unique_opens=unique)
+
+    def add_time_to_open(self, campaign_id, seconds, count=1):
+        self._time_to_open[(campaign_id, time_to_open_bucket(max(seconds, 0)))] += count
+
+    def add_distinct(self, campaign_id, event, at, value):
+        """Count ``value`` (e.g. a recipient email) towards distinct ``event`` estimates."""
+        for granularity in GRANULARITIES:
+            key = (campaign_id, event, granularity, bucket_start(at, granularity))
+            sketch = self._sketches.get(key)
+            if sketch is None:
+                sketch = self._sketches[key] = HyperLogLog(Config.HLL_PRECISION)
+            sketch.add(value)
+
+    def apply(self, session):
+        dialect = session.get_bind().dialect.name
+        if self._counters:
+            rows = [
+                dict(campaign_id=campaign_id, granularity=granularity, bucket_start=start, **counters)
+                for (campaign_id, granularity, start), counters in self._counters.items()
+            ]
+            stmt = dialect_insert(TrackingRollup, dialect)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['campaign_id', 'granularity', 'bucket_start'],
+                set_={name: getattr(TrackingRollup, name) + getattr(stmt.excluded, name) for name in ROLLUP_COUNTERS},
+            )
+            session.execute(stmt, rows)
+
+        if self._time_to_open:
+            rows = [
+                {'campaign_id': campaign_id, 'bucket_index': index, 'count': count}
+                for (campaign_id, index), count in self._time_to_open.items()
+            ]
+            stmt = dialect_insert(TimeToOpenRollup, dialect)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['campaign_id', 'bucket_index'],
+                set_={'count': TimeToOpenRollup.count + stmt.excluded.count},
+            )
+            session.execute(stmt, rows)
+
+        if self._sketches:
+            _merge_sketches(session, self._sketches)
+
+        self._counters.clear()
+        self._time_to_open.clear()
+        self._sketches.clear()
+
+
+def _merge_sketches(session, sketches):
+    """
+    Merge in-memory sketches into their stored rows.
+
+    Missing rows are inserted first (``ON CONFLICT DO NOTHING``), then every
+    touched row is re-read under a row lock (``FOR UPDATE`` on PostgreSQL;
+    SQLite already holds the database write lock at that point) and merged.
+    A register-wise max is idempotent, so merging into a row this
+    transaction just inserted changes nothing, and concurrent flushes of
+    the same bucket by other workers wait for each other instead of failing
+    on ``uq_tracking_sketch_bucket`` or overwriting each other's registers.
+    Keys are handled in sorted order so two flushes lock rows in the same
+    order.
+    """
+    keys = sorted(sketches)
+    stmt = dialect_insert(TrackingSketch, session.get_bind().dialect.name).on_conflict_do_nothing(
+        index_elements=['campaign_id', 'event', 'granularity', 'bucket_start'],
+    )
+    session.execute(stmt, [
+        dict(campaign_id=campaign_id, event=event, granularity=granularity, bucket_start=start,
+             registers=sketches[(campaign_id, event, granularity, start)].to_bytes())
+        for campaign_id, event, granularity, start in keys
+    ])
+
+    by_campaign = defaultdict(set)
+    for campaign_id, _, _, start in keys:
+        by_campaign[campaign_id].add(start)
+    for campaign_id in sorted(by_campaign):
+        rows = session.query(TrackingSketch).filter(
+            TrackingSketch.campaign_id == campaign_id,
+            TrackingSketch.bucket_start.in_(by_campaign[campaign_id]),
+        ).order_by(
+            TrackingSketch.event, TrackingSketch.granularity, TrackingSketch.bucket_start,
+        ).populate_existing().with_for_update()
+        for row in rows:
+            sketch = sketches.get((row.campaign_id, row.event, row.granularity, row.bucket_start))
+            if sketch is None:
+                continue
+            merged = sketch.merge(HyperLogLog.from_bytes(row.registers)).to_bytes()
+            if merged != row.registers:
+                row.registers = merged
+
+
+def get_campaign_summary(session, campaign_id):
+    """Lifetime totals for a campaign (single-row lookup)."""
+    row = session.query(TrackingRollup).filter_by(
+        campaign_id=campaign_id, granularity='all', bucket_start=ALL_TIME_BUCKET
+    ).first()
+    totals = {name: getattr(row, name) if row else 0 for name in ROLLUP_COUNTERS}
+    sent = totals['sent']
+    totals['human_opens'] = totals['opens'] - totals['prefetch_opens']
+    totals['human_unique_opens'] = totals['unique_opens'] - totals['prefetch_unique_opens']
+    totals['open_rate'] = round(totals['unique_opens'] / sent, 4) if sent else 0.0
+    totals['human_open_rate'] = round(totals['human_unique_opens'] / sent, 4) if sent else 0.0
+    totals['click_rate'] = round(totals['unique_clicks'] / sent, 4) if sent else 0.0
+    return totals
+
+
+def get_campaign_timeseries(session, campaign_id, granularity='day', start_date=None, end_date=None, exclude_prefetch=False):
+    """
+    Bucketed counters for a campaign, ordered by bucket start.
+
+    With ``exclude_prefetch`` the open counters leave out opens that
+    enrichment attributed to image proxies and scanners. Per bucket that is
+    the first open of each prefetched message only (see
+    ``RollupDeltas.add_prefetch``); repeat prefetch opens are excluded from
+    the lifetime summary but still counted in their buckets here.
+    """
+    if granularity not in ('hour', 'day'):
+        raise ValueError("granularity must be 'hour' or 'day'")
+
+    query = session.query(TrackingRollup).filter(
+        TrackingRollup.campaign_id == campaign_id,
+        TrackingRollup.granularity == granularity,
+    )
+    if start_date:
+        query = query.filter(TrackingRollup.bucket_start >= bucket_start(start_date, granularity))
+    if end_date:
+        query = query.filter(TrackingRollup.bucket_start <= end_date)
+    buckets = [row.to_dict() for row in query.order_by(TrackingRollup.bucket_start)]
+    if exclude_prefetch:
+        for bucket in buckets:
+            bucket['opens'] -= bucket['prefetch_opens']
+            bucket['unique_opens'] -= bucket['prefetch_unique_opens']
+    return buckets
+
+
+def get_time_to_open_histogram(session, campaign_id):
+    """Send-to-first-open histogram with every bucket present (zero-filled)."""
+    counts = dict(
+        session.query(TimeToOpenRollup.bucket_index, TimeToOpenRollup.count)
+        .filter(TimeToOpenRollup.campaign_id == campaign_id)
+        .all()
+    )
+    histogram = []
+    lower = 0
+    for index, upper in enumerate(TIME_TO_OPEN_BUCKETS):
+        histogram.append({
+            'min_seconds': lower,
+            'max_seconds': upper,
+            'count': counts.get(index, 0),
+        })
+        lower = upper
+    return histogram
+
+
+def _sketch_range_filter(start_date, end_date):
+    """
+    Cover [start_date, end_date] with whole-day sketches plus hourly sketches
+    for the partial days at either end, so at most ~46 hourly buckets are
+    merged regardless of the length of the range.
+    """
+    start_hour = bucket_start(start_date, 'hour') if start_date else None
+    end_hour = bucket_start(end_date, 'hour') if end_date else None
+
+    first_day = None
+    if start_hour is not None:
+        first_day = bucket_start(start_hour, 'day')
+        if first_day < start_hour:
+            first_day += timedelta(days=1)
+
+    last_day = None
+    if end_hour is not None:
+        last_day = bucket_start(end_hour, 'day')
+        if end_hour < last_day + timedelta(hours=23):
+            last_day -= timedelta(days=1)
+
+    if first_day is not None and last_day is not None and first_day > last_day:
+        # No whole day inside the range
+        return and_(
+            TrackingSketch.granularity == 'hour',
+            TrackingSketch.bucket_start >= start_hour,
+            TrackingSketch.bucket_start <= end_hour,
+        )
+
+    day_conditions = [TrackingSketch.granularity == 'day']
+    if first_day is not None:
+        day_conditions.append(TrackingSketch.bucket_start >= first_day)
+    if last_day is not None:
+        day_conditions.append(TrackingSketch.bucket_start <= last_day)
+
+    conditions = [and_(*day_conditions)]
+    if start_hour is not None and start_hour < first_day:
+        conditions.append(and_(
+            TrackingSketch.granularity == 'hour',
+            TrackingSketch.bucket_start >= start_hour,
+            TrackingSketch.bucket_start < first_day,
+        ))
+    if end_hour is not None and last_day + timedelta(days=1) <= end_hour:
+        conditions.append(and_(
+            TrackingSketch.granularity == 'hour',
+            TrackingSketch.bucket_start >= last_day + timedelta(days=1),
+            TrackingSketch.bucket_start <= end_hour,
+        ))
+    return or_(*conditions)
+
+
+def estimate_unique(session, campaign_id, event='open', start_date=None, end_date=None):
+    """
+    Estimated distinct recipients with an ``event`` ('open' or 'click') in a
+    campaign, optionally restricted to a date range (hour resolution).
+    """
+    if event not in SKETCH_EVENTS:
+        raise ValueError("event must be 'open' or 'click'")
+
+    query = session.query(TrackingSketch.registers).filter(
+        TrackingSketch.campaign_id == campaign_id,
+        TrackingSketch.event == event,
+    )
+    if start_date is None and end_date is None:
+        query = query.filter(
+            TrackingSketch.granularity == 'all',
+            TrackingSketch.bucket_start == ALL_TIME_BUCKET,
+        )
+    else:
+        query = query.filter(_sketch_range_filter(start_date, end_date))
+
+    sketches = [HyperLogLog.from_bytes(registers) for (registers,) in query]
+    if sketches:
+        merged = sketches[0]
+        for sketch in sketches[1:]:
+            merged.merge(sketch)
+    else:
+        merged = HyperLogLog(Config.HLL_PRECISION)
+
+    return {
+        'estimate': merged.count(),
+        'relative_error': round(merged.relative_error, 4),
+        'buckets_merged': len(sketches),
+    }
+
+
+def is_archived(session, campaign_id):
+    """Whether retention has archived (and started pruning) the campaign's raw rows"""
+    return session.query(TrackingArchive.id).filter(TrackingArchive.campaign_id == campaign_id).first() is not None
+
+
+def backfill_rollups(campaign_id=None):
+    """
+    Rebuild rollups and sketches from raw ``email_tracking``/``email_clicks`` rows.
+
+    Existing rollups for the affected campaigns are replaced, one campaign per
+    transaction. Raw tracking rows only keep the first open time, so every
+    open of a message is counted in the bucket of its first open; clicks are
+    exact.
+
+    Archived campaigns are skipped: their raw rows are partly or wholly
+    pruned, and the rollups are all that is left of them.
+
+    Returns the number of tracking rows processed.
+    """
+    with session_scope() as session:
+        if campaign_id:
+            campaign_ids = [campaign_id]
+        else:
+            campaign_ids = [row[0] for row in session.query(EmailTracking.campaign_id).distinct()]
+        archived_query = session.query(TrackingArchive.campaign_id).distinct()
+        if campaign_id:
+            archived_query = archived_query.filter(TrackingArchive.campaign_id == campaign_id)
+        archived = {row[0] for row in archived_query}
+    if archived:
+        logger.warning(f"Not backfilling {len(archived)} archived campaign(s): {sorted(archived)[:10]}")
+
+    processed = 0
+    for current_id in campaign_ids:
+        if current_id in archived:
+            continue
+        with session_scope() as session:
+            processed += _backfill_campaign(session, current_id)
+
+    logger.info(f"Backfilled rollups from {processed} tracking rows (campaign={campaign_id or 'all'})")
+    return processed
+
+
+def _backfill_campaign(session, campaign_id):
+    session.query(TrackingRollup).filter(TrackingRollup.campaign_id == campaign_id).delete(synchronize_session=False)
+    session.query(TimeToOpenRollup).filter(TimeToOpenRollup.campaign_id == campaign_id).delete(synchronize_session=False)
+    session.query(TrackingSketch).filter(TrackingSketch.campaign_id == campaign_id).delete(synchronize_session=False)
+
+    tracking_query = session.query(
+        EmailTracking.recipient_email,
+        EmailTracking.created_at,
+        EmailTracking.opened_at,
+        EmailTracking.open_count,
+        EmailTracking.clicked_at,
+        EmailTracking.client_class,
+        EmailTracking.enriched_open_count,
+    ).filter(EmailTracking.campaign_id == campaign_id)
+    clicks_query = session.query(EmailTracking.recipient_email, EmailClick.clicked_at).join(
+        EmailClick, EmailClick.tracking_id == EmailTracking.tracking_id
+    ).filter(EmailTracking.campaign_id == campaign_id)
+
+    deltas = RollupDeltas()
+    processed = 0
+    for recipient_email, created_at, opened_at, open_count, clicked_at, client_class, enriched_open_count in tracking_query.yield_per(_BACKFILL_BATCH_SIZE):
+        processed += 1
+        if created_at:
+            deltas.add(campaign_id, created_at, sent=1)
+        if opened_at:
+            deltas.add(campaign_id, opened_at, opens=open_count or 1, unique_opens=1)
+            deltas.add_distinct(campaign_id, 'open', opened_at, recipient_email.lower())
+            if created_at:
+                deltas.add_time_to_open(campaign_id, (opened_at - created_at).total_seconds())
+            if client_class in ('proxy', 'bot'):
+                deltas.add_prefetch(campaign_id, opened_at, enriched_open_count or 0, 1)
+        if clicked_at:
+            deltas.add(campaign_id, clicked_at, unique_clicks=1)
+
+    for recipient_email, clicked_at in clicks_query.yield_per(_BACKFILL_BATCH_SIZE):
+        if clicked_at:
+            deltas.add(campaign_id, clicked_at, clicks=1)
+            deltas.add_distinct(campaign_id, 'click', clicked_at, recipient_email.lower())
+
+    deltas.apply(session)
+    return processed
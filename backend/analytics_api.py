@@ -0,0 +1,221 @@
+"""
+API endpoints for campaign analytics (served from rollup tables)
+"""
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from datetime import datetime
+import logging
+
+from database import get_session, EmailTracking, TrackingArchive
+from exports import TRACKING_COLUMNS, export_format, export_response
+from analytics import get_campaign_summary, get_campaign_timeseries, get_time_to_open_histogram, estimate_unique, is_archived
+
+logger = logging.getLogger(__name__)
+
+analytics_bp = Blueprint('analytics', __name__)
+
+
+def _parse_date_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+
+
+@analytics_bp.route('/api/analytics/campaigns/<campaign_id>/summary', methods=['GET'])
+@jwt_required()
+def campaign_summary(campaign_id):
+    """Lifetime sent/open/click totals for a campaign"""
+    session = get_session()
+    try:
+        return jsonify({
+            'success': True,
+            'campaign_id': campaign_id,
+            'summary': get_campaign_summary(session, campaign_id)
+        })
+    except Exception as e:
+        logger.error(f"Error fetching campaign summary: {str(e)}")
+        return jsonify({'error': f'Failed to fetch summary: {str(e)}'}), 500
+    finally:
+        session.close()
+
+
+@analytics_bp.route('/api/analytics/campaigns/<campaign_id>/timeseries', methods=['GET'])
+@jwt_required()
+def campaign_timeseries(campaign_id):
+    """Opens/clicks over time, bucketed by hour or day"""
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in ('hour', 'day'):
+        return jsonify({'error': "granularity must be 'hour' or 'day'"}), 400
+
+    try:
+        start_date = _parse_date_arg('start_date')
+        end_date = _parse_date_arg('end_date')
+    except ValueError:
+        return jsonify({'error': 'Invalid date format'}), 400
+
+    session = get_session()
+    try:
+        return jsonify({
+            'success': True,
+            'campaign_id': campaign_id,
+            'granularity': granularity,
+            'buckets': get_campaign_timeseries(
+                session, campaign_id, granularity, start_date, end_date,
+                exclude_prefetch=request.args.get('exclude_prefetch', '0') in {'1', 'true', 'yes'}
+            )
+        })
+    except Exception as e:
+        logger.error(f"Error fetching campaign timeseries: {str(e)}")
+        return jsonify({'error': f'Failed to fetch timeseries: {str(e)}'}), 500
+    finally:
+        session.close()
+
+
+@analytics_bp.route('/api/analytics/campaigns/<campaign_id>/time-to-open', methods=['GET'])
+@jwt_required()
+def campaign_time_to_open(campaign_id):
+    """Distribution of time from send to first open"""
+    session = get_session()
+    try:
+        return jsonify({
+            'success': True,
+            'campaign_id': campaign_id,
+            'histogram': get_time_to_open_histogram(session, campaign_id)
+        })
+    except Exception as e:
+        logger.error(f"Error fetching time-to-open histogram: {str(e)}")
+        return jsonify({'error': f'Failed to fetch histogram: {str(e)}'}), 500
+    finally:
+        session.close()
+
+
+@analytics_bp.route('/api/analytics/campaigns/<campaign_id>/unique', methods=['GET'])
+@jwt_required()
+def campaign_unique(campaign_id):
+    """Estimated distinct openers/clickers, optionally within a date range"""
+    event = request.args.get('event', 'open')
+    if event not in ('open', 'click'):
+        return jsonify({'error': "event must be 'open' or 'click'"}), 400
+
+    try:
+        start_date = _parse_date_arg('start_date')
+        end_date = _parse_date_arg('end_date')
+    except ValueError:
+        return jsonify({'error': 'Invalid date format'}), 400
+
+    session = get_session()
+    try:
+        result = estimate_unique(session, campaign_id, event, start_date, end_date)
+        return jsonify({
+            'success': True,
+            'campaign_id': campaign_id,
+            'event': event,
+            **result
+        })
+    except Exception as e:
+        logger.error(f"Error estimating unique {event}s: {str(e)}")
+        return jsonify({'error': f'Failed to estimate unique {event}s: {str(e)}'}), 500
+    finally:
+        session.close()
+
+
+@analytics_bp.route('/api/analytics/campaigns/<campaign_id>/export', methods=['GET'])
+@jwt_required()
+def export_campaign_tracking(campaign_id):
+    """Stream a campaign's per-recipient tracking rows as CSV or XLSX (?format=, ?status=)"""
+    session = get_session()
+    try:
+        fmt = export_format(request.args.get('format'))
+        query = session.query(EmailTracking).filter(EmailTracking.campaign_id == campaign_id)
+        status = request.args.get('status')
+        if status:
+            query = query.filter(EmailTracking.status == status)
+        query = query.order_by(EmailTracking.id)
+        return export_response(session, query, TRACKING_COLUMNS, fmt, f"campaign-{campaign_id}")
+    except ValueError as e:
+        session.close()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        session.close()
+        logger.error(f"Error exporting campaign tracking: {str(e)}")
+        return jsonify({'error': f'Failed to export tracking data: {str(e)}'}), 500
+
+
+@analytics_bp.route('/api/analytics/campaigns/<campaign_id>/archives', methods=['GET'])
+@jwt_required()
+def campaign_archives(campaign_id):
+    """List the archive files holding a campaign's pruned raw tracking rows"""
+    session = get_session()
+    try:
+        archives = session.query(TrackingArchive).filter_by(campaign_id=campaign_id).order_by(TrackingArchive.id).all()
+        return jsonify({
+            'success': True,
+            'campaign_id': campaign_id,
+            'archives': [archive.to_dict() for archive in archives]
+        })
+    except Exception as e:
+        logger.error(f"Error listing archives: {str(e)}")
+        return jsonify({'error': f'Failed to list archives: {str(e)}'}), 500
+    finally:
+        session.close()
+
+
+@analytics_bp.route('/api/analytics/archives/<int:archive_id>/rows', methods=['GET'])
+@jwt_required()
+def archive_rows(archive_id):
+    """Read archived tracking/click rows back (paged, optionally by recipient)"""
+    from retention import read_archive
+
+    try:
+        limit = min(int(request.args.get('limit', 100)), 1000)
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+
+    session = get_session()
+    try:
+        archive = session.get(TrackingArchive, archive_id)
+        if not archive:
+            return jsonify({'error': 'Archive not found'}), 404
+        rows = read_archive(archive, offset=offset, limit=limit, recipient_email=request.args.get('recipient_email'))
+        return jsonify({
+            'success': True,
+            'archive': archive.to_dict(),
+            'rows': rows,
+            'offset': offset,
+            'limit': limit
+        })
+    except FileNotFoundError:
+        return jsonify({'error': 'Archive file is missing'}), 410
+    except Exception as e:
+        logger.error(f"Error reading archive {archive_id}: {str(e)}")
+        return jsonify({'error': f'Failed to read archive: {str(e)}'}), 500
+    finally:
+        session.close()
+
+
+@analytics_bp.route('/api/analytics/backfill', methods=['POST'])
+@jwt_required()
+def backfill():
+    """Rebuild rollups from raw tracking rows in the background (archived campaigns are skipped)"""
+    try:
+        from tasks import backfill_rollups_task
+
+        data = request.json or {}
+        campaign_id = data.get('campaign_id')
+        if campaign_id:
+            session = get_session()
+            try:
+                archived = is_archived(session, campaign_id)
+            finally:
+                session.close()
+            if archived:
+                return jsonify({
+                    'error': 'Campaign is archived; its raw tracking rows are pruned and its rollups cannot be rebuilt'
+                }), 409
+        task = backfill_rollups_task.delay(campaign_id=campaign_id)
+        return jsonify({'success': True, 'task_id': task.id, 'status': 'queued'}), 202
+    except Exception as e:
+        logger.error(f"Error starting rollup backfill: {str(e)}")
+        return jsonify({'error': f'Failed to start backfill: {str(e)}'}), 500
@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, session
+from flask import Flask, request, jsonify, session, redirect
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -27,6 +27,11 @@ import base64
 import json
 import uuid
 from database import get_session, EmailTracking, Draft, Settings, Candidate, Interview, Template, get_database_path
+from tracking import tracking_buffer, resolve_link
+from count_cache import cached_count
+from serializers import FastJSONProvider
+import query_guard
+import db_metrics
 
 # Central configuration
 from config import LOG_FILE, Config
@@ -43,6 +48,7 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 app.config["SECRET_KEY"] = Config.SECRET_KEY
 app.config["JWT_SECRET_KEY"] = Config.JWT_SECRET_KEY
 app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(hours=8)
@@ -64,6 +70,12 @@ def attach_request_id():
 # Initialize database
 init_db()
 
+# Per-request SQL statement counts when QUERY_GUARD is enabled
+query_guard.init_app(app)
+
+# Per-request query counts/DB time and the slow-query log
+db_metrics.init_app(app)
+
 # Register scheduling blueprint
 app.register_blueprint(scheduling_bp)
 
@@ -73,6 +85,9 @@ app.register_blueprint(agent_bp)
 from templates_api import templates_bp
 app.register_blueprint(templates_bp)
 
+from analytics_api import analytics_bp
+app.register_blueprint(analytics_bp)
+
 # Configure CORS
 # Origins are configured via CORS_ORIGINS env var, with sensible local defaults.
 CORS(app, origins=Config.CORS_ORIGINS, supports_credentials=True)
@@ -362,7 +377,8 @@ def get_campaign_status(task_id):
             'total': task.result.get('total', 0),
             'successful': task.result.get('successful', 0),
             'failed': task.result.get('failed', 0),
-            'results': task.result.get('results', [])
+            'results': task.result.get('results', []),
+            'results_omitted': task.result.get('results_omitted', 0)
         }
     elif task.state == 'FAILURE':
         response = {
@@ -446,48 +462,59 @@ def internal_error_handler(e):
 
 
 
+# 1x1 transparent GIF, decoded once instead of on every pixel hit
+TRACKING_PIXEL_GIF = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
+
+
+def _client_ip():
+    """Best-effort client IP, honoring X-Forwarded-For behind the proxy."""
+    forwarded_for = request.headers.get('X-Forwarded-For')
+    if forwarded_for:
+        return forwarded_for.split(',')[0]
+    return request.remote_addr
+
+
 @app.route('/api/track/<tracking_id>', methods=['GET'])
+@limiter.exempt
 def track_email(tracking_id):
     """Track email open"""
     try:
-        # Log the open
-        session = get_session()
-        try:
-            record = session.query(EmailTracking).filter_by(tracking_id=tracking_id).first()
-            if record:
-                record.open_count += 1
-                record.status = 'opened'
-                if not record.opened_at:
-                    record.opened_at = datetime.utcnow()
-                
-                # Capture metadata
-                if request.headers.get('X-Forwarded-For'):
-                    record.ip_address = request.headers.get('X-Forwarded-For').split(',')[0]
-                else:
-                    record.ip_address = request.remote_addr
-                
-                record.user_agent = request.headers.get('User-Agent')
-                
-                session.commit()
-                # logger.info(f"Tracked open for {tracking_id}")
-        except Exception as e:
-            logger.error(f"Tracking DB error: {str(e)}")
-        finally:
-            session.close()
-            
+        # Queued and written in batches by the tracking buffer
+        tracking_buffer.record_open(
+            tracking_id,
+            ip_address=_client_ip(),
+            user_agent=request.headers.get('User-Agent'),
+        )
     except Exception as e:
         logger.error(f"Tracking error: {str(e)}")
     
-    # Return 1x1 transparent GIF
-    # Transparent GIF base64: R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7
-    img_data = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
     return send_file(
-        io.BytesIO(img_data),
+        io.BytesIO(TRACKING_PIXEL_GIF),
         mimetype='image/gif',
         as_attachment=False,
         download_name='pixel.gif'
     )
 
+@app.route('/api/click/<int:link_id>/<tracking_id>', methods=['GET'])
+@limiter.exempt
+def track_click(link_id, tracking_id):
+    """Record a link click and redirect to the original URL"""
+    url = resolve_link(link_id)
+    if not url:
+        return jsonify({'error': 'Link not found'}), 404
+    
+    try:
+        tracking_buffer.record_click(
+            tracking_id,
+            link_id,
+            ip_address=_client_ip(),
+            user_agent=request.headers.get('User-Agent'),
+        )
+    except Exception as e:
+        logger.error(f"Click tracking error: {str(e)}")
+    
+    return redirect(url, code=302)
+
 @app.route('/api/drafts', methods=['GET', 'POST'])
 @jwt_required()
 def handle_drafts():
@@ -725,10 +752,16 @@ def get_system_stats():
     """Get system statistics"""
     session = get_session()
     try:
-        candidate_count = session.query(Candidate).count()
-        interview_count = session.query(Interview).count()
-        email_sent_count = session.query(EmailTracking).filter_by(status='sent').count()
-        email_opened_count = session.query(EmailTracking).filter_by(status='opened').count()
+        # Cached; invalidated on local writes, at most COUNT_CACHE_TTL seconds stale otherwise
+        candidate_count = cached_count(session.query(Candidate), 'candidates', {})
+        interview_count = cached_count(session.query(Interview), 'interviews', {})
+        email_sent_count = cached_count(
+            session.query(EmailTracking).filter_by(status='sent'), 'email_tracking', {'status': 'sent'}
+        )
+        email_opened_count = cached_count(
+            session.query(EmailTracking).filter(EmailTracking.status.in_(['opened', 'clicked'])),
+            'email_tracking', {'status': 'opened,clicked'}
+        )
         
         return jsonify({
             'candidates': candidate_count,
@@ -743,6 +776,19 @@ def get_system_stats():
     finally:
         session.close()
 
+@app.route('/api/system/db-metrics', methods=['GET'])
+@jwt_required()
+def get_db_metrics():
+    """Query counts and DB time per endpoint/task, plus recent slow queries (this process)"""
+    try:
+        snapshot = db_metrics.metrics.snapshot()
+        if request.args.get('reset', '0').lower() in {'1', 'true', 'yes'}:
+            db_metrics.metrics.reset()
+        return jsonify(snapshot), 200
+    except Exception as e:
+        logger.error(f"Error getting DB metrics: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 if __name__ == '__main__':
     logger.info("Starting Email Campaign System")
     logger.info(f"SMTP Server: {SMTP_SERVER}:{SMTP_PORT}")
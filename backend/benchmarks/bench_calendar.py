@@ -0,0 +1,102 @@
+"""
+/api/schedule/calendar benchmark: ORM + to_dict() + Flask's JSON provider
+(before) vs. column projection + FastJSONProvider (after), over a month of
+interviews.
+
+    python benchmarks/bench_calendar.py --per-day 50 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# config.py refuses to import without a secret; benchmarks never serve requests
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-not-for-production")
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import Session, joinedload  # noqa: E402
+
+from database import Base, Candidate, Interview  # noqa: E402
+from serializers import FastJSONProvider, group_by_date, serialize_interviews  # noqa: E402
+
+MONTH_START = datetime(2030, 1, 1)
+DAYS = 30
+
+
+def build_database(path, per_day):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine, tables=[Candidate.__table__, Interview.__table__])
+    rng = random.Random(7)
+    total = per_day * DAYS
+    now = datetime(2029, 12, 1)
+    with engine.begin() as conn:
+        conn.execute(Candidate.__table__.insert(), [{
+            'first_name': f"First{i}", 'last_name': f"Last{i}", 'email': f"c{i}@example.com",
+            'phone': f"+1 555-{i % 10000:04d}", 'country': 'US', 'address': f"{i} Main St",
+            'notes': 'x' * rng.randint(0, 200), 'created_at': now, 'updated_at': now,
+        } for i in range(total)])
+        conn.execute(Interview.__table__.insert(), [{
+            'candidate_id': i + 1,
+            'interview_date': MONTH_START + timedelta(days=i // per_day, hours=9, minutes=30 * (i % 16)),
+            'interview_time': '9:00', 'day_of_week': 'MONDAY', 'status': 'scheduled',
+            'meet_link': 'https://meet.example.com/abc', 'email_sent': False,
+            'created_at': now, 'updated_at': now,
+        } for i in range(total)])
+    return engine
+
+
+def before(session, provider):
+    interviews = session.query(Interview).options(joinedload(Interview.candidate)).filter(
+        Interview.interview_date >= MONTH_START,
+        Interview.interview_date <= MONTH_START + timedelta(days=DAYS)
+    ).order_by(Interview.interview_date).all()
+    calendar = {}
+    for interview in interviews:
+        calendar.setdefault(interview.interview_date.date().isoformat(), []).append(interview.to_dict())
+    return provider.dumps({'success': True, 'calendar': calendar})
+
+
+def after(session, provider):
+    interviews = serialize_interviews(session.query(Interview).filter(
+        Interview.interview_date >= MONTH_START,
+        Interview.interview_date <= MONTH_START + timedelta(days=DAYS)
+    ).order_by(Interview.interview_date, Interview.id))
+    return provider.dumps({'success': True, 'calendar': group_by_date(interviews)})
+
+
+def measure(engine, fn, provider, repeat):
+    best = float('inf')
+    size = 0
+    for _ in range(repeat):
+        # Fresh session each time, like a request
+        with Session(engine) as session:
+            started = time.perf_counter()
+            size = len(fn(session, provider))
+            best = min(best, time.perf_counter() - started)
+    return best, size
+
+
+def run(per_day, repeat):
+    app = Flask(__name__)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_database(os.path.join(tmp, 'bench.db'), per_day)
+        before_s, before_size = measure(engine, before, DefaultJSONProvider(app), repeat)
+        after_s, after_size = measure(engine, after, FastJSONProvider(app), repeat)
+        print(f"{per_day * DAYS:>7,} interviews  before {before_s * 1000:8.1f} ms ({before_size / 1024:,.0f} KiB)"
+              f"  after {after_s * 1000:8.1f} ms ({after_size / 1024:,.0f} KiB)  {before_s / after_s:4.1f}x")
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--per-day', type=int, nargs='+', default=[50, 200])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    for per_day in args.per_day:
+        run(per_day, args.repeat)
@@ -0,0 +1,131 @@
+"""
+Candidate search benchmark: FTS5 trigram index vs. the old ILIKE scan.
+
+Builds throwaway SQLite databases with synthetic candidates and times the
+same searches through ``apply_candidate_search`` with and without the index.
+
+    python benchmarks/bench_candidate_search.py --rows 100000 1000000
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# config.py refuses to import without a secret; benchmarks never serve requests
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-not-for-production")
+
+from sqlalchemy import create_engine, event, or_  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from database import Base, Candidate  # noqa: E402
+import search_index  # noqa: E402
+
+FIRST_NAMES = ['James', 'Maria', 'Wei', 'Aisha', 'Carlos', 'Olga', 'Kenji', 'Fatima', 'Liam', 'Priya',
+               'Noah', 'Elena', 'Omar', 'Sofia', 'Lucas', 'Hana', 'Mateo', 'Ingrid', 'Kwame', 'Yuki']
+LAST_NAMES = ['Smith', 'Garcia', 'Chen', 'Khan', 'Silva', 'Ivanova', 'Tanaka', 'Haddad', 'Murphy', 'Patel',
+              'Johnson', 'Rossi', 'Nguyen', 'Kowalski', 'Okafor', 'Berg', 'Moreau', 'Schmidt', 'Reyes', 'Sato']
+
+QUERIES = [
+    ('rare full name', 'Zebulon Quartermaine'),
+    ('common last name', 'Tanaka'),
+    ('email fragment', 'user12345@'),
+    ('phone fragment', '555-0142'),
+    ('no match', 'xyzzyplugh'),
+]
+
+
+def _random_rows(count, seed=42):
+    rng = random.Random(seed)
+    for i in range(count):
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        yield {
+            'first_name': first,
+            'last_name': last,
+            'email': f"user{i}@example{i % 97}.com",
+            'phone': f"+1 555-{rng.randint(0, 9999):04d}",
+            'country': 'US',
+            'notes': ' '.join(rng.choice(string.ascii_lowercase) * rng.randint(3, 8) for _ in range(4)),
+        }
+
+
+def build_database(path, rows, chunk_size=20000):
+    engine = create_engine(f"sqlite:///{path}")
+
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.close()
+
+    Base.metadata.create_all(engine, tables=[Candidate.__table__])
+    table = Candidate.__table__
+    with engine.begin() as conn:
+        batch = []
+        for row in _random_rows(rows):
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                conn.execute(table.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(table.insert(), batch)
+        conn.execute(table.insert(), [{'first_name': 'Zebulon', 'last_name': 'Quartermaine',
+                                       'email': 'zq@example.com', 'country': 'US'}])
+
+    started = time.perf_counter()
+    search_index.ensure_search_index(engine)
+    index_seconds = time.perf_counter() - started
+    return engine, index_seconds
+
+
+def _like_search(query, term):
+    # The pre-index implementation: every term against every column
+    for word in term.split():
+        query = query.filter(or_(*[getattr(Candidate, c).ilike(f'%{word}%') for c in search_index.SEARCH_COLUMNS]))
+    return query, None
+
+
+def time_query(engine, term, use_index, repeat):
+    best = float('inf')
+    count = 0
+    with Session(engine) as session:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            query = session.query(Candidate)
+            if use_index:
+                query, rank = search_index.apply_candidate_search(query, term)
+            else:
+                query, rank = _like_search(query, term)
+            if rank is not None:
+                query = query.order_by(rank, Candidate.id)
+            count = len(query.limit(50).all())
+            best = min(best, time.perf_counter() - started)
+    return best, count
+
+
+def run(rows, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        engine, index_seconds = build_database(os.path.join(tmp, 'bench.db'), rows)
+        print(f"\n{rows:,} candidates (load {time.perf_counter() - started:.1f}s, index build {index_seconds:.1f}s)")
+        print(f"{'query':<20}{'LIKE ms':>12}{'FTS5 ms':>12}{'speedup':>10}{'hits':>8}")
+        for label, term in QUERIES:
+            like_seconds, _ = time_query(engine, term, False, repeat)
+            fts_seconds, hits = time_query(engine, term, True, repeat)
+            print(f"{label:<20}{like_seconds * 1000:>12.2f}{fts_seconds * 1000:>12.2f}"
+                  f"{like_seconds / fts_seconds:>9.1f}x{hits:>8}")
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    for row_count in args.rows:
+        run(row_count, args.repeat)
@@ -0,0 +1,114 @@
+"""
+CSV import benchmark: the per-row importer (a SAVEPOINT and two SELECTs per
+row; before) vs. the set-based pipeline in csv_import.py (after).
+
+Each size is imported twice into a fresh database: once with every row new
+and once more with every row already present (the update path).
+
+    python benchmarks/bench_csv_import.py --rows 10000 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# config.py refuses to import without a secret; benchmarks never serve requests
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-not-for-production")
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from csv_import import import_candidates_from_csv, parse_csv  # noqa: E402
+from database import Base, Candidate, Interview, InterviewStatus  # noqa: E402
+
+HEADER = "First Name,Last Name,Phone,Email Address,Status,Date,Interview Day,Time"
+MONTHS = ('JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC')
+
+
+def make_csv(rows):
+    lines = [HEADER]
+    for i in range(rows):
+        day = 1 + i % 28
+        suffix = 'ST' if day in (1, 21) else 'ND' if day in (2, 22) else 'RD' if day in (3, 23) else 'TH'
+        lines.append(
+            f"First{i},Last{i},+1 555-{i % 10000:04d},candidate{i}@example.com,"
+            f"{'Confirmed' if i % 3 else 'Pending'},{day}{suffix} {MONTHS[i % 12]} 2031,MONDAY,{9 + i % 8}:{30 * (i % 2):02d}"
+        )
+    return "\n".join(lines)
+
+
+def legacy_import(session, csv_data):
+    """The per-row importer this replaced, reduced to its database access pattern"""
+    records, errors = parse_csv(csv_data)
+    imported = 0
+    for record in records:
+        with session.begin_nested():
+            candidate = session.query(Candidate).filter_by(email=record['email']).first()
+            if not candidate:
+                candidate = Candidate(
+                    first_name=record['first_name'] or 'Unknown', last_name=record['last_name'] or '',
+                    email=record['email'], phone=record['phone'], country='US', status=record['status'],
+                )
+                session.add(candidate)
+                session.flush()
+            elif record['phone'] and not candidate.phone:
+                candidate.phone = record['phone']
+            if record['interview_date']:
+                existing = session.query(Interview).filter_by(
+                    candidate_id=candidate.id, interview_date=record['interview_date']
+                ).first()
+                if not existing:
+                    session.add(Interview(
+                        candidate_id=candidate.id, interview_date=record['interview_date'],
+                        interview_time=record['interview_time'], day_of_week=record['day'],
+                        status=InterviewStatus.PENDING.value,
+                    ))
+                    imported += 1
+                elif record['status'] and 'confirmed' in record['status'].lower():
+                    existing.status = InterviewStatus.CONFIRMED.value
+    session.commit()
+    return imported, errors
+
+
+def bulk_import(session, csv_data):
+    return import_candidates_from_csv(csv_data, session=session)
+
+
+def run(importer, csv_data):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine, tables=[Candidate.__table__, Interview.__table__])
+        statements = []
+        event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(1))
+        timings = []
+        for _ in ('new', 'existing'):
+            statements.clear()
+            with Session(engine) as session:
+                started = time.perf_counter()
+                importer(session, csv_data)
+                timings.append((time.perf_counter() - started, len(statements)))
+        engine.dispose()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--skip-before-above', type=int, default=None,
+                        help="don't run the per-row importer above this many rows")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'importer':>9} {'new s':>8} {'stmts':>8} {'existing s':>11} {'stmts':>8}")
+    for rows in args.rows:
+        csv_data = make_csv(rows)
+        for name, importer in (('before', legacy_import), ('after', bulk_import)):
+            if name == 'before' and args.skip_before_above and rows > args.skip_before_above:
+                continue
+            (new_s, new_n), (existing_s, existing_n) = run(importer, csv_data)
+            print(f"{rows:>8} {name:>9} {new_s:>8.2f} {new_n:>8} {existing_s:>11.2f} {existing_n:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Deduplication benchmark: blocking + union-find (dedup.py) on synthetic
+candidates, one in ten of which is a planted duplicate (a Gmail dot/plus
+variant, or a respelled first name with the same phone number).
+
+Reports time, pair comparisons (against n^2/2 for pairwise matching) and
+how many planted duplicates were found.
+
+    python benchmarks/bench_dedup.py --rows 10000 100000 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# config.py refuses to import without a secret; benchmarks never serve requests
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-not-for-production")
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from database import Base, Candidate, EmailTracking, Interview  # noqa: E402
+from dedup import find_duplicates, merge_clusters  # noqa: E402
+
+FIRST = ('James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'David', 'Susan')
+# Spelling variants that sound the same (same Soundex code)
+VARIANT = {'James': 'Jaimes', 'Mary': 'Marie', 'John': 'Jon', 'Patricia': 'Patrisha', 'Robert': 'Rupert',
+           'Jennifer': 'Jenifer', 'Michael': 'Micheal', 'Linda': 'Lynda', 'David': 'Davyd', 'Susan': 'Suzan'}
+SYLLABLES = ('ka', 'ro', 'mi', 'ten', 'sul', 'bar', 'lin', 'do', 'vek', 'ar', 'is', 'hom')
+
+
+def people(rows, seed=5):
+    rng = random.Random(seed)
+    originals = rows - rows // 10
+    result = []
+    for i in range(originals):
+        last = ''.join(rng.choice(SYLLABLES) for _ in range(4)).title()
+        first = rng.choice(FIRST)
+        result.append({'first_name': first, 'last_name': last, 'email': f"{first}.{last}{i}@gmail.com".lower(),
+                       'phone': f"555{i:07d}", 'country': 'US'})
+    for i in range(rows - originals):
+        original = result[rng.randrange(originals)]
+        if i % 2:
+            local, domain = original['email'].split('@')
+            result.append({**original, 'email': f"{local.replace('.', '')}+apply{i}@googlemail.com"})
+        else:
+            result.append({**original, 'first_name': VARIANT[original['first_name']],
+                           'email': f"dup{i}@example.com", 'phone': f"+1 {original['phone']}"})
+    rng.shuffle(result)
+    return result, rows - originals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'find s':>8} {'comparisons':>12} {'pairwise':>14} {'planted':>8} {'found':>8} {'merge s':>8}",
+          flush=True)
+    for rows in args.rows:
+        records, planted = people(rows)
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            Base.metadata.create_all(engine, tables=[Candidate.__table__, Interview.__table__,
+                                                     EmailTracking.__table__])
+            with engine.begin() as conn:
+                for start in range(0, rows, 20000):
+                    conn.execute(insert(Candidate), records[start:start + 20000])
+            with Session(engine) as session:
+                started = time.perf_counter()
+                clusters, stats = find_duplicates(session)
+                find_s = time.perf_counter() - started
+                started = time.perf_counter()
+                merge_clusters(clusters, session=session)
+                merge_s = time.perf_counter() - started
+            engine.dispose()
+        print(f"{rows:>9} {find_s:>8.2f} {stats['comparisons']:>12} {rows * (rows - 1) // 2:>14} "
+              f"{planted:>8} {stats['duplicates']:>8} {merge_s:>8.2f}", flush=True)
+
+
+if __name__ == '__main__':
+    main()
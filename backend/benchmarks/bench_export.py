@@ -0,0 +1,78 @@
+"""
+Export memory benchmark: loading every candidate and building the CSV in
+memory (before) vs. the streamed export in exports.py (after).
+
+Reports wall time and the tracemalloc peak while the body is produced; the
+streamed peak should stay flat as the row count grows.
+
+    python benchmarks/bench_export.py --rows 100000 1000000
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# config.py refuses to import without a secret; benchmarks never serve requests
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-not-for-production")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from database import Candidate  # noqa: E402
+from exports import CANDIDATE_COLUMNS, csv_chunks, iter_rows  # noqa: E402
+from seed_data import seed_scale  # noqa: E402
+
+
+def materialized_export(session):
+    """All rows as ORM objects, the whole CSV in one string"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in CANDIDATE_COLUMNS])
+    for candidate in session.query(Candidate).order_by(Candidate.id).all():
+        writer.writerow([getattr(candidate, name) for name, _ in CANDIDATE_COLUMNS])
+    return len(buffer.getvalue().encode('utf-8'))
+
+
+def streamed_export(session):
+    rows = iter_rows(session.query(Candidate).order_by(Candidate.id), CANDIDATE_COLUMNS)
+    return sum(len(chunk) for chunk in csv_chunks(CANDIDATE_COLUMNS, rows))
+
+
+def measure(engine, exporter):
+    with Session(engine) as session:
+        tracemalloc.start()
+        started = time.perf_counter()
+        size = exporter(session)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed, peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--skip-before-above', type=int, default=None,
+                        help="don't run the materialized export above this many rows")
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'export':>9} {'seconds':>8} {'peak MB':>9} {'body MB':>9}", flush=True)
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            seed_scale(engine, candidates=rows, interviews=0, tracking=0)
+            for name, exporter in (('before', materialized_export), ('after', streamed_export)):
+                if name == 'before' and args.skip_before_above and rows > args.skip_before_above:
+                    continue
+                elapsed, peak, size = measure(engine, exporter)
+                print(f"{rows:>9} {name:>9} {elapsed:>8.2f} {peak / 2**20:>9.1f} {size / 2**20:>9.1f}", flush=True)
+            engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Micro-benchmarks for the date/time parsers in scheduler.py: the original
+regex + strptime parsers (before) vs. the memoized, pre-classified ones
+(after).
+
+Inputs mimic a recruiting CSV: a handful of distinct date and time strings
+repeated across many rows, plus slot generation as in find_available_slots.
+
+    python benchmarks/bench_parsing.py --rows 20000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# config.py refuses to import without a secret; benchmarks never serve requests
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-not-for-production")
+
+import scheduler  # noqa: E402
+
+_MONTHS = {'JAN': 1, 'FEB': 2, 'MAR': 3, 'APR': 4, 'MAY': 5, 'JUN': 6,
+           'JUL': 7, 'AUG': 8, 'SEP': 9, 'OCT': 10, 'NOV': 11, 'DEC': 12}
+
+
+def legacy_parse_date_string(date_str):
+    if not date_str or not date_str.strip():
+        return None
+    date_str = re.sub(r'(\d+)(TH|ST|ND|RD)', r'\1', date_str, flags=re.IGNORECASE).strip()
+    for fmt in ("%d %b %Y", "%d %B %Y", "%d-%b-%Y", "%d/%b/%Y"):
+        try:
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+    parts = date_str.split()
+    if len(parts) >= 3 and parts[1].upper() in _MONTHS:
+        return datetime(int(parts[2]), _MONTHS[parts[1].upper()], int(re.sub(r'\D', '', parts[0])))
+    return None
+
+
+def legacy_parse_time_string(time_str):
+    if not time_str or not time_str.strip():
+        return None
+    time_str = time_str.strip()
+    if ':' in time_str:
+        parts = time_str.split(':')
+        hour = int(parts[0])
+        minute = int(parts[1]) if len(parts) > 1 else 0
+        if hour < 9:
+            hour += 12
+        return f"{hour:02d}:{minute:02d}"
+    return time_str
+
+
+def legacy_combine_datetime(date_obj, time_str):
+    if not date_obj or not time_str:
+        return None
+    time_parts = time_str.split(':')
+    hour = int(time_parts[0])
+    minute = int(time_parts[1]) if len(time_parts) > 1 else 0
+    return datetime.combine(date_obj.date(), datetime.min.time().replace(hour=hour, minute=minute))
+
+
+def csv_columns(rows):
+    rng = random.Random(3)
+    dates = [f"{d}{'ST' if d in (1, 21) else 'ND' if d in (2, 22) else 'RD' if d in (3, 23) else 'TH'} NOV 2025"
+             for d in range(1, 29)]
+    times = [f"{h}:{m:02d}" for h in (9, 10, 11, 12, 1, 2, 3, 4) for m in (0, 30)]
+    return [rng.choice(dates) for _ in range(rows)], [rng.choice(times) for _ in range(rows)]
+
+
+def slot_times():
+    return [f"{hour:02d}:{minute:02d}" for hour in range(9, 17) for minute in (0, 30)]
+
+
+def cases(rows):
+    dates, times = csv_columns(rows)
+    slot_strings = slot_times()
+    days = [datetime(2025, 11, 1) + timedelta(days=i) for i in range(30)]
+    return {
+        'parse_date_string': (
+            lambda: [legacy_parse_date_string(d) for d in dates],
+            lambda: [scheduler.parse_date_string(d) for d in dates],
+        ),
+        'parse_time_string': (
+            lambda: [legacy_parse_time_string(t) for t in times],
+            lambda: [scheduler.parse_time_string(t) for t in times],
+        ),
+        'combine_datetime (30 days x 16 slots)': (
+            lambda: [legacy_combine_datetime(day, t) for day in days for t in slot_strings],
+            lambda: [scheduler.combine_datetime(day, t) for day in days for t in slot_strings],
+        ),
+        'import row (date + time + combine)': (
+            lambda: [legacy_combine_datetime(legacy_parse_date_string(d), legacy_parse_time_string(t))
+                     for d, t in zip(dates, times)],
+            lambda: [scheduler.combine_datetime(scheduler.parse_date_string(d), scheduler.parse_time_string(t))
+                     for d, t in zip(dates, times)],
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'case':<40} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    for name, (before, after) in cases(args.rows).items():
+        assert before() == after(), name
+        before_s = min(timeit.repeat(before, number=1, repeat=args.repeat))
+        after_s = min(timeit.repeat(after, number=1, repeat=args.repeat))
+        print(f"{name:<40} {before_s * 1000:>10.2f} {after_s * 1000:>10.2f} {before_s / after_s:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Delivery throughput of send_campaign_task against the local SMTPS sink,
+clean and under injected faults (smtp_sink.Faults).
+
+Every scenario sends the same campaign through a fresh sink with a fixed
+seed, so the faults hit the same messages on every run. The task's retry
+backoff is recorded rather than slept by default (``backoff s`` is what it
+would have added); pass ``--sleep`` to include it in the wall time.
+
+    python benchmarks/bench_smtp_delivery.py --messages 1000
+    python benchmarks/bench_smtp_delivery.py --only p451 --only cap --sleep
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# config.py refuses to import without a secret; benchmarks never serve requests
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-not-for-production")
+
+SCENARIOS = {
+    'clean': {},
+    'latency': {'latency': 0.005, 'jitter': 0.005},
+    'p421': {'p421': 0.02},
+    'p451': {'p451': 0.05},
+    'p550': {'p550': 0.02},
+    'disconnect': {'disconnect': 0.02},
+    'cap': {'max_per_connection': 100},
+}
+
+
+def run_scenario(name, messages, seed, sleep):
+    from config import Config
+    from smtp_sink import Faults, SMTPSink
+    import tasks
+
+    backoffs = []
+    real_sleep = tasks.time.sleep
+
+    def record(seconds):
+        if seconds:
+            backoffs.append(seconds)
+            if sleep:
+                real_sleep(seconds)
+
+    recipients = [{'Name': f"Candidate {i}", 'Email': f"c{i}@example.com"} for i in range(messages)]
+    with SMTPSink(tls=True, faults=Faults(seed=seed, **SCENARIOS[name])) as sink:
+        # smtplib verifies the sink's self-signed certificate like a real one
+        os.environ['SSL_CERT_FILE'] = sink.certfile
+        Config.SMTP_SERVER, Config.SMTP_PORT = '127.0.0.1', sink.port
+        Config.EMAIL_PASSWORD, Config.RATE_LIMIT_DELAY = 'benchmark', 0
+        tasks.time.sleep = record
+        try:
+            started = time.perf_counter()
+            result = tasks.send_campaign_task(
+                f"bench-{name}", 'sender@example.com', 'Benchmark', recipients,
+                html_template='<p>Hi {Name}</p>', plain_template='Hi {Name}',
+            )
+            elapsed = time.perf_counter() - started
+        finally:
+            tasks.time.sleep = real_sleep
+        stats = sink.stats()
+    assert stats['messages'] == result['successful'], (stats, result['successful'])
+    return elapsed, result, stats, sum(backoffs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=1000)
+    parser.add_argument('--only', action='append', choices=sorted(SCENARIOS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--sleep', action='store_true', help='Actually sleep the retry backoff')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='bench-') as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from database import ENGINE, Base
+        import tasks
+
+        Base.metadata.create_all(ENGINE)
+        tasks.send_campaign_task.update_state = lambda **kwargs: None
+        logging.disable(logging.ERROR)  # one line per retry or rejection would dominate the timings
+
+        print(f"{'scenario':<11} {'sent':>6} {'failed':>6} {'conns':>6} {'attempts':>8} {'seconds':>8} "
+              f"{'msg/s':>8} {'backoff s':>9}", flush=True)
+        for name in SCENARIOS:
+            if args.only and name not in args.only:
+                continue
+            elapsed, result, stats, backoff = run_scenario(name, args.messages, args.seed, args.sleep)
+            print(f"{name:<11} {result['successful']:>6} {result['failed']:>6} {stats['connections']:>6} "
+                  f"{stats['attempts']:>8} {elapsed:>8.2f} {result['successful'] / elapsed:>8.1f} {backoff:>9.0f}",
+                  flush=True)
+        ENGINE.dispose()
+
+
+if __name__ == '__main__':
+    main()
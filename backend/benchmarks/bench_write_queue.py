@@ -0,0 +1,119 @@
+"""
+Concurrent small writes to SQLite: one transaction per write (before) vs.
+the group-committing write queue (after).
+
+Each write is what send_campaign_task logs per message: an email_tracking
+row plus its rollup counter upsert.
+
+    python benchmarks/bench_write_queue.py --threads 4 16 --writes 250
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# config.py refuses to import without a secret; benchmarks never serve requests
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-not-for-production")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from analytics import RollupDeltas  # noqa: E402
+from database import Base, EmailTracking, TrackingRollup  # noqa: E402
+from write_queue import WriteQueue  # noqa: E402
+
+
+def build_database(path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine, tables=[EmailTracking.__table__, TrackingRollup.__table__])
+    return engine
+
+
+def log_sent(session):
+    sent_at = datetime.utcnow()
+    session.add(EmailTracking(
+        tracking_id=str(uuid.uuid4()), campaign_id='bench', recipient_email='r@example.com',
+        status='sent', created_at=sent_at,
+    ))
+    deltas = RollupDeltas()
+    deltas.add('bench', sent_at, sent=1)
+    deltas.apply(session)
+
+
+def direct(factory):
+    def write():
+        session = factory()
+        try:
+            log_sent(session)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    return write
+
+
+def queued(factory):
+    queue = WriteQueue(session_factory=factory)
+    return lambda: queue.run(log_sent)
+
+
+def run(make_writer, threads, writes):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_database(os.path.join(tmp, 'bench.db'))
+        write = make_writer(sessionmaker(bind=engine))
+        latencies = []
+        errors = []
+
+        def worker():
+            for _ in range(writes):
+                started = time.perf_counter()
+                try:
+                    write()
+                except OperationalError as e:
+                    errors.append(e)
+                    continue
+                latencies.append(time.perf_counter() - started)
+
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        started = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+
+    latencies.sort()
+    return {
+        'writes_per_s': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else 0.0,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0.0,
+        'errors': len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, nargs='+', default=[4, 16])
+    parser.add_argument('--writes', type=int, default=250, help="writes per thread")
+    args = parser.parse_args()
+
+    print(f"{'threads':>8} {'mode':>7} {'writes/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for threads in args.threads:
+        for name, make_writer in (('direct', direct), ('queued', queued)):
+            result = run(make_writer, threads, args.writes)
+            print(f"{threads:>8} {name:>7} {result['writes_per_s']:>10.0f} {result['p50_ms']:>8.2f} "
+                  f"{result['p99_ms']:>8.2f} {result['errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,456 @@
+"""
+Load test of the API under gunicorn, set up like the Dockerfile.
+
+Seeds a SQLite database with seed_data.seed_scale and starts gunicorn
+(4 sync workers and a 600 s timeout by default, as in the Dockerfile), a
+Celery worker and a local SMTPS sink (smtp_sink.py), all wired together
+by benchmarks/loadtest_app.py. Celery uses a filesystem broker and result
+backend by default, so no Redis or mail server is needed; ``--broker``
+points it at a real one. The file result backend can hand a status poll a
+half-written result (a rare 500 on the status endpoint) where Redis would
+not.
+
+``--users`` virtual users then drive the API for ``--duration`` seconds.
+Each user logs in and loops over weighted scenarios:
+
+    browse    a page of the candidate list, then a search (name + country)
+    calendar  the schedule calendar for a two-week window
+    pixels    a burst of tracking-pixel hits on seeded tracking ids (no auth)
+    campaign  submit a campaign to the sink, poll its status until it is done
+    login     a fresh token
+
+The report lists requests, throughput, latency percentiles and error rate
+(HTTP status >= 400 or a connection error) per endpoint; ``campaign`` also
+reports submit-to-done time. Several ``--workers``/``--worker-class``
+values run one after another against the same database, followed by a
+summary table to compare them.
+
+    python benchmarks/loadtest.py --users 20 --duration 60
+    python benchmarks/loadtest.py --workers 2 4 8 --worker-class sync gthread --threads 4 --json load.json
+    python benchmarks/loadtest.py --url http://localhost:5000 --scenario browse --scenario calendar
+
+With ``--url`` nothing is started; credentials come from ADMIN_EMAIL and
+ADMIN_PASSWORD, ``--db`` (if given) provides tracking ids, and the
+campaign scenario is skipped unless asked for, since it would send real
+mail. Rate limiting is disabled in the servers started here (every user
+shares one address); ``--rate-limits`` keeps it on.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from urllib.parse import quote, urlsplit
+
+BACKEND_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_ROOT)
+
+os.environ.setdefault('SECRET_KEY', 'benchmark-secret-key-not-for-production')
+os.environ.setdefault('JWT_SECRET_KEY', 'benchmark-jwt-secret-key-not-for-production')
+os.environ.setdefault('ADMIN_EMAIL', 'admin@example.com')
+os.environ.setdefault('ADMIN_PASSWORD', 'benchmark-password')
+
+SCENARIOS = {}
+POLL_INTERVAL = 0.5
+CAMPAIGN_TIMEOUT = 300
+
+
+def scenario(name, weight):
+    """Register ``fn(user)``, picked with probability proportional to ``weight``"""
+    def register(fn):
+        SCENARIOS[name] = {'run': fn, 'weight': weight}
+        return fn
+    return register
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class Stats:
+    """Latency samples and errors per endpoint label, shared by all users"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = Counter()
+        self.statuses = {}
+
+    def record(self, label, seconds, status, ok):
+        with self._lock:
+            self.latencies.setdefault(label, []).append(seconds)
+            self.statuses.setdefault(label, Counter())[str(status)] += 1
+            if not ok:
+                self.errors[label] += 1
+
+    def report(self, elapsed):
+        endpoints = {}
+        everything = []
+        for label in sorted(self.latencies):
+            ordered = sorted(self.latencies[label])
+            everything.extend(ordered)
+            endpoints[label] = _summary(ordered, self.errors[label], elapsed)
+            endpoints[label]['statuses'] = dict(self.statuses[label])
+        everything.sort()
+        return {
+            'elapsed_s': round(elapsed, 2),
+            'endpoints': endpoints,
+            'total': _summary(everything, sum(self.errors.values()), elapsed),
+        }
+
+
+def _summary(ordered, errors, elapsed):
+    ms = lambda q: round(percentile(ordered, q) * 1000, 1) if ordered else None  # noqa: E731
+    return {
+        'requests': len(ordered),
+        'rps': round(len(ordered) / elapsed, 1) if elapsed else None,
+        'p50_ms': ms(0.50),
+        'p90_ms': ms(0.90),
+        'p95_ms': ms(0.95),
+        'p99_ms': ms(0.99),
+        'max_ms': round(ordered[-1] * 1000, 1) if ordered else None,
+        'errors': errors,
+        'error_rate': round(errors / len(ordered), 4) if ordered else 0.0,
+    }
+
+
+class User:
+    """One virtual user: a keep-alive connection, a token and its own RNG"""
+
+    def __init__(self, index, base_url, stats, context, seed):
+        parts = urlsplit(base_url)
+        self.connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+        self.stats = stats
+        self.context = context
+        self.rng = random.Random(f"{seed}:user:{index}")
+        self.headers = {}
+
+    def request(self, label, method, path, body=None, auth=True):
+        """``(status, parsed JSON or None)``; the request is recorded under ``label``"""
+        headers = {'User-Agent': 'Mozilla/5.0 (loadtest)'}
+        if auth:
+            headers.update(self.headers)
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            self.connection.close()  # reopened by the next request
+            self.stats.record(label, time.perf_counter() - started, type(e).__name__, False)
+            return None, None
+        self.stats.record(label, time.perf_counter() - started, response.status, response.status < 400)
+        if response.getheader('Content-Type', '').startswith('application/json'):
+            return response.status, json.loads(data)
+        return response.status, None
+
+    def login(self):
+        status, body = self.request('POST /api/token', 'POST', '/api/token', {
+            'email': os.environ['ADMIN_EMAIL'], 'password': os.environ['ADMIN_PASSWORD'],
+        }, auth=False)
+        if status == 200:
+            self.headers = {'Authorization': f"Bearer {body['access_token']}"}
+        return status == 200
+
+
+# --- Scenarios -----------------------------------------------------------
+
+@scenario('browse', weight=4)
+def browse(user):
+    offset = user.rng.randrange(20) * 50
+    user.request('GET /api/candidates', 'GET', f"/api/candidates?limit=50&offset={offset}")
+    name = user.rng.choice(user.context['search_terms'])
+    country = user.rng.choice(('US', 'UK', 'CA', 'IN', ''))
+    user.request('GET /api/candidates?search', 'GET',
+                 f"/api/candidates?search={quote(name)}&country={country}&limit=50")
+
+
+@scenario('calendar', weight=2)
+def calendar(user):
+    start = user.context['anchor'] + timedelta(days=user.rng.randrange(-28, 28))
+    end = start + timedelta(days=14)
+    user.request('GET /api/schedule/calendar', 'GET',
+                 f"/api/schedule/calendar?start_date={start.date().isoformat()}&end_date={end.date().isoformat()}")
+
+
+@scenario('pixels', weight=3)
+def pixels(user):
+    ids = user.context['tracking_ids']
+    for _ in range(user.context['pixel_burst']):
+        user.request('GET /api/track/<id>', 'GET', f"/api/track/{user.rng.choice(ids)}", auth=False)
+
+
+@scenario('campaign', weight=1)
+def campaign(user):
+    size = user.context['campaign_size']
+    recipients = [{'Name': f"Load Test {i}", 'Email': f"load{i}@example.com"} for i in range(size)]
+    started = time.perf_counter()
+    status, body = user.request('POST /api/send-emails', 'POST', '/api/send-emails', {
+        'senderEmail': 'sender@example.com',
+        'subject': 'Load test',
+        'recipients': recipients,
+        'htmlTemplate': '<p>Hi {Name},</p><p>See <a href="https://example.com/jobs">open roles</a>.</p>',
+        'plainTemplate': 'Hi {Name}',
+    })
+    if status != 200:
+        return
+    state = None
+    while time.perf_counter() - started < CAMPAIGN_TIMEOUT and time.monotonic() < user.context['deadline']:
+        time.sleep(POLL_INTERVAL)
+        _, progress = user.request('GET /api/campaigns/<id>/status', 'GET', f"/api/campaigns/{body['task_id']}/status")
+        state = progress and progress.get('state')
+        if state in ('SUCCESS', 'FAILURE'):
+            break
+    if state in ('SUCCESS', 'FAILURE'):
+        ok = state == 'SUCCESS' and progress['successful'] == size
+        user.stats.record('campaign (submit to done)', time.perf_counter() - started, state, ok)
+
+
+@scenario('login', weight=1)
+def login(user):
+    user.login()
+
+
+# --- Runner --------------------------------------------------------------
+
+def run_load(base_url, scenarios, users, duration, ramp, think, context, seed):
+    """Drive ``base_url`` for ``duration`` seconds; the report of a ``Stats``"""
+    stats = Stats()
+    names = list(scenarios)
+    weights = [SCENARIOS[name]['weight'] for name in names]
+    started = time.monotonic()
+    context = dict(context, deadline=started + duration)
+
+    def run(index):
+        time.sleep(ramp * index / users)
+        user = User(index, base_url, stats, context, seed)
+        user.login()
+        while time.monotonic() < context['deadline']:
+            name = user.rng.choices(names, weights)[0]
+            SCENARIOS[name]['run'](user)
+            if think:
+                time.sleep(user.rng.uniform(0, 2 * think))
+        user.connection.close()
+
+    threads = [threading.Thread(target=run, args=(i,), daemon=True) for i in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats.report(time.monotonic() - started)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_healthy(base_url, process, timeout=60):
+    parts = urlsplit(base_url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=2)
+            connection.request('GET', '/api/health')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{base_url} did not become healthy within {timeout}s")
+
+
+def _stop(process):
+    if process.poll() is None:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+class Servers:
+    """gunicorn + Celery worker for one server configuration, as a context manager"""
+
+    def __init__(self, args, database_url, sink, tmp, workers, worker_class):
+        self.port = _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        run_dir = os.path.join(tmp, f"{worker_class}-{workers}")
+        os.makedirs(run_dir, exist_ok=True)
+        self.env = dict(
+            os.environ,
+            PYTHONPATH=os.pathsep.join([BENCHMARKS_DIR, BACKEND_ROOT, os.environ.get('PYTHONPATH', '')]),
+            DATABASE_URL=database_url,
+            LOADTEST_DIR=run_dir,
+            LOADTEST_RATE_LIMITS='1' if args.rate_limits else '0',
+            SMTP_SERVER='127.0.0.1',
+            SMTP_PORT=str(sink.port),
+            SSL_CERT_FILE=sink.certfile,  # the worker verifies the sink's certificate like a real one
+            EMAIL_PASSWORD='loadtest',
+            RATE_LIMIT_DELAY='0',
+            CELERY_BROKER_URL=args.broker,
+        )
+        self.gunicorn = [
+            sys.executable, '-m', 'gunicorn', '--bind', f"127.0.0.1:{self.port}",
+            '--workers', str(workers), '--worker-class', worker_class, '--threads', str(args.threads),
+            '--timeout', str(args.timeout), '--chdir', BACKEND_ROOT, 'loadtest_app:app',
+        ]
+        self.celery = [
+            sys.executable, '-m', 'celery', '-A', 'loadtest_app.celery', 'worker', '--loglevel', 'WARNING',
+            '--concurrency', str(args.celery_concurrency), '--without-gossip', '--without-mingle',
+        ]
+        self.log_path = os.path.join(run_dir, 'servers.log')
+        self.processes = []
+
+    def __enter__(self):
+        self.log = open(self.log_path, 'wb')
+        for command in (self.celery, self.gunicorn):
+            self.processes.append(subprocess.Popen(
+                command, cwd=BACKEND_ROOT, env=self.env, stdout=self.log, stderr=subprocess.STDOUT,
+            ))
+        try:
+            _wait_healthy(self.base_url, self.processes[-1])
+        except Exception:
+            self.__exit__()
+            raise RuntimeError(f"Servers did not start; see {self.log_path}")
+        return self
+
+    def __exit__(self, *exc):
+        for process in reversed(self.processes):
+            _stop(process)
+        self.log.close()
+
+
+def _prepare_database(args, tmp):
+    """Seed (or reuse) the database; ``(database_url, tracking_ids)``"""
+    database_url = f"sqlite:///{os.path.abspath(args.db or os.path.join(tmp, 'loadtest.db'))}"
+    os.environ['DATABASE_URL'] = database_url
+    from sqlalchemy import text
+
+    from database import ENGINE, init_db
+    from seed_data import seed_scale
+
+    if not args.url:
+        seed_scale(ENGINE, candidates=args.candidates, interviews=args.candidates * 3,
+                   tracking=args.candidates * 5, seed=args.seed)
+        init_db()  # once here, not racing in every gunicorn worker
+    with ENGINE.connect() as connection:
+        ids = [row[0] for row in connection.execute(text('SELECT tracking_id FROM email_tracking LIMIT 5000'))]
+    ENGINE.dispose()
+    return database_url, ids
+
+
+def _print_report(title, report):
+    print(f"\n{title}  ({report['elapsed_s']} s)")
+    print(f"{'endpoint':<34} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>9} "
+          f"{'max ms':>9} {'errors':>7}")
+    rows = list(report['endpoints'].items()) + [('TOTAL', report['total'])]
+    for label, row in rows:
+        print(f"{label:<34} {row['requests']:>9} {row['rps']:>8} {row['p50_ms']:>8} {row['p90_ms']:>8} "
+              f"{row['p99_ms']:>9} {row['max_ms']:>9} {row['error_rate']:>7.2%}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='Load an already running server instead of starting one')
+    parser.add_argument('--users', type=int, default=20, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds of load per server configuration')
+    parser.add_argument('--ramp', type=float, default=5, help='Seconds over which the users start')
+    parser.add_argument('--think', type=float, default=0, help='Mean pause between scenarios, seconds')
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS), help='Run only this (repeatable)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[4], help='gunicorn worker counts to compare')
+    parser.add_argument('--worker-class', nargs='+', default=['sync'], help='gunicorn worker classes to compare')
+    parser.add_argument('--threads', type=int, default=1, help='Threads per worker (gthread)')
+    parser.add_argument('--timeout', type=int, default=600, help='gunicorn worker timeout')
+    parser.add_argument('--celery-concurrency', type=int, default=2)
+    parser.add_argument('--broker', default='filesystem://',
+                        help='Celery broker and result backend, e.g. redis://localhost:6379/0')
+    parser.add_argument('--rate-limits', action='store_true', help='Keep Flask-Limiter enabled')
+    parser.add_argument('--candidates', type=int, default=20000, help='Seeded candidates (x3 interviews, x5 tracking)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--db', help='Seed into (or reuse) this SQLite file instead of a temporary one')
+    parser.add_argument('--campaign-size', type=int, default=20, help='Recipients per submitted campaign')
+    parser.add_argument('--pixel-burst', type=int, default=25, help='Pixel hits per pixels scenario')
+    parser.add_argument('--json', metavar='PATH', help='Write the results as JSON')
+    args = parser.parse_args()
+
+    scenarios = args.scenario or [name for name in SCENARIOS if not (args.url and name == 'campaign')]
+    results = {
+        'meta': {
+            'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'users': args.users, 'duration_s': args.duration, 'think_s': args.think, 'scenarios': scenarios,
+            'candidates': None if args.url else args.candidates, 'cpus': os.cpu_count(),
+        },
+        'runs': [],
+    }
+    with tempfile.TemporaryDirectory(prefix='loadtest-') as tmp:
+        database_url, tracking_ids = (None, []) if args.url and not args.db else _prepare_database(args, tmp)
+        from seed_data import _LAST_NAMES, SEED_ANCHOR
+
+        context = {
+            'anchor': SEED_ANCHOR,
+            'search_terms': [name.lower() for name in _LAST_NAMES[:20]],
+            # unknown ids still get the pixel, they just match no row
+            'tracking_ids': tracking_ids or [str(uuid.UUID(int=i)) for i in range(1, 1001)],
+            'campaign_size': args.campaign_size,
+            'pixel_burst': args.pixel_burst,
+        }
+
+        def load(base_url, server):
+            report = run_load(base_url, scenarios, args.users, args.duration, args.ramp, args.think, context,
+                              args.seed)
+            report['server'] = server
+            results['runs'].append(report)
+            _print_report(' '.join(f"{k}={v}" for k, v in server.items()), report)
+
+        if args.url:
+            load(args.url, {'url': args.url})
+        else:
+            from smtp_sink import SMTPSink
+
+            with SMTPSink(tls=True) as sink:
+                for worker_class in args.worker_class:
+                    for workers in args.workers:
+                        with Servers(args, database_url, sink, tmp, workers, worker_class) as servers:
+                            load(servers.base_url, {
+                                'worker_class': worker_class, 'workers': workers, 'threads': args.threads,
+                                'timeout': args.timeout,
+                            })
+                results['meta']['smtp_sink'] = sink.stats()
+
+    if len(results['runs']) > 1:
+        print(f"\n{'server':<40} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>9} {'errors':>7}")
+        for run in results['runs']:
+            total = run['total']
+            server = ' '.join(f"{k}={v}" for k, v in run['server'].items())
+            print(f"{server:<40} {total['rps']:>8} {total['p50_ms']:>8} {total['p95_ms']:>8} {total['p99_ms']:>9} "
+                  f"{total['error_rate']:>7.2%}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
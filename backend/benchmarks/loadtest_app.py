@@ -0,0 +1,35 @@
+"""
+The real Flask app and Celery instance, set up for loadtest.py.
+
+gunicorn (``loadtest_app:app``) and the Celery worker
+(``celery -A loadtest_app.celery worker``) both import this module, so
+they share the same broker. With ``CELERY_BROKER_URL=filesystem://`` that
+needs no Redis: kombu's filesystem transport and Celery's file result
+backend, both under ``LOADTEST_DIR``. Any other URL is used as is, like in
+production. Rate limiting is off unless ``LOADTEST_RATE_LIMITS=1``,
+because every virtual user comes from the same address.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, limiter  # noqa: E402
+from celery_app import celery  # noqa: E402
+
+if os.getenv('CELERY_BROKER_URL') == 'filesystem://':
+    _queue = os.path.join(os.environ['LOADTEST_DIR'], 'broker')
+    _results = os.path.join(os.environ['LOADTEST_DIR'], 'results')
+    for _folder in (_queue, _results):
+        os.makedirs(_folder, exist_ok=True)
+    celery.conf.update(
+        broker_url='filesystem://',
+        broker_transport_options={
+            'data_folder_in': _queue, 'data_folder_out': _queue, 'store_processed': False,
+            'control_folder': os.path.join(os.environ['LOADTEST_DIR'], 'control'),
+        },
+        result_backend=f"file://{_results}",
+    )
+limiter.enabled = os.getenv('LOADTEST_RATE_LIMITS') == '1'
+
+__all__ = ['app', 'celery']
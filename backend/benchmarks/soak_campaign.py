@@ -0,0 +1,89 @@
+"""
+Soak test: one synthetic campaign of 100k messages through
+send_campaign_task, against the local SMTPS sink and a scratch SQLite
+database, with the task's memory profiling (memory_profile.py) on.
+
+Prints every checkpoint (RSS, traced memory, top growing allocation
+site) and compares the end of the run with the checkpoint after
+``--warmup`` messages, once pools, caches and the SQLite page cache have
+filled. Exits with status 1 if RSS or traced memory grew by more than
+``--max-growth-mb`` in between.
+
+    python benchmarks/soak_campaign.py                         # 100k messages
+    python benchmarks/soak_campaign.py --messages 20000 --every 500
+    python benchmarks/soak_campaign.py --results-limit 1000000  # keep every result, to see it grow
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# config.py refuses to import without a secret; benchmarks never serve requests
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-not-for-production")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=100000)
+    parser.add_argument('--every', type=int, default=1000, help='Messages between checkpoints')
+    parser.add_argument('--warmup', type=int, default=10000, help='Checkpoint the growth is measured from')
+    parser.add_argument('--max-growth-mb', type=float, default=10.0)
+    parser.add_argument('--results-limit', type=int, help='Override CAMPAIGN_RESULTS_LIMIT')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='soak-') as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'soak.db')}"
+        from config import Config
+        from database import ENGINE, init_db
+        from smtp_sink import SMTPSink
+        import tasks
+
+        init_db()
+        tasks.send_campaign_task.update_state = lambda **kwargs: None
+        logging.disable(logging.INFO)  # the checkpoints are printed below instead
+        Config.CAMPAIGN_MEMORY_PROFILE, Config.CAMPAIGN_MEMORY_PROFILE_EVERY = True, args.every
+        if args.results_limit is not None:
+            Config.CAMPAIGN_RESULTS_LIMIT = args.results_limit
+
+        recipients = [{'Name': f"Soak Candidate {i}", 'Email': f"soak{i}@example.com"} for i in range(args.messages)]
+        html = "<p>Hi {Name},</p><p>See <a href=\"https://example.com/jobs\">open roles</a>.</p>"
+        with SMTPSink(tls=True) as sink:
+            # smtplib verifies the sink's self-signed certificate like a real one
+            os.environ['SSL_CERT_FILE'] = sink.certfile
+            Config.SMTP_SERVER, Config.SMTP_PORT = '127.0.0.1', sink.port
+            Config.EMAIL_PASSWORD, Config.RATE_LIMIT_DELAY = 'soak', 0
+            started = time.perf_counter()
+            result = tasks.send_campaign_task(
+                'soak', 'sender@example.com', 'Soak test', recipients,
+                html_template=html, plain_template='Hi {Name}',
+            )
+            elapsed = time.perf_counter() - started
+        ENGINE.dispose()
+
+    checkpoints = result['memory_profile']['checkpoints']
+    print(f"{'messages':>9} {'rss MB':>8} {'peak MB':>8} {'traced MB':>10} {'traced peak':>12}  top growth")
+    for c in checkpoints:
+        grower = c['growth'][0] if c['growth'] else None
+        where = f"{grower['where']} +{grower['size_diff_kb']} KB" if grower else ''
+        print(f"{c['messages']:>9} {c['rss_mb']:>8} {c['rss_peak_mb']:>8} {c['traced_mb']:>10} "
+              f"{c['traced_peak_mb']:>12}  {where}")
+
+    base = next((c for c in checkpoints if c['messages'] >= args.warmup), checkpoints[0])
+    end = checkpoints[-1]
+    rss_growth = end['rss_mb'] - base['rss_mb']
+    traced_growth = end['traced_mb'] - base['traced_mb']
+    print(f"\n{result['successful']} sent, {result['failed']} failed in {elapsed:.1f}s "
+          f"({result['successful'] / elapsed:.0f} msg/s with tracemalloc on); "
+          f"{len(result['results'])} results kept, {result['results_omitted']} omitted")
+    print(f"growth from {base['messages']} to {end['messages']} messages: "
+          f"rss {rss_growth:+.2f} MB, traced {traced_growth:+.2f} MB (limit {args.max_growth_mb} MB)")
+    flat = rss_growth <= args.max_growth_mb and traced_growth <= args.max_growth_mb
+    print('FLAT' if flat else 'GROWING')
+    return 0 if flat and result['successful'] == args.messages else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
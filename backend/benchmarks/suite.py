@@ -0,0 +1,299 @@
+"""
+Benchmark suite: the hot paths of the API and the send pipeline, with JSON
+results and a stored baseline to catch regressions.
+
+Every case runs ``--warmup`` untimed rounds and then ``--rounds`` timed
+ones (like pytest-benchmark's pedantic mode) and reports min/median/mean/
+p95/stddev per round and operations per second. Everything runs in-process
+against a temporary SQLite database seeded with seed_data.seed_scale, and
+the campaign case sends through a local SMTPS sink (smtp_sink.py).
+
+    python benchmarks/suite.py                          # run, print a table
+    python benchmarks/suite.py --json results.json      # also write JSON
+    python benchmarks/suite.py --compare                # vs. benchmarks/baseline.json
+    python benchmarks/suite.py --save-baseline          # refresh the baseline
+    python benchmarks/suite.py --only csv_import --only send_campaign
+
+With ``--compare`` the exit status is 1 if any case's median is more than
+``--tolerance`` slower than the baseline. Baselines are machine-specific;
+refresh them on the machine that runs the comparison. Rate limiting is
+disabled for the run, so the endpoint cases measure the handlers.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_ROOT)
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+CASES = {}
+
+
+def case(name, rounds=20, ops=1):
+    """Register ``fn(env)``; it returns a callable for one round of ``ops`` operations"""
+    def register(fn):
+        CASES[name] = {'setup': fn, 'rounds': rounds, 'ops': ops}
+        return fn
+    return register
+
+
+def summarize(timings, ops):
+    """Per-round statistics in milliseconds, plus throughput at the median"""
+    ordered = sorted(timings)
+    median = statistics.median(ordered)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {
+        'rounds': len(ordered),
+        'ops_per_round': ops,
+        'min_ms': round(ordered[0] * 1000, 3),
+        'median_ms': round(median * 1000, 3),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+        'p95_ms': round(p95 * 1000, 3),
+        'stddev_ms': round(statistics.stdev(ordered) * 1000, 3) if len(ordered) > 1 else 0.0,
+        'ops_per_sec': round(ops / median, 1) if median else None,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """``[{'name', 'baseline_ms', 'current_ms', 'change', 'regressed'}]`` for cases in both runs"""
+    rows = []
+    for name, current in results['benchmarks'].items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if not previous:
+            continue
+        change = current['median_ms'] / previous['median_ms'] - 1 if previous['median_ms'] else 0.0
+        rows.append({
+            'name': name,
+            'baseline_ms': previous['median_ms'],
+            'current_ms': current['median_ms'],
+            'change': round(change, 3),
+            'regressed': change > tolerance,
+        })
+    return rows
+
+
+# --- Cases ---------------------------------------------------------------
+
+@case('find_available_slots', rounds=20)
+def bench_available_slots(env):
+    from scheduler import find_available_slots
+    start = env['anchor']
+    return lambda: find_available_slots(start, start + timedelta(days=14))
+
+
+@case('personalize_email', rounds=20, ops=1000)
+def bench_personalize(env):
+    from utils import ensure_html_formatting, personalize_email
+    template = (
+        "Hi {Name},<br><br>Thanks for applying to the {Role} role at {Company}.<br>"
+        "Your interview is on {Date} at {Time}. Reply to {Recruiter} with questions.<br><br>Best,<br>{Recruiter}"
+    )
+    recipients = [
+        {'Name': f"Candidate {i} Example", 'Email': f"c{i}@example.com", 'Role': 'Engineer', 'Company': 'Acme',
+         'Date': '14 NOV 2030', 'Time': '10:30', 'Recruiter': 'Sam'}
+        for i in range(1000)
+    ]
+    return lambda: [ensure_html_formatting(personalize_email(template, r)) for r in recipients]
+
+
+@case('csv_import', rounds=5, ops=2000)
+def bench_csv_import(env):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    from bench_csv_import import make_csv
+    from csv_import import import_candidates_from_csv
+    from database import Base, Candidate, Interview
+
+    csv_data = make_csv(2000)
+    counter = iter(range(10 ** 6))
+
+    def run():
+        engine = create_engine(f"sqlite:///{os.path.join(env['tmp'], f'import-{next(counter)}.db')}")
+        Base.metadata.create_all(engine, tables=[Candidate.__table__, Interview.__table__])
+        with Session(engine) as session:
+            import_candidates_from_csv(csv_data, session=session)
+        engine.dispose()
+    return run
+
+
+@case('candidate_search', rounds=30)
+def bench_candidate_search(env):
+    client, headers = env['client'], env['headers']
+
+    def run():
+        resp = client.get('/api/candidates?search=smith&country=US&limit=50', headers=headers)
+        assert resp.status_code == 200, resp.status_code
+    return run
+
+
+@case('calendar', rounds=30)
+def bench_calendar(env):
+    client, headers = env['client'], env['headers']
+    start = env['anchor'] - timedelta(days=7)
+    url = f"/api/schedule/calendar?start_date={start.isoformat()}&end_date={(start + timedelta(days=14)).isoformat()}"
+
+    def run():
+        resp = client.get(url, headers=headers)
+        assert resp.status_code == 200, resp.status_code
+    return run
+
+
+@case('tracking_pixel', rounds=10, ops=500)
+def bench_tracking_pixel(env):
+    from database import EmailTracking, get_session
+    client = env['client']
+    session = get_session()
+    try:
+        ids = [row[0] for row in session.query(EmailTracking.tracking_id).limit(500)]
+    finally:
+        session.close()
+
+    def run():
+        for tracking_id in ids:
+            client.get(f"/api/track/{tracking_id}", headers={'User-Agent': 'Mozilla/5.0 (benchmark)'})
+    return run
+
+
+@case('send_campaign', rounds=5, ops=200)
+def bench_send_campaign(env):
+    from config import Config
+    from smtp_sink import SMTPSink
+    from tasks import send_campaign_task
+
+    sink = SMTPSink(tls=True).start()
+    env['cleanup'].append(sink.stop)
+    # smtplib verifies the sink's self-signed certificate like a real one
+    os.environ['SSL_CERT_FILE'] = sink.certfile
+    Config.SMTP_SERVER, Config.SMTP_PORT = '127.0.0.1', sink.port
+    Config.EMAIL_PASSWORD, Config.RATE_LIMIT_DELAY = 'benchmark', 0
+    recipients = [{'Name': f"Candidate {i}", 'Email': f"c{i}@example.com"} for i in range(200)]
+    html = "<p>Hi {Name},</p><p>See <a href=\"https://example.com/jobs\">open roles</a>.</p>"
+    counter = iter(range(10 ** 6))
+
+    def run():
+        before = sink.message_count
+        result = send_campaign_task.apply(args=(
+            f"bench-{next(counter)}", 'sender@example.com', 'Benchmark', recipients,
+        ), kwargs={'html_template': html, 'plain_template': 'Hi {Name}'}).get()
+        assert result['successful'] == len(recipients), result.get('results', [])[:1]
+        assert sink.message_count - before == len(recipients)
+    return run
+
+
+# --- Runner --------------------------------------------------------------
+
+def _prepare_environment(args, tmp):
+    """Point the app at a seeded scratch database; must run before the app is imported"""
+    os.environ.setdefault('SECRET_KEY', 'benchmark-secret-key-not-for-production')
+    os.environ.setdefault('JWT_SECRET_KEY', 'benchmark-jwt-secret-key-not-for-production')
+    os.environ.setdefault('ADMIN_EMAIL', 'admin@example.com')
+    os.environ.setdefault('ADMIN_PASSWORD', 'benchmark-password')
+    os.environ['DATABASE_URL'] = f"sqlite:///{args.db or os.path.join(tmp, 'bench.db')}"
+    os.environ['CELERY_BROKER_URL'] = 'memory://'
+
+    from app import app, limiter
+    from celery_app import celery
+    from database import ENGINE
+    from seed_data import SEED_ANCHOR, seed_scale
+
+    celery.conf.update(result_backend='cache+memory://', task_always_eager=True)
+    limiter.enabled = False
+    logging.disable(logging.WARNING)  # per-request/per-task logs would dominate the timings
+    seed_scale(ENGINE, candidates=args.candidates, interviews=args.candidates * 3, tracking=args.candidates * 5,
+               seed=args.seed)
+
+    client = app.test_client()
+    resp = client.post('/api/token', json={
+        'email': os.environ['ADMIN_EMAIL'], 'password': os.environ['ADMIN_PASSWORD'],
+    })
+    assert resp.status_code == 200, resp.data
+    return {
+        'tmp': tmp, 'anchor': SEED_ANCHOR, 'client': client, 'cleanup': [],
+        'headers': {'Authorization': f"Bearer {resp.json['access_token']}"},
+    }
+
+
+def run_suite(args):
+    import sqlite3
+
+    with tempfile.TemporaryDirectory(prefix='bench-') as tmp:
+        env = _prepare_environment(args, tmp)
+        results = {
+            'meta': {
+                'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'machine': f"{platform.system()} {platform.machine()} ({os.cpu_count()} CPUs)",
+                'candidates': args.candidates,
+                'seed': args.seed,
+            },
+            'benchmarks': {},
+        }
+        try:
+            for name, spec in CASES.items():
+                if args.only and name not in args.only:
+                    continue
+                fn = spec['setup'](env)
+                for _ in range(args.warmup):
+                    fn()
+                timings = []
+                for _ in range(args.rounds or spec['rounds']):
+                    started = time.perf_counter()
+                    fn()
+                    timings.append(time.perf_counter() - started)
+                results['benchmarks'][name] = summarize(timings, spec['ops'])
+                stats = results['benchmarks'][name]
+                print(f"{name:<22} {stats['median_ms']:>10.2f} {stats['p95_ms']:>10.2f} "
+                      f"{stats['stddev_ms']:>9.2f} {stats['ops_per_sec']:>12}", flush=True)
+        finally:
+            for cleanup in env['cleanup']:
+                cleanup()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', action='append', choices=sorted(CASES), help='Run only this case (repeatable)')
+    parser.add_argument('--rounds', type=int, help='Override the timed rounds of every case')
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--candidates', type=int, default=20000, help='Seeded candidates (x3 interviews, x5 tracking)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--db', help='Seed into (or reuse) this SQLite file instead of a temporary one')
+    parser.add_argument('--json', metavar='PATH', help='Write the results as JSON')
+    parser.add_argument('--compare', nargs='?', const=BASELINE_PATH, metavar='BASELINE',
+                        help='Compare medians against a baseline JSON (default: benchmarks/baseline.json)')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown before failing (0.25 = 25%%)')
+    parser.add_argument('--save-baseline', nargs='?', const=BASELINE_PATH, metavar='PATH')
+    args = parser.parse_args()
+
+    print(f"{'case':<22} {'median ms':>10} {'p95 ms':>10} {'stddev':>9} {'ops/sec':>12}", flush=True)
+    results = run_suite(args)
+
+    for path in filter(None, (args.json, args.save_baseline)):
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+    if not args.compare:
+        return 0
+
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline, args.tolerance)
+    print(f"\n{'case':<22} {'baseline ms':>12} {'current ms':>11} {'change':>8}")
+    for row in rows:
+        flag = '  REGRESSION' if row['regressed'] else ''
+        print(f"{row['name']:<22} {row['baseline_ms']:>12.2f} {row['current_ms']:>11.2f} {row['change']:>+8.1%}{flag}")
+    return 1 if any(row['regressed'] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,7 +5,7 @@ def make_celery(app_name=__name__):
     # Use env var for broker URL, default to local redis
     redis_url = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
     
-    celery = Celery(app_name, broker=redis_url, backend=redis_url)
+    celery = Celery(app_name, broker=redis_url, backend=redis_url, include=['tasks'])
     
     celery.conf.update(
         broker_connection_retry_on_startup=True,
@@ -15,6 +15,22 @@ def make_celery(app_name=__name__):
         timezone='UTC',
         task_track_started=True
     )
+
+    # Periodic jobs, run with `celery -A celery_app.celery beat`
+    celery.conf.beat_schedule = {
+        'enrich-tracking': {
+            'task': 'tasks.enrich_tracking_task',
+            'schedule': float(os.getenv('ENRICHMENT_INTERVAL_SECONDS', '300')),
+        },
+        'tracking-retention': {
+            'task': 'tasks.retention_task',
+            'schedule': float(os.getenv('RETENTION_INTERVAL_SECONDS', '86400')),
+        },
+        'db-maintenance': {
+            'task': 'tasks.maintenance_task',
+            'schedule': float(os.getenv('MAINTENANCE_INTERVAL_SECONDS', '21600')),
+        },
+    }
     return celery
 
 celery = make_celery()
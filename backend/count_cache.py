@@ -0,0 +1,198 @@
+"""
+Cached and approximate row counts for list endpoints.
+
+List and stats endpoints ask for the same ``COUNT(*)`` over and over. Counts
+are cached per table and normalized filter set, and dropped as soon as a
+session in this process flushes or bulk-executes a write to one of those
+tables (SQLAlchemy session events). Writes from other processes (Celery
+workers, other gunicorn workers) are only picked up after
+``COUNT_CACHE_TTL`` seconds, so totals can lag that much behind.
+
+``estimate_total`` gives a cheap approximate total for broad queries on
+large tables, from table statistics and a primary-key range sample.
+"""
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+
+from sqlalchemy import event, func, text
+from sqlalchemy.orm import Session
+
+from config import Config
+
+TOTAL_MODES = ('exact', 'estimate', 'none')
+# Filtered queries matching at most this many rows are always counted exactly
+ESTIMATE_EXACT_LIMIT = 1000
+ESTIMATE_SAMPLE_SIZE = 10000
+
+
+def normalize_filters(filters):
+    """Hashable cache key for a filter dict: empty values dropped, order ignored"""
+    normalized = []
+    for name, value in filters.items():
+        if isinstance(value, str):
+            value = value.strip()
+        if value is None or value == '':
+            continue
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        normalized.append((name, value))
+    return tuple(sorted(normalized))
+
+
+class CountCache:
+    """Thread-safe TTL cache of counts, invalidated per table"""
+
+    def __init__(self, ttl=30.0, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, tables, filters, compute):
+        tables = tuple(sorted(tables))
+        key = (tables, normalize_filters(filters))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(key)
+                return entry[0]
+            generations = tuple(self._generations.get(t, 0) for t in tables)
+
+        value = compute()
+
+        with self._lock:
+            # A write that landed while we were counting makes the value stale
+            if generations == tuple(self._generations.get(t, 0) for t in tables):
+                self._entries[key] = (value, now + self.ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, tables):
+        tables = set(tables)
+        if not tables:
+            return
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+            for key in [k for k in self._entries if tables.intersection(k[0])]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+count_cache = CountCache(ttl=Config.COUNT_CACHE_TTL)
+
+_DIRTY_KEY = 'count_cache_dirty_tables'
+
+
+def _mark_dirty(session, tables):
+    session.info.setdefault(_DIRTY_KEY, set()).update(tables)
+    count_cache.invalidate(tables)
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    tables = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, '__tablename__', None)
+        if table:
+            tables.add(table)
+    _mark_dirty(session, tables)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _on_orm_execute(orm_execute_state):
+    # Bulk query.update()/delete() and session.execute(insert/update/delete)
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None and getattr(table, 'name', None):
+            _mark_dirty(orm_execute_state.session, {table.name})
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    # Counts cached between flush and commit still saw the old rows
+    count_cache.invalidate(session.info.pop(_DIRTY_KEY, set()))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop(_DIRTY_KEY, None)
+
+
+def cached_count(query, table, filters):
+    """``query.count()`` through the cache; ``filters`` must fully describe ``query``"""
+    return count_cache.get_or_compute((table,), filters, lambda: query.order_by(None).count())
+
+
+def table_size_estimate(session, model):
+    """Approximate row count of a table without scanning it"""
+    table = model.__tablename__
+    dialect = session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        estimate = session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"), {'table': table}
+        ).scalar()
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+    elif dialect == 'sqlite':
+        # Maintained by ANALYZE
+        try:
+            stat = session.execute(
+                text("SELECT stat FROM sqlite_stat1 WHERE tbl = :table AND idx IS NULL"), {'table': table}
+            ).scalar()
+            if stat:
+                return int(stat.split()[0])
+        except Exception:
+            pass
+    low, high = session.query(func.min(model.id), func.max(model.id)).one()
+    return 0 if low is None else high - low + 1
+
+
+def estimate_total(query, model, filtered):
+    """
+    Approximate ``query.count()``. Returns ``(total, is_estimate)``.
+
+    Unfiltered queries use the table size estimate. Filtered queries are
+    counted exactly when they match few rows; broad ones are extrapolated
+    from the match rate inside a random primary-key window.
+    """
+    session = query.session
+    query = query.order_by(None)
+    if not filtered:
+        return table_size_estimate(session, model), True
+
+    matched = query.with_entities(model.id).limit(ESTIMATE_EXACT_LIMIT + 1).count()
+    if matched <= ESTIMATE_EXACT_LIMIT:
+        return matched, False
+
+    low, high = session.query(func.min(model.id), func.max(model.id)).one()
+    start = random.randint(low, max(low, high - ESTIMATE_SAMPLE_SIZE))
+    window = (model.id >= start, model.id < start + ESTIMATE_SAMPLE_SIZE)
+    rows_in_window = session.query(func.count(model.id)).filter(*window).scalar()
+    if not rows_in_window:
+        return matched, True
+    matches_in_window = query.filter(*window).count()
+    estimate = table_size_estimate(session, model) * matches_in_window / rows_in_window
+    return max(int(round(estimate)), matched), True
+
+
+def list_total(query, model, filters, mode='exact'):
+    """
+    Total for a list endpoint: ``(total, is_estimate)``, or ``(None, False)``
+    for mode 'none'.
+    """
+    if mode == 'none':
+        return None, False
+    if mode == 'estimate':
+        return estimate_total(query, model, filtered=bool(normalize_filters(filters)))
+    return cached_count(query, model.__tablename__, filters), False
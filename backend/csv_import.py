@@ -0,0 +1,472 @@
+"""
+Set-based CSV import of candidates and interviews.
+
+The import runs in a fixed number of round-trips regardless of how many
+rows match existing data:
+
+1. parse and validate every row in memory (row-level errors are collected
+   here, as before);
+2. prefetch the existing candidates for all emails in the file, and their
+   interviews, with chunked ``IN`` queries;
+3. work out in memory which candidates and interviews are new and which
+   existing ones need their blank fields filled in;
+4. write with chunked multi-row INSERTs (``ON CONFLICT DO NOTHING`` for
+   candidates, so a concurrent import of the same email cannot fail the
+   chunk) and executemany UPDATEs by primary key.
+
+Each write chunk runs in a SAVEPOINT. If a chunk fails it is retried row by
+row, so a bad value is reported against its CSV row instead of failing the
+import.
+
+Large files go through import jobs: the upload is streamed to
+``IMPORT_DIR`` and a Celery task (``run_import_job``) reads it with the
+``csv`` module ``IMPORT_JOB_CHUNK_ROWS`` rows at a time, committing each
+chunk together with the job's progress and row errors. Memory stays bounded
+by the chunk size, not the file size. The web and worker processes must
+share ``IMPORT_DIR``.
+"""
+import csv
+import io
+import logging
+import os
+import re
+import uuid
+from datetime import datetime
+
+from sqlalchemy import insert, update
+
+from config import Config, IMPORT_DIR
+from database import Candidate, ImportJob, Interview, InterviewStatus, dialect_insert, get_session
+
+logger = logging.getLogger(__name__)
+
+_ROW_NUM = re.compile(r'^Row (\d+):')
+
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload exceeds ``IMPORT_UPLOAD_MAX_BYTES``"""
+
+# Rows per IN (...) lookup and per multi-row INSERT
+IMPORT_CHUNK_SIZE = 500
+
+# (field, header test) in match order; the first matching test wins per column
+_COLUMN_MATCHERS = (
+    ('first_name', lambda c: 'FIRST NAME' in c or 'FIRSTNAME' in c),
+    ('last_name', lambda c: 'LAST NAME' in c or 'LASTNAME' in c),
+    ('email', lambda c: 'EMAIL' in c and 'ADDRESS' in c),
+    ('phone', lambda c: 'PHONE' in c),
+    ('status', lambda c: 'STATUS' in c),
+    ('date', lambda c: 'DATE' in c and 'DAY' not in c),
+    ('day', lambda c: 'DAY' in c and 'INTERVIEW' in c),
+    ('time', lambda c: 'TIME' in c),
+)
+
+
+def map_columns(header):
+    """Field name -> column index, matched case-insensitively on the header names"""
+    col_map = {}
+    for i, col in enumerate(header):
+        col_upper = col.strip().upper()
+        for field, matches in _COLUMN_MATCHERS:
+            if matches(col_upper):
+                col_map[field] = i
+                break
+    return col_map
+
+
+def parse_row(values, col_map, row_num):
+    """
+    One CSV row as an import record dict, or an error string.
+    Returns None for blank rows.
+    """
+    from scheduler import combine_datetime, normalize_email, parse_date_string, parse_time_string
+
+    values = [v.strip() for v in values]
+    if not any(values):
+        return None
+
+    def value(field):
+        index = col_map.get(field)
+        return values[index] if index is not None and index < len(values) else ''
+
+    email = normalize_email(value('email'))
+    if not email:
+        return f"Row {row_num}: Missing email address"
+    first_name, last_name = value('first_name'), value('last_name')
+    if not first_name and not last_name:
+        return f"Row {row_num}: Missing name"
+
+    record = {
+        'row_num': row_num,
+        'email': email,
+        'first_name': first_name,
+        'last_name': last_name,
+        'phone': value('phone'),
+        'status': value('status'),
+        'day': value('day'),
+        'has_schedule': False,
+        'interview_date': None,
+        'interview_time': None,
+        'error': None,
+    }
+
+    date_str, time_str = value('date'), value('time')
+    if date_str or time_str:
+        record['has_schedule'] = True
+        interview_date = parse_date_string(date_str)
+        interview_time = parse_time_string(time_str)
+        if interview_date and interview_time:
+            record['interview_date'] = combine_datetime(interview_date, interview_time)
+            record['interview_time'] = interview_time
+        elif interview_date:
+            # Reported, but the candidate is still imported
+            record['error'] = f"Row {row_num}: Date provided but time is missing or invalid"
+    return record
+
+
+def in_row_order(*error_lists):
+    """Row errors from parsing and from writing, merged into CSV row order"""
+    def row_num(message):
+        match = _ROW_NUM.match(message)
+        return int(match.group(1)) if match else 0
+
+    return sorted((message for errors in error_lists for message in errors), key=row_num)
+
+
+def parse_csv(csv_data):
+    """(records, errors) for CSV text with a header row"""
+    reader = csv.reader(io.StringIO(csv_data.strip()))
+    header = next(reader, None)
+    col_map = map_columns(header or [])
+    records, errors = [], []
+    for values in reader:
+        parsed = parse_row(values, col_map, reader.line_num)
+        if isinstance(parsed, str):
+            errors.append(parsed)
+        elif parsed is not None:
+            records.append(parsed)
+    if reader.line_num < 2:
+        return [], ["CSV file must have at least a header row and one data row"]
+    return records, errors
+
+
+def _chunks(items, size=IMPORT_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _write_chunked(session, items, write):
+    """
+    Call ``write(session, chunk)`` per chunk inside a SAVEPOINT; a failed
+    chunk is retried item by item. Returns ``[(item, exception)]`` for the
+    items that still failed.
+    """
+    failed = []
+    for chunk in _chunks(items):
+        try:
+            with session.begin_nested():
+                write(session, chunk)
+        except Exception:
+            for item in chunk:
+                try:
+                    with session.begin_nested():
+                        write(session, [item])
+                except Exception as e:
+                    failed.append((item, e))
+    return failed
+
+
+def _fill_blanks(target, record):
+    """Copy name/phone from ``record`` into fields of ``target`` that are empty"""
+    changed = False
+    for field in ('first_name', 'last_name', 'phone'):
+        if record[field] and not target.get(field):
+            target[field] = record[field]
+            changed = True
+    return changed
+
+
+def _load_candidates(session, emails):
+    existing = {}
+    for chunk in _chunks(emails):
+        rows = session.query(
+            Candidate.id, Candidate.email, Candidate.first_name, Candidate.last_name, Candidate.phone
+        ).filter(Candidate.email.in_(chunk))
+        for row in rows:
+            existing[row.email] = {
+                'id': row.id, 'email': row.email, 'first_name': row.first_name,
+                'last_name': row.last_name, 'phone': row.phone,
+            }
+    return existing
+
+
+def _load_interviews(session, candidate_ids):
+    existing = {}
+    for chunk in _chunks(candidate_ids):
+        rows = session.query(
+            Interview.id, Interview.candidate_id, Interview.interview_date,
+            Interview.status, Interview.day_of_week, Interview.interview_time,
+        ).filter(Interview.candidate_id.in_(chunk))
+        for row in rows:
+            existing[(row.candidate_id, row.interview_date)] = {
+                'id': row.id, 'status': row.status, 'day_of_week': row.day_of_week,
+                'interview_time': row.interview_time,
+            }
+    return existing
+
+
+def _schedule_update(target, record):
+    """Apply a repeated row's schedule fields to an interview (new or existing)"""
+    status = record['status']
+    if status and 'confirmed' in status.lower():
+        target['status'] = InterviewStatus.CONFIRMED.value
+    if record['day']:
+        target['day_of_week'] = record['day']
+    if record['interview_time']:
+        target['interview_time'] = record['interview_time']
+
+
+def import_records(session, records):
+    """
+    Insert/update the candidates and interviews of parsed ``records``.
+    Returns ``(imported, errors)``; the caller commits.
+    """
+    errors = []
+
+    # Candidates: existing ones only get blank fields filled in
+    candidates = _load_candidates(session, list(dict.fromkeys(record['email'] for record in records)))
+    new_candidates, dirty_candidates = {}, {}
+    for record in records:
+        email = record['email']
+        if email in candidates:
+            if _fill_blanks(candidates[email], record):
+                dirty_candidates[email] = candidates[email]
+        elif email in new_candidates:
+            _fill_blanks(new_candidates[email], record)
+        else:
+            new_candidates[email] = {
+                'email': email,
+                'first_name': record['first_name'] or 'Unknown',
+                'last_name': record['last_name'] or '',
+                'phone': record['phone'],
+                'country': 'US',  # Default to US for imports
+                'status': record['status'],
+            }
+
+    dialect = session.get_bind().dialect.name
+
+    def insert_candidates(session, chunk):
+        stmt = dialect_insert(Candidate, dialect).values(chunk).on_conflict_do_nothing(
+            index_elements=['email']
+        ).returning(Candidate.id, Candidate.email)
+        for candidate_id, email in session.execute(stmt):
+            candidates[email] = {'id': candidate_id}
+
+    def update_candidates(session, chunk):
+        session.execute(update(Candidate), [
+            {'id': c['id'], 'first_name': c['first_name'], 'last_name': c['last_name'], 'phone': c['phone']}
+            for c in chunk
+        ])
+
+    failed_emails = {
+        item['email']: e for item, e in _write_chunked(session, list(new_candidates.values()), insert_candidates)
+    }
+    for item, e in _write_chunked(session, list(dirty_candidates.values()), update_candidates):
+        logger.error(f"Error updating candidate {item['id']}: {str(e)}")
+
+    # Inserted concurrently by someone else (ON CONFLICT DO NOTHING returned no id)
+    missing = [email for email in new_candidates if email not in candidates and email not in failed_emails]
+    if missing:
+        candidates.update(_load_candidates(session, missing))
+
+    # Interviews: new (candidate, datetime) pairs are inserted, repeats update the existing row
+    interviews = _load_interviews(session, sorted({c['id'] for c in candidates.values()}))
+    new_interviews, dirty_interviews = {}, {}
+    imported = 0
+    imported_rows = {}
+    for record in records:
+        email = record['email']
+        if email not in candidates:
+            reason = str(failed_emails[email]) if email in failed_emails else "Candidate could not be saved"
+            errors.append((record['row_num'], f"Row {record['row_num']}: {reason}"))
+            continue
+        if record['error']:
+            errors.append((record['row_num'], record['error']))
+            continue
+        if not record['has_schedule']:
+            # No interview data, just candidate
+            imported += 1
+            continue
+        if not record['interview_date']:
+            continue
+
+        key = (candidates[email]['id'], record['interview_date'])
+        if key in interviews:
+            _schedule_update(interviews[key], record)
+            dirty_interviews[key] = interviews[key]
+        elif key in new_interviews:
+            _schedule_update(new_interviews[key], record)
+        else:
+            status = record['status']
+            new_interviews[key] = {
+                'candidate_id': key[0],
+                'interview_date': key[1],
+                'interview_time': record['interview_time'],
+                'day_of_week': record['day'],
+                'status': InterviewStatus.CONFIRMED.value if status and 'confirmed' in status.lower() else InterviewStatus.PENDING.value,
+                'notes': status if status and 'reschedule' in status.lower() else None,
+            }
+            imported_rows[key] = record['row_num']
+            imported += 1
+
+    def insert_interviews(session, chunk):
+        session.execute(insert(Interview), chunk)
+
+    def update_interviews(session, chunk):
+        session.execute(update(Interview), [
+            {'id': i['id'], 'status': i['status'], 'day_of_week': i['day_of_week'], 'interview_time': i['interview_time']}
+            for i in chunk
+        ])
+
+    for item, e in _write_chunked(session, list(new_interviews.values()), insert_interviews):
+        row_num = imported_rows[(item['candidate_id'], item['interview_date'])]
+        errors.append((row_num, f"Row {row_num}: {str(e)}"))
+        imported -= 1
+    for item, e in _write_chunked(session, list(dirty_interviews.values()), update_interviews):
+        logger.error(f"Error updating interview {item['id']}: {str(e)}")
+
+    errors.sort(key=lambda error: error[0])
+    return imported, [message for _, message in errors]
+
+
+def import_candidates_from_csv(csv_data, session=None):
+    """
+    Import candidates and interviews from CSV data
+    Returns: (imported_count, errors)
+    """
+    own_session = session is None
+    session = session or get_session()
+    try:
+        records, errors = parse_csv(csv_data)
+        if not records:
+            return 0, errors
+        imported, write_errors = import_records(session, records)
+        session.commit()
+        return imported, in_row_order(errors, write_errors)
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Error importing CSV: {str(e)}")
+        return 0, [f"Import failed: {str(e)}"]
+    finally:
+        if own_session:
+            session.close()
+
+
+def save_upload(stream, job_id, max_bytes=None):
+    """
+    Copy an uploaded file stream to IMPORT_DIR in fixed-size blocks.
+    Returns ``(path, size)``; raises UploadTooLarge above ``max_bytes``.
+    """
+    max_bytes = max_bytes or Config.IMPORT_UPLOAD_MAX_BYTES
+    os.makedirs(IMPORT_DIR, exist_ok=True)
+    path = os.path.join(IMPORT_DIR, f"{job_id}.csv")
+    size = 0
+    try:
+        with open(path, 'wb') as out:
+            while True:
+                block = stream.read(1024 * 1024)
+                if not block:
+                    break
+                size += len(block)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"File exceeds the {max_bytes} byte upload limit")
+                out.write(block)
+    except Exception:
+        os.remove(path)
+        raise
+    return path, size
+
+
+def create_import_job(stream, filename=None):
+    """Store an upload and record its queued ImportJob. Returns the job as a dict."""
+    job_id = str(uuid.uuid4())
+    path, size = save_upload(stream, job_id)
+    session = get_session()
+    try:
+        job = ImportJob(id=job_id, filename=filename, path=path, status='queued', total_bytes=size)
+        session.add(job)
+        session.commit()
+        result = job.to_dict()
+    except Exception:
+        session.rollback()
+        os.remove(path)
+        raise
+    finally:
+        session.close()
+    return result
+
+
+def run_import_job(job_id, chunk_rows=None):
+    """Process an uploaded CSV in chunks, recording progress on its ImportJob"""
+    chunk_rows = chunk_rows or Config.IMPORT_JOB_CHUNK_ROWS
+    max_errors = Config.IMPORT_JOB_MAX_ERRORS
+    session = get_session()
+    try:
+        job = session.get(ImportJob, job_id)
+        if job is None:
+            logger.error(f"Import job {job_id} not found")
+            return None
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        session.commit()
+
+        try:
+            with open(job.path, 'rb') as raw:
+                reader = csv.reader(io.TextIOWrapper(raw, encoding='utf-8-sig', newline=''))
+                col_map = map_columns(next(reader, None) or [])
+                if 'email' not in col_map:
+                    raise ValueError("CSV header has no email address column")
+
+                records, errors, rows = [], [], 0
+                for values in reader:
+                    rows += 1
+                    parsed = parse_row(values, col_map, reader.line_num)
+                    if isinstance(parsed, str):
+                        errors.append(parsed)
+                    elif parsed is not None:
+                        records.append(parsed)
+                    # Count rows read, not rows kept: a run of bad rows must
+                    # not hold back progress or grow the error list
+                    if rows >= chunk_rows:
+                        _commit_chunk(session, job, records, errors, rows, raw.tell(), max_errors)
+                        records, errors, rows = [], [], 0
+                _commit_chunk(session, job, records, errors, rows, job.total_bytes, max_errors)
+            job.status = 'completed'
+            job.message = f"Imported {job.imported} candidates/interviews"
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Import job {job_id} failed: {str(e)}")
+            job = session.get(ImportJob, job_id)
+            job.status = 'failed'
+            job.message = str(e)
+
+        job.finished_at = datetime.utcnow()
+        session.commit()
+        if os.path.exists(job.path):
+            os.remove(job.path)
+        return job.to_dict()
+    finally:
+        session.close()
+
+
+def _commit_chunk(session, job, records, errors, rows, position, max_errors):
+    """Import one chunk and commit it together with the job's progress"""
+    imported = 0
+    if records:
+        imported, write_errors = import_records(session, records)
+        errors = in_row_order(errors, write_errors)
+    job.imported = (job.imported or 0) + imported
+    job.rows_processed = (job.rows_processed or 0) + rows
+    job.processed_bytes = position
+    job.add_errors(errors, max_errors)
+    session.commit()
@@ -1,12 +1,17 @@
 """
 Database models and utilities for candidate and interview management
 """
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, ForeignKey, Text, UniqueConstraint
+from sqlalchemy import create_engine, BigInteger, Column, Integer, String, DateTime, Boolean, ForeignKey, Text, UniqueConstraint, LargeBinary, Index, func
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
 from datetime import datetime
 from contextlib import contextmanager
 import enum
+import json
+import logging
 import os
+import sqlite3
+
+logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
@@ -74,12 +79,19 @@ class Interview(Base):
     __tablename__ = 'interviews'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    candidate_id = Column(Integer, ForeignKey('candidates.id'), nullable=False, index=True)
-    interview_date = Column(DateTime, nullable=False, index=True)
+    candidate_id = Column(Integer, ForeignKey('candidates.id'), nullable=False)
+    interview_date = Column(DateTime, nullable=False)
     
     # Ensure candidate cannot have multiple interviews at the exact same time
     # Note: This requires a migration to take effect in existing DB
-    __table_args__ = (UniqueConstraint('candidate_id', 'interview_date', name='uq_candidate_interview_date'),)
+    __table_args__ = (
+        # Also serves the candidate's interviews and conflict checks (one
+        # candidate, a date window, status != cancelled)
+        UniqueConstraint('candidate_id', 'interview_date', name='uq_candidate_interview_date'),
+        # Slot search and schedule summary: a date window filtered/grouped by
+        # status; covers find_available_slots, which only reads these columns
+        Index('ix_interviews_date_status_candidate', 'interview_date', 'status', 'candidate_id'),
+    )
     interview_time = Column(String(20))  # e.g., "9:00", "9:30"
     day_of_week = Column(String(20))  # e.g., "FRIDAY", "MONDAY"
     status = Column(String(50), default=InterviewStatus.PENDING.value)
@@ -147,14 +159,37 @@ class EmailTracking(Base):
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     tracking_id = Column(String(36), unique=True, nullable=False, index=True)
-    campaign_id = Column(String(50), nullable=False, index=True)
+    campaign_id = Column(String(50), nullable=False)
     recipient_email = Column(String(255), nullable=False)
-    status = Column(String(20), default='sent') # sent, opened
+    status = Column(String(20), default='sent') # sent, opened, clicked
     open_count = Column(Integer, default=0)
+    click_count = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
     opened_at = Column(DateTime, nullable=True)
+    clicked_at = Column(DateTime, nullable=True)
     ip_address = Column(String(50), nullable=True)
     user_agent = Column(Text, nullable=True)
+    # Filled in off the request path by enrichment.py
+    client_class = Column(String(20), nullable=True)  # human, proxy, bot, unknown
+    device_family = Column(String(50), nullable=True)
+    mail_client = Column(String(50), nullable=True)
+    enriched_at = Column(DateTime, nullable=True)
+    enriched_open_count = Column(Integer, nullable=True)  # open_count covered by the last enrichment
+    
+    __table_args__ = (
+        # A campaign's rows, and its status breakdowns
+        Index('ix_email_tracking_campaign_status', 'campaign_id', 'status'),
+        # Status counts across campaigns (system stats)
+        Index('ix_email_tracking_status', 'status'),
+        # Case-insensitive recipient lookups (dedup.py re-points tracking rows by address)
+        Index('ix_email_tracking_recipient_lower', func.lower(recipient_email)),
+        # Only rows waiting for enrichment, so the batch job never scans the whole table
+        Index(
+            'ix_email_tracking_pending_enrichment', 'id',
+            sqlite_where=(enriched_at.is_(None) & opened_at.isnot(None)),
+            postgresql_where=(enriched_at.is_(None) & opened_at.isnot(None)),
+        ),
+    )
     
     def to_dict(self):
         return {
@@ -162,8 +197,214 @@ class EmailTracking(Base):
             'recipient_email': self.recipient_email,
             'status': self.status,
             'open_count': self.open_count,
+            'click_count': self.click_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'opened_at': self.opened_at.isoformat() if self.opened_at else None,
+            'clicked_at': self.clicked_at.isoformat() if self.clicked_at else None,
+            'client_class': self.client_class,
+            'device_family': self.device_family,
+            'mail_client': self.mail_client
+        }
+
+class CampaignLink(Base):
+    """Tracked link, rewritten once per campaign (not per recipient)"""
+    __tablename__ = 'campaign_links'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    campaign_id = Column(String(50), nullable=False)
+    position = Column(Integer, nullable=False)  # Order of the link within the template
+    url = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Also serves a campaign's links
+    __table_args__ = (UniqueConstraint('campaign_id', 'position', name='uq_campaign_link_position'),)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'campaign_id': self.campaign_id,
+            'position': self.position,
+            'url': self.url,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class EmailClick(Base):
+    """Individual click on a tracked link"""
+    __tablename__ = 'email_clicks'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    tracking_id = Column(String(36), nullable=False, index=True)
+    link_id = Column(Integer, ForeignKey('campaign_links.id'), nullable=False, index=True)
+    clicked_at = Column(DateTime, default=datetime.utcnow)
+    ip_address = Column(String(50), nullable=True)
+    user_agent = Column(Text, nullable=True)
+    
+    def to_dict(self):
+        return {
+            'tracking_id': self.tracking_id,
+            'link_id': self.link_id,
+            'clicked_at': self.clicked_at.isoformat() if self.clicked_at else None
+        }
+
+class TrackingRollup(Base):
+    """Per-campaign open/click counters, bucketed by hour, day and campaign lifetime"""
+    __tablename__ = 'tracking_rollups'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    campaign_id = Column(String(50), nullable=False)
+    granularity = Column(String(10), nullable=False)  # hour, day, all
+    bucket_start = Column(DateTime, nullable=False)
+    sent = Column(Integer, default=0, nullable=False)
+    opens = Column(Integer, default=0, nullable=False)
+    unique_opens = Column(Integer, default=0, nullable=False)
+    clicks = Column(Integer, default=0, nullable=False)
+    unique_clicks = Column(Integer, default=0, nullable=False)
+    # Opens attributed to image proxies / scanners by enrichment (bucketed by first open)
+    prefetch_opens = Column(Integer, default=0, nullable=False)
+    prefetch_unique_opens = Column(Integer, default=0, nullable=False)
+    
+    __table_args__ = (UniqueConstraint('campaign_id', 'granularity', 'bucket_start', name='uq_tracking_rollup_bucket'),)
+    
+    def to_dict(self):
+        return {
+            'bucket_start': self.bucket_start.isoformat() if self.bucket_start else None,
+            'sent': self.sent,
+            'opens': self.opens,
+            'unique_opens': self.unique_opens,
+            'clicks': self.clicks,
+            'unique_clicks': self.unique_clicks,
+            'prefetch_opens': self.prefetch_opens,
+            'prefetch_unique_opens': self.prefetch_unique_opens
+        }
+
+class TimeToOpenRollup(Base):
+    """Histogram of time from send to first open, per campaign"""
+    __tablename__ = 'time_to_open_rollups'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    campaign_id = Column(String(50), nullable=False)
+    bucket_index = Column(Integer, nullable=False)  # Index into analytics.TIME_TO_OPEN_BUCKETS
+    count = Column(Integer, default=0, nullable=False)
+    
+    __table_args__ = (UniqueConstraint('campaign_id', 'bucket_index', name='uq_time_to_open_bucket'),)
+
+class TrackingSketch(Base):
+    """Serialized HyperLogLog sketch of distinct openers/clickers per campaign bucket"""
+    __tablename__ = 'tracking_sketches'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    campaign_id = Column(String(50), nullable=False)
+    granularity = Column(String(10), nullable=False)  # hour, day, all
+    bucket_start = Column(DateTime, nullable=False)
+    event = Column(String(10), nullable=False)  # open, click
+    registers = Column(LargeBinary, nullable=False)  # hll.HyperLogLog.to_bytes()
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (UniqueConstraint('campaign_id', 'event', 'granularity', 'bucket_start', name='uq_tracking_sketch_bucket'),)
+
+class TrackingArchive(Base):
+    """Raw tracking rows of a campaign exported to an archive file and pruned"""
+    __tablename__ = 'tracking_archives'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    campaign_id = Column(String(50), nullable=False, index=True)
+    table_name = Column(String(50), nullable=False)  # email_tracking, email_clicks
+    path = Column(Text, nullable=False)
+    format = Column(String(10), nullable=False)  # jsonl, parquet
+    row_count = Column(Integer, default=0)
+    first_created_at = Column(DateTime, nullable=True)
+    last_created_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'campaign_id': self.campaign_id,
+            'table_name': self.table_name,
+            'format': self.format,
+            'row_count': self.row_count,
+            'first_created_at': self.first_created_at.isoformat() if self.first_created_at else None,
+            'last_created_at': self.last_created_at.isoformat() if self.last_created_at else None,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        }
+
+class ImportJob(Base):
+    """Background CSV import (see csv_import.run_import_job)"""
+    __tablename__ = 'import_jobs'
+    
+    id = Column(String(36), primary_key=True)
+    filename = Column(String(255))
+    path = Column(Text, nullable=False)
+    status = Column(String(20), default='queued')  # queued, running, completed, failed
+    total_bytes = Column(BigInteger, default=0)
+    processed_bytes = Column(BigInteger, default=0)
+    rows_processed = Column(Integer, default=0)
+    imported = Column(Integer, default=0)
+    error_count = Column(Integer, default=0)
+    errors = Column(Text)  # JSON list of the first IMPORT_JOB_MAX_ERRORS row errors
+    message = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    
+    def error_list(self):
+        return json.loads(self.errors) if self.errors else []
+    
+    def add_errors(self, errors, limit):
+        if not errors:
+            return
+        self.error_count = (self.error_count or 0) + len(errors)
+        kept = self.error_list()
+        if len(kept) < limit:
+            self.errors = json.dumps(kept + errors[:limit - len(kept)])
+    
+    def to_dict(self):
+        total = self.total_bytes or 0
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'status': self.status,
+            'progress': round(min((self.processed_bytes or 0) / total, 1.0), 4) if total else 0.0,
+            'total_bytes': total,
+            'processed_bytes': self.processed_bytes or 0,
+            'rows_processed': self.rows_processed or 0,
+            'imported': self.imported or 0,
+            'error_count': self.error_count or 0,
+            'message': self.message,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'opened_at': self.opened_at.isoformat() if self.opened_at else None
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class DedupJob(Base):
+    """Background duplicate detection, optionally merging what it finds (see dedup.run_dedup_job)"""
+    __tablename__ = 'dedup_jobs'
+    
+    id = Column(String(36), primary_key=True)
+    merge = Column(Boolean, default=False)  # merge every cluster found
+    status = Column(String(20), default='queued')  # queued, running, completed, failed
+    clusters = Column(Text)  # JSON list of the clusters found
+    stats = Column(Text)  # JSON detection stats
+    result = Column(Text)  # JSON merge totals
+    message = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    
+    def cluster_list(self):
+        return json.loads(self.clusters) if self.clusters else []
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'merge': bool(self.merge),
+            'status': self.status,
+            'stats': json.loads(self.stats) if self.stats else None,
+            'result': json.loads(self.result) if self.result else None,
+            'message': self.message,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
         }
 
 class Draft(Base):
@@ -243,13 +484,34 @@ def get_database_path():
     return DB_PATH
 
 
-# Global engine and session factory for concurrency-safe usage with Celery + SQLite
-DATABASE_URL = f"sqlite:///{get_database_path()}"
-ENGINE = create_engine(
-    DATABASE_URL,
-    echo=False,
-    connect_args={"check_same_thread": False},
-)
+def get_database_url():
+    """Get the configured database URL (SQLite file unless DATABASE_URL is set)."""
+    from config import DATABASE_URL
+    return DATABASE_URL
+
+
+def _engine_options(url):
+    """Dialect-specific engine arguments."""
+    if url.startswith('sqlite'):
+        return {"connect_args": {"check_same_thread": False}}
+
+    from config import Config
+    from sqlalchemy.pool import QueuePool
+    # Each gunicorn worker and Celery process gets its own pool, so the
+    # server needs (workers + celery concurrency) * (size + overflow) slots.
+    return {
+        "poolclass": QueuePool,
+        "pool_size": Config.DB_POOL_SIZE,
+        "max_overflow": Config.DB_MAX_OVERFLOW,
+        "pool_timeout": Config.DB_POOL_TIMEOUT,
+        "pool_recycle": Config.DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+# Global engine and session factory for concurrency-safe usage with Celery + SQLite/PostgreSQL
+DATABASE_URL = get_database_url()
+ENGINE = create_engine(DATABASE_URL, echo=False, **_engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(bind=ENGINE, autocommit=False, autoflush=False)
 
 
@@ -268,18 +530,182 @@ from sqlalchemy import event
 from sqlalchemy.engine import Engine
 
 
+# SQLite performance profiles, selected with SQLITE_PROFILE.
+#   durable:    fsync on every commit; survives power loss without losing commits
+#   balanced:   WAL with synchronous=NORMAL; a power loss can drop the last
+#               commits but never corrupts the database (the default)
+#   throughput: no fsyncs and a larger page cache; an OS crash or power loss
+#               can corrupt the database, so only for bulk loads/benchmarks
+# Negative cache_size values are KiB; mmap_size is bytes.
+SQLITE_PROFILES = {
+    'durable': {
+        'synchronous': 'FULL',
+        'cache_size': -16000,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+    },
+    'balanced': {
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    },
+    'throughput': {
+        'synchronous': 'OFF',
+        'cache_size': -256000,
+        'mmap_size': 1024 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'wal_autocheckpoint': 10000,
+    },
+}
+
+
+def sqlite_profile(name=None):
+    """Pragmas of the named (or configured) SQLite profile"""
+    from config import Config
+    name = name or Config.SQLITE_PROFILE
+    if name not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLITE_PROFILE '{name}', expected one of {', '.join(SQLITE_PROFILES)}")
+    return SQLITE_PROFILES[name]
+
+
 @event.listens_for(Engine, "connect")
 def set_sqlite_pragma(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    from config import Config
     cursor = dbapi_connection.cursor()
     cursor.execute("PRAGMA foreign_keys=ON")
+    # Lets retention.py return freed pages with incremental_vacuum. Only takes
+    # effect for new database files (existing ones need a one-off VACUUM).
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
     cursor.execute("PRAGMA journal_mode=WAL")
+    # Wait for concurrent writers instead of failing with "database is locked"
+    cursor.execute(f"PRAGMA busy_timeout={int(Config.SQLITE_BUSY_TIMEOUT_MS)}")
+    for pragma, value in sqlite_profile().items():
+        cursor.execute(f"PRAGMA {pragma}={value}")
     cursor.close()
 
 
+def dialect_insert(model, dialect_name=None):
+    """
+    INSERT construct with ``on_conflict_do_update``/``on_conflict_do_nothing``
+    for the database in use (SQLite and PostgreSQL share that API).
+    """
+    dialect_name = dialect_name or ENGINE.dialect.name
+    if dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {dialect_name}")
+    return insert(model)
+
+
+def _add_missing_columns(engine):
+    """
+    Add columns that exist on the models but not yet in the database.
+
+    ``create_all`` only creates missing tables, so columns added to an
+    existing model (e.g. ``email_tracking.click_count``) would otherwise never
+    reach databases created by an older version of the app.
+    """
+    from sqlalchemy import inspect, text
+
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_columns = {c['name'] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns or column.primary_key:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}"
+                default = column.default.arg if column.default is not None and column.default.is_scalar else None
+                if isinstance(default, bool):
+                    ddl += f" DEFAULT {'TRUE' if default else 'FALSE'}"
+                elif isinstance(default, (int, float)):
+                    ddl += f" DEFAULT {default}"
+                elif isinstance(default, str):
+                    ddl += f" DEFAULT '{default}'"
+                conn.execute(text(ddl))
+
+
+def _create_missing_indexes(engine):
+    """Create model indexes missing from tables that already existed."""
+    from sqlalchemy.schema import CreateIndex
+
+    # IF NOT EXISTS rather than checkfirst: reflection skips expression indexes
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+# Indexes older versions created, with the table and leading columns of
+# the index or unique constraint that serves their lookups instead
+_REDUNDANT_INDEXES = {
+    'ix_interviews_candidate_id': ('interviews', ('candidate_id',)),
+    'ix_interviews_interview_date': ('interviews', ('interview_date',)),
+    'ix_interviews_candidate_date_status': ('interviews', ('candidate_id', 'interview_date')),
+    'ix_email_tracking_campaign_id': ('email_tracking', ('campaign_id',)),
+    'ix_campaign_links_campaign_id': ('campaign_links', ('campaign_id',)),
+}
+
+
+def _drop_redundant_indexes(engine):
+    """
+    Drop the indexes in ``_REDUNDANT_INDEXES`` that another index or unique
+    constraint of the database really covers. Databases created before a
+    constraint such as ``uq_candidate_interview_date`` existed keep theirs.
+    """
+    import warnings
+
+    from sqlalchemy import exc, inspect, text
+
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    keys = {}
+    for table in {table for table, _ in _REDUNDANT_INDEXES.values()} & existing_tables:
+        with warnings.catch_warnings():
+            # Expression indexes cannot be reflected; they never cover a column prefix
+            warnings.simplefilter('ignore', exc.SAWarning)
+            reflected = inspector.get_indexes(table) + inspector.get_unique_constraints(table)
+        keys[table] = {
+            key['name']: tuple(key['column_names'])
+            for key in reflected
+            if key['column_names'] and None not in key['column_names']
+        }
+
+    with engine.begin() as conn:
+        for name, (table, columns) in _REDUNDANT_INDEXES.items():
+            if name not in keys.get(table, {}):
+                continue
+            covered = any(
+                other != name and other_columns[:len(columns)] == columns
+                for other, other_columns in keys[table].items()
+            )
+            if not covered:
+                logger.warning(f"Keeping index {name}: nothing else on {table} covers {', '.join(columns)}")
+                continue
+            conn.execute(text(f"DROP INDEX {name}"))
+            del keys[table][name]
+
+
 def init_db():
     """Initialize database tables."""
     engine = get_engine()
     Base.metadata.create_all(engine)
+    _add_missing_columns(engine)
+    _create_missing_indexes(engine)
+    _drop_redundant_indexes(engine)
+
+    from search_index import ensure_search_index
+    ensure_search_index(engine)
     return engine
 
 
@@ -0,0 +1,228 @@
+"""
+SQL instrumentation for the shared engine.
+
+``before_cursor_execute``/``after_cursor_execute`` hooks time every
+statement. Statements are attributed to the current scope: a Flask request
+(tied to ``g.request_id``) or a Celery task. On scope exit the scope's
+query count and DB time are added to per-endpoint / per-task aggregates,
+which ``GET /api/system/db-metrics`` serves. Requests also report their DB
+time in a ``Server-Timing`` header.
+
+Statements slower than ``SLOW_QUERY_MS`` are written to the slow-query log
+together with their ``EXPLAIN QUERY PLAN`` (SQLite) or ``EXPLAIN``
+(PostgreSQL) output.
+
+Aggregates live in process memory, so with several gunicorn/Celery workers
+each process reports its own share; the response includes the pid.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+from flask import g, request
+from sqlalchemy import event
+
+from config import Config
+from database import ENGINE
+
+logger = logging.getLogger(__name__)
+
+slow_query_logger = logging.getLogger('slow_queries')
+if Config.SLOW_QUERY_LOG and not slow_query_logger.handlers:
+    _handler = RotatingFileHandler(Config.SLOW_QUERY_LOG, maxBytes=10 * 1024 * 1024, backupCount=3)
+    _handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
+    slow_query_logger.addHandler(_handler)
+
+_MAX_STATEMENT_LOG_LENGTH = 2000
+_local = threading.local()
+
+
+class ScopeStats:
+    """Query count and DB time of one request or task"""
+
+    def __init__(self, kind, name, scope_id=None):
+        self.kind = kind
+        self.name = name
+        self.scope_id = scope_id
+        self.queries = 0
+        self.db_time = 0.0
+        self.slow_queries = 0
+
+
+class MetricsRegistry:
+    """Thread-safe per-endpoint / per-task aggregates and recent slow queries"""
+
+    def __init__(self, slow_history=100):
+        self._lock = threading.Lock()
+        self._aggregates = {}
+        self._totals = {'queries': 0, 'db_time': 0.0, 'slow_queries': 0}
+        self._slow = deque(maxlen=slow_history)
+
+    def record_statement(self, elapsed, slow):
+        with self._lock:
+            self._totals['queries'] += 1
+            self._totals['db_time'] += elapsed
+            self._totals['slow_queries'] += int(slow)
+
+    def record_scope(self, stats):
+        key = (stats.kind, stats.name)
+        with self._lock:
+            entry = self._aggregates.get(key)
+            if entry is None:
+                entry = self._aggregates[key] = {
+                    'kind': stats.kind, 'name': stats.name, 'calls': 0, 'queries': 0,
+                    'db_time': 0.0, 'max_queries': 0, 'max_db_time': 0.0, 'slow_queries': 0,
+                }
+            entry['calls'] += 1
+            entry['queries'] += stats.queries
+            entry['db_time'] += stats.db_time
+            entry['max_queries'] = max(entry['max_queries'], stats.queries)
+            entry['max_db_time'] = max(entry['max_db_time'], stats.db_time)
+            entry['slow_queries'] += stats.slow_queries
+
+    def record_slow(self, entry):
+        with self._lock:
+            self._slow.append(entry)
+
+    def snapshot(self):
+        with self._lock:
+            aggregates = []
+            for entry in self._aggregates.values():
+                entry = dict(entry)
+                entry['avg_queries'] = round(entry['queries'] / entry['calls'], 2)
+                entry['avg_db_time_ms'] = round(entry['db_time'] * 1000 / entry['calls'], 3)
+                entry['db_time_ms'] = round(entry.pop('db_time') * 1000, 3)
+                entry['max_db_time_ms'] = round(entry.pop('max_db_time') * 1000, 3)
+                aggregates.append(entry)
+            totals = dict(self._totals)
+            totals['db_time_ms'] = round(totals.pop('db_time') * 1000, 3)
+            slow = list(self._slow)
+        aggregates.sort(key=lambda e: e['db_time_ms'], reverse=True)
+        return {'pid': os.getpid(), 'totals': totals, 'scopes': aggregates, 'slow_queries': slow}
+
+    def reset(self):
+        with self._lock:
+            self._aggregates.clear()
+            self._slow.clear()
+            self._totals = {'queries': 0, 'db_time': 0.0, 'slow_queries': 0}
+
+
+metrics = MetricsRegistry()
+
+
+def current_scope():
+    return getattr(_local, 'scope', None)
+
+
+def begin_scope(kind, name, scope_id=None):
+    stats = ScopeStats(kind, name, scope_id)
+    _local.scope = stats
+    return stats
+
+
+def end_scope():
+    stats = getattr(_local, 'scope', None)
+    _local.scope = None
+    if stats is not None:
+        metrics.record_scope(stats)
+    return stats
+
+
+def _explain(conn, statement, parameters):
+    """Query plan of a slow SELECT, via a raw cursor so no events fire"""
+    head = statement.lstrip()[:6].upper()
+    if not (head.startswith('SELECT') or head.startswith('WITH')):
+        return None
+    prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        rows = cursor.fetchall()
+    except Exception as e:
+        return f"<explain failed: {e}>"
+    finally:
+        cursor.close()
+    if conn.dialect.name == 'sqlite':
+        # (id, parent, notused, detail)
+        return '\n'.join(str(row[-1]) for row in rows)
+    return '\n'.join(str(row[0]) for row in rows)
+
+
+@event.listens_for(ENGINE, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+@event.listens_for(ENGINE, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('query_start_time')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    slow = elapsed * 1000 >= Config.SLOW_QUERY_MS
+
+    scope = current_scope()
+    if scope is not None:
+        scope.queries += 1
+        scope.db_time += elapsed
+        scope.slow_queries += int(slow)
+    metrics.record_statement(elapsed, slow)
+
+    if slow:
+        plan = None if executemany else _explain(conn, statement, parameters)
+        entry = {
+            'duration_ms': round(elapsed * 1000, 3),
+            'statement': statement[:_MAX_STATEMENT_LOG_LENGTH],
+            'scope': f"{scope.kind}:{scope.name}" if scope else None,
+            'scope_id': scope.scope_id if scope else None,
+            'plan': plan,
+            'at': time.time(),
+        }
+        metrics.record_slow(entry)
+        slow_query_logger.warning(
+            f"{entry['duration_ms']}ms [{entry['scope']} {entry['scope_id']}] {entry['statement']}"
+            + (f"\nPLAN:\n{plan}" if plan else "")
+        )
+
+
+def init_app(app):
+    """Attribute statements to requests (call after g.request_id is set up)"""
+
+    @app.before_request
+    def _begin_request_scope():
+        begin_scope('request', request.endpoint or request.path, g.get('request_id'))
+
+    @app.after_request
+    def _end_request_scope(response):
+        stats = end_scope()
+        if stats is not None:
+            response.headers['Server-Timing'] = (
+                f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries"'
+            )
+        return response
+
+    @app.teardown_request
+    def _teardown_request_scope(exc):
+        # after_request does not run for unhandled exceptions
+        end_scope()
+
+
+def connect_celery():
+    """Attribute statements to Celery tasks and log their totals"""
+    from celery.signals import task_prerun, task_postrun
+
+    @task_prerun.connect(weak=False)
+    def _begin_task_scope(task_id=None, task=None, **kwargs):
+        begin_scope('task', task.name if task else 'unknown', task_id)
+
+    @task_postrun.connect(weak=False)
+    def _end_task_scope(task_id=None, task=None, **kwargs):
+        stats = end_scope()
+        if stats is not None:
+            logger.info(
+                f"Task {stats.name} [{task_id}]: {stats.queries} queries, "
+                f"{stats.db_time * 1000:.1f}ms DB time"
+            )
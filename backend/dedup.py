@@ -0,0 +1,389 @@
+"""
+Candidate deduplication.
+
+Comparing every candidate with every other one is O(n^2). Instead each
+candidate gets a few blocking keys, and only candidates that share a key
+are compared:
+
+- ``email``: the canonical address (lowercased, ``+tag`` removed, dots
+  removed for Gmail). Sharing it is a match on its own.
+- ``phone``: the digits of the phone number, without a leading US ``1``.
+- ``name``: Soundex of the last and first name.
+
+Pairs from the phone and name blocks are scored (see ``_score``) and
+matched at ``DEDUP_MATCH_SCORE``. Blocks larger than
+``DEDUP_MAX_BLOCK_SIZE`` (a shared switchboard number, a very common name)
+are skipped, so the number of comparisons stays linear in the number of
+candidates. Matches are joined into clusters with union-find.
+
+``merge_clusters`` folds each cluster into its oldest candidate: blank
+fields are filled in from the duplicates, interviews are re-parented (an
+interview at the same time as one the survivor already has is dropped),
+tracking rows are pointed at the survivor's address and the duplicates are
+deleted. Everything runs as bulk statements, one transaction per chunk of
+clusters.
+
+Over the whole candidate table both steps take too long for a request, so
+the API runs them as a ``DedupJob`` on a Celery worker (``run_dedup_job``)
+and pages over the clusters it stored.
+"""
+import json
+import logging
+import re
+import uuid
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import case, delete, func, update
+
+from config import Config
+from database import Candidate, DedupJob, EmailTracking, Interview, get_session
+
+logger = logging.getLogger(__name__)
+
+# Candidates per merge transaction
+MERGE_CHUNK_SIZE = 500
+
+_GMAIL_DOMAINS = {'gmail.com', 'googlemail.com'}
+_SOUNDEX_CODES = {
+    **dict.fromkeys('BFPV', '1'), **dict.fromkeys('CGJKQSXZ', '2'), **dict.fromkeys('DT', '3'),
+    'L': '4', **dict.fromkeys('MN', '5'), 'R': '6',
+}
+_PLACEHOLDER_NAMES = {'', 'UNKNOWN'}
+_FILLED_FIELDS = ('phone', 'country', 'address', 'citizenship', 'status', 'notes')
+
+
+def canonical_email(email):
+    """Address with case, ``+tag`` and Gmail dots removed; None if there is no ``@``"""
+    if not email:
+        return None
+    local, at, domain = email.strip().replace(' ', '').lower().rpartition('@')
+    if not at or not local or not domain:
+        return None
+    local = local.split('+', 1)[0]
+    if domain in _GMAIL_DOMAINS:
+        local = local.replace('.', '')
+        domain = 'gmail.com'
+    return f"{local}@{domain}" if local else None
+
+
+def phone_key(phone):
+    """Digits of ``phone`` without a leading US country code; None if too short to identify anyone"""
+    digits = re.sub(r'\D', '', phone or '')
+    if len(digits) == 11 and digits.startswith('1'):
+        digits = digits[1:]
+    return digits if len(digits) >= 7 else None
+
+
+def soundex(name):
+    """American Soundex code (``Robert`` -> ``R163``); '' for a name without letters"""
+    letters = re.sub(r'[^A-Z]', '', (name or '').upper())
+    if not letters:
+        return ''
+    code = letters[0]
+    previous = _SOUNDEX_CODES.get(letters[0])
+    for letter in letters[1:]:
+        digit = _SOUNDEX_CODES.get(letter)
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if letter not in 'HW':
+            previous = digit
+    return code.ljust(4, '0')
+
+
+def name_key(first_name, last_name):
+    first, last = (first_name or '').strip(), (last_name or '').strip()
+    if first.upper() in _PLACEHOLDER_NAMES or last.upper() in _PLACEHOLDER_NAMES:
+        return None
+    return soundex(last) + soundex(first)
+
+
+def _score(a, b):
+    """Evidence that two candidates from a shared phone or name block are the same person"""
+    score = 0
+    if a['phone'] and a['phone'] == b['phone']:
+        score += 2
+    if a['name'] and a['name'] == b['name']:
+        score += 2 if a['full_name'] == b['full_name'] else 1
+    if a['local'] and a['local'] == b['local']:
+        score += 1
+    return score
+
+
+class UnionFind:
+    """Disjoint sets over arbitrary hashable items, with path halving and union by size"""
+
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def find(self, item):
+        parent = self.parent
+        parent.setdefault(item, item)
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.size.get(a, 1) < self.size.get(b, 1):
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] = self.size.get(a, 1) + self.size.get(b, 1)
+
+    def groups(self):
+        members = defaultdict(list)
+        for item in self.parent:
+            members[self.find(item)].append(item)
+        return [sorted(group) for group in members.values() if len(group) > 1]
+
+
+def _load_records(session):
+    columns = (Candidate.id, Candidate.first_name, Candidate.last_name, Candidate.email, Candidate.phone)
+    query = session.query(*columns).order_by(Candidate.id).execution_options(yield_per=Config.EXPORT_BATCH_SIZE)
+    records = {}
+    for candidate_id, first_name, last_name, email, phone in query:
+        canonical = canonical_email(email)
+        records[candidate_id] = {
+            'id': candidate_id, 'first_name': first_name, 'last_name': last_name,
+            'raw_email': email, 'raw_phone': phone,
+            'email': canonical, 'phone': phone_key(phone), 'name': name_key(first_name, last_name),
+            'full_name': re.sub(r'[^a-z]', '', f"{first_name or ''}{last_name or ''}".lower()),
+            'local': canonical.split('@')[0] if canonical else None,
+        }
+    return records
+
+
+def find_duplicates(session=None, min_score=None, max_block_size=None):
+    """
+    Clusters of candidates that look like the same person.
+
+    Returns ``(clusters, stats)``. Each cluster is a dict with the
+    ``survivor_id`` (lowest id), the ``duplicate_ids`` and every member's
+    contact details for review.
+    """
+    own_session = session is None
+    session = session or get_session()
+    min_score = min_score or Config.DEDUP_MATCH_SCORE
+    max_block_size = max_block_size or Config.DEDUP_MAX_BLOCK_SIZE
+    try:
+        records = _load_records(session)
+    finally:
+        if own_session:
+            session.close()
+
+    blocks = {'email': defaultdict(list), 'phone': defaultdict(list), 'name': defaultdict(list)}
+    for record in records.values():
+        for kind, index in blocks.items():
+            if record[kind]:
+                index[record[kind]].append(record['id'])
+
+    sets = UnionFind()
+    stats = {'candidates': len(records), 'comparisons': 0, 'skipped_blocks': 0}
+    for ids in blocks['email'].values():
+        for other in ids[1:]:
+            sets.union(ids[0], other)
+    for kind in ('phone', 'name'):
+        for ids in blocks[kind].values():
+            if len(ids) < 2:
+                continue
+            if len(ids) > max_block_size:
+                stats['skipped_blocks'] += 1
+                continue
+            for i, a in enumerate(ids):
+                for b in ids[i + 1:]:
+                    stats['comparisons'] += 1
+                    if _score(records[a], records[b]) >= min_score:
+                        sets.union(a, b)
+
+    clusters = []
+    for ids in sets.groups():
+        clusters.append({
+            'survivor_id': ids[0],
+            'duplicate_ids': ids[1:],
+            'candidates': [
+                {'id': i, 'first_name': records[i]['first_name'], 'last_name': records[i]['last_name'],
+                 'email': records[i]['raw_email'], 'phone': records[i]['raw_phone']}
+                for i in ids
+            ],
+        })
+    clusters.sort(key=lambda cluster: cluster['survivor_id'])
+    stats['clusters'] = len(clusters)
+    stats['duplicates'] = sum(len(cluster['duplicate_ids']) for cluster in clusters)
+    return clusters, stats
+
+
+def _merge_chunk(session, survivor_of):
+    """Fold the duplicates in ``survivor_of`` (duplicate id -> survivor id) into their survivors"""
+    ids = set(survivor_of) | set(survivor_of.values())
+    columns = [getattr(Candidate, field) for field in _FILLED_FIELDS]
+    candidates = {
+        row.id: row for row in session.query(Candidate.id, Candidate.email, *columns).filter(Candidate.id.in_(ids))
+    }
+    missing = ids - set(candidates)
+    if missing:
+        raise ValueError(f"Candidates not found: {sorted(missing)}")
+
+    # Blank survivor fields take the first non-blank value from a duplicate
+    filled = {}
+    for duplicate_id in sorted(survivor_of):
+        survivor = candidates[survivor_of[duplicate_id]]
+        duplicate = candidates[duplicate_id]
+        for field in _FILLED_FIELDS:
+            if not getattr(survivor, field) and getattr(duplicate, field) and field not in filled.get(survivor.id, {}):
+                filled.setdefault(survivor.id, {})[field] = getattr(duplicate, field)
+
+    # Interviews move to the survivor unless it already has one at that time
+    booked = set()
+    moves, dropped = [], []
+    interviews = session.query(Interview.id, Interview.candidate_id, Interview.interview_date).filter(
+        Interview.candidate_id.in_(ids)
+    ).order_by(Interview.id).all()
+    for interview_id, candidate_id, interview_date in interviews:
+        if candidate_id not in survivor_of:
+            booked.add((candidate_id, interview_date))
+    for interview_id, candidate_id, interview_date in interviews:
+        if candidate_id not in survivor_of:
+            continue
+        key = (survivor_of[candidate_id], interview_date)
+        if key in booked:
+            dropped.append(interview_id)
+        else:
+            booked.add(key)
+            moves.append({'id': interview_id, 'candidate_id': key[0]})
+
+    # Tracking history follows the address the survivor is reached at
+    address_of = {
+        candidates[d].email.lower(): candidates[s].email
+        for d, s in survivor_of.items() if candidates[d].email.lower() != candidates[s].email.lower()
+    }
+
+    if filled:
+        session.execute(update(Candidate), [{'id': cid, **fields} for cid, fields in filled.items()])
+    if moves:
+        session.execute(update(Interview), moves)
+    if dropped:
+        session.execute(delete(Interview).where(Interview.id.in_(dropped)))
+    tracking_updated = 0
+    if address_of:
+        recipient = func.lower(EmailTracking.recipient_email)
+        tracking_updated = session.execute(
+            update(EmailTracking).where(recipient.in_(address_of)).values(
+                recipient_email=case(address_of, value=recipient)
+            ).execution_options(synchronize_session=False)
+        ).rowcount
+    session.execute(delete(Candidate).where(Candidate.id.in_(list(survivor_of))))
+    return {'interviews_moved': len(moves), 'interviews_dropped': len(dropped), 'tracking_updated': tracking_updated}
+
+
+def merge_clusters(clusters, session=None):
+    """
+    Merge each ``{'survivor_id', 'duplicate_ids'}`` cluster into its survivor.
+
+    Commits once per ``MERGE_CHUNK_SIZE`` candidates. Raises ValueError for
+    a cluster that names a candidate twice or one that does not exist.
+    """
+    survivor_of = {}
+    survivors = set()
+    for cluster in clusters:
+        survivor_id = int(cluster['survivor_id'])
+        survivors.add(survivor_id)
+        for duplicate_id in map(int, cluster['duplicate_ids']):
+            if duplicate_id == survivor_id or duplicate_id in survivor_of:
+                raise ValueError(f"Candidate {duplicate_id} appears in more than one place")
+            survivor_of[duplicate_id] = survivor_id
+    if survivors & set(survivor_of):
+        raise ValueError("A duplicate cannot also be a survivor")
+
+    own_session = session is None
+    session = session or get_session()
+    totals = {'merged': 0, 'interviews_moved': 0, 'interviews_dropped': 0, 'tracking_updated': 0}
+    pairs = sorted(survivor_of.items())
+    try:
+        for start in range(0, len(pairs), MERGE_CHUNK_SIZE):
+            chunk = dict(pairs[start:start + MERGE_CHUNK_SIZE])
+            try:
+                result = _merge_chunk(session, chunk)
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            totals['merged'] += len(chunk)
+            for key, value in result.items():
+                totals[key] += value
+    finally:
+        if own_session:
+            session.close()
+    logger.info(
+        f"Merged {totals['merged']} duplicate candidates: {totals['interviews_moved']} interviews moved, "
+        f"{totals['interviews_dropped']} dropped, {totals['tracking_updated']} tracking rows updated"
+    )
+    return totals
+
+
+def create_dedup_job(merge=False):
+    """Record a queued DedupJob. Returns the job as a dict."""
+    session = get_session()
+    try:
+        job = DedupJob(id=str(uuid.uuid4()), merge=merge, status='queued')
+        session.add(job)
+        session.commit()
+        return job.to_dict()
+    finally:
+        session.close()
+
+
+def run_dedup_job(job_id):
+    """Find duplicates (and merge them if the job says so), storing the result on the DedupJob"""
+    session = get_session()
+    try:
+        job = session.get(DedupJob, job_id)
+        if job is None:
+            logger.error(f"Dedup job {job_id} not found")
+            return None
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        session.commit()
+
+        try:
+            clusters, stats = find_duplicates(session)
+            job.clusters = json.dumps(clusters)
+            job.stats = json.dumps(stats)
+            session.commit()
+            if job.merge:
+                job.result = json.dumps(merge_clusters(clusters, session))
+            job.status = 'completed'
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Dedup job {job_id} failed: {str(e)}")
+            job = session.get(DedupJob, job_id)
+            job.status = 'failed'
+            job.message = str(e)
+
+        job.finished_at = datetime.utcnow()
+        session.commit()
+        return job.to_dict()
+    finally:
+        session.close()
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description='Find (and optionally merge) duplicate candidates')
+    parser.add_argument('--apply', action='store_true', help='Merge every cluster found')
+    parser.add_argument('--show', type=int, default=20, help='Clusters to print')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    found, summary = find_duplicates()
+    output = {'stats': summary, 'clusters': found[:args.show]}
+    if args.apply:
+        output['merge'] = merge_clusters(found)
+    print(json.dumps(output, indent=2))
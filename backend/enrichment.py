@@ -0,0 +1,232 @@
+"""
+Offline enrichment of tracking rows.
+
+``track_email`` only stores the raw ``User-Agent`` and client IP of the
+latest open. This module classifies those rows in batches, off the request
+path: whether the open came from a human or from an image proxy / security
+scanner that prefetches images (Gmail's image cache, Apple Mail Privacy
+Protection, link scanners), plus device family and mail client. Prefetch
+opens are added to the ``prefetch_*`` rollup counters so dashboards can
+exclude them.
+"""
+import bisect
+import csv
+import ipaddress
+import logging
+import re
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+
+from sqlalchemy import update
+
+from analytics import RollupDeltas
+from config import Config
+from database import session_scope, EmailTracking
+
+logger = logging.getLogger(__name__)
+
+CLIENT_HUMAN = 'human'
+CLIENT_PROXY = 'proxy'
+CLIENT_BOT = 'bot'
+CLIENT_UNKNOWN = 'unknown'
+PREFETCH_CLASSES = (CLIENT_PROXY, CLIENT_BOT)
+
+UserAgentInfo = namedtuple('UserAgentInfo', ['client_class', 'device_family', 'mail_client'])
+
+# (cidr, label, client_class). Can be extended with ENRICHMENT_IP_RANGES_FILE,
+# a CSV file with the same three columns.
+DEFAULT_IP_RANGES = (
+    ('17.0.0.0/8', 'Apple Mail Privacy Protection', CLIENT_PROXY),
+    ('66.102.0.0/20', 'Gmail image proxy', CLIENT_PROXY),
+    ('66.249.80.0/20', 'Gmail image proxy', CLIENT_PROXY),
+    ('72.14.192.0/18', 'Gmail image proxy', CLIENT_PROXY),
+    ('74.125.0.0/16', 'Gmail image proxy', CLIENT_PROXY),
+    ('40.92.0.0/15', 'Microsoft Exchange Online Protection', CLIENT_BOT),
+    ('40.107.0.0/16', 'Microsoft Exchange Online Protection', CLIENT_BOT),
+    ('52.100.0.0/14', 'Microsoft Exchange Online Protection', CLIENT_BOT),
+    ('104.47.0.0/17', 'Microsoft Exchange Online Protection', CLIENT_BOT),
+    ('98.136.0.0/14', 'Yahoo Mail proxy', CLIENT_PROXY),
+)
+
+# Checked in order; the first match wins. (pattern, client_class, mail_client)
+_UA_RULES = (
+    (re.compile(r'GoogleImageProxy|ggpht\.com', re.I), CLIENT_PROXY, 'Gmail'),
+    (re.compile(r'YahooMailProxy', re.I), CLIENT_PROXY, 'Yahoo Mail'),
+    (re.compile(r'Barracuda|Mimecast|Proofpoint|Symantec|Forcepoint|SafeLinks|BingPreview', re.I), CLIENT_BOT, None),
+    (re.compile(r'bot\b|crawler|spider|python-requests|python-urllib|curl/|wget/|Go-http-client|HeadlessChrome', re.I), CLIENT_BOT, None),
+    (re.compile(r'Thunderbird', re.I), CLIENT_HUMAN, 'Thunderbird'),
+    (re.compile(r'Microsoft Outlook|ms-office|MSOffice|Outlook-iOS|Outlook-Android', re.I), CLIENT_HUMAN, 'Outlook'),
+    (re.compile(r'Edg/|Chrome/|Firefox/|Safari/', re.I), CLIENT_HUMAN, 'Webmail'),
+    # Apple Mail sends a WebKit UA without the "Safari/" token
+    (re.compile(r'AppleWebKit', re.I), CLIENT_HUMAN, 'Apple Mail'),
+)
+
+_DEVICE_RULES = (
+    (re.compile(r'iPhone', re.I), 'iPhone'),
+    (re.compile(r'iPad', re.I), 'iPad'),
+    (re.compile(r'Android', re.I), 'Android'),
+    (re.compile(r'Windows', re.I), 'Windows'),
+    (re.compile(r'Macintosh|Mac OS X', re.I), 'Mac'),
+    (re.compile(r'CrOS', re.I), 'ChromeOS'),
+    (re.compile(r'Linux', re.I), 'Linux'),
+)
+
+# Bare "Mozilla/5.0" is what Apple's privacy proxy sends when prefetching
+_BARE_MOZILLA = re.compile(r'^Mozilla/5\.0$')
+
+
+@lru_cache(maxsize=4096)
+def parse_user_agent(user_agent):
+    """Classify a User-Agent string. Memoized: mail clients repeat a few UAs."""
+    if not user_agent:
+        return UserAgentInfo(CLIENT_UNKNOWN, None, None)
+
+    ua = user_agent.strip()
+    device_family = next((family for pattern, family in _DEVICE_RULES if pattern.search(ua)), 'Other')
+
+    if _BARE_MOZILLA.match(ua):
+        return UserAgentInfo(CLIENT_PROXY, device_family, 'Apple Mail')
+
+    for pattern, client_class, mail_client in _UA_RULES:
+        if pattern.search(ua):
+            return UserAgentInfo(client_class, device_family, mail_client)
+    return UserAgentInfo(CLIENT_UNKNOWN, device_family, None)
+
+
+class IPRangeTable:
+    """Sorted, non-overlapping IP ranges with bisect lookup."""
+
+    def __init__(self, ranges):
+        entries = {4: [], 6: []}
+        for cidr, label, client_class in ranges:
+            network = ipaddress.ip_network(cidr, strict=False)
+            entries[network.version].append(
+                (int(network.network_address), int(network.broadcast_address), label, client_class)
+            )
+        self._entries = {}
+        self._starts = {}
+        for version, items in entries.items():
+            items.sort()
+            self._entries[version] = items
+            self._starts[version] = [item[0] for item in items]
+
+    def lookup(self, ip):
+        """Return (label, client_class) for an IP, or None."""
+        try:
+            address = ipaddress.ip_address(ip.strip())
+        except (AttributeError, ValueError):
+            return None
+        value = int(address)
+        starts = self._starts[address.version]
+        index = bisect.bisect_right(starts, value) - 1
+        if index < 0:
+            return None
+        start, end, label, client_class = self._entries[address.version][index]
+        if start <= value <= end:
+            return label, client_class
+        return None
+
+
+def load_ip_ranges(path=None):
+    """Build the IP-range table from the defaults plus an optional CSV file."""
+    ranges = list(DEFAULT_IP_RANGES)
+    path = path or Config.ENRICHMENT_IP_RANGES_FILE
+    if path:
+        with open(path, newline='') as f:
+            for row in csv.reader(f):
+                if len(row) >= 3 and not row[0].startswith('#'):
+                    ranges.append((row[0].strip(), row[1].strip(), row[2].strip()))
+    return IPRangeTable(ranges)
+
+
+_ip_table = None
+
+
+def get_ip_table():
+    global _ip_table
+    if _ip_table is None:
+        _ip_table = load_ip_ranges()
+    return _ip_table
+
+
+def classify_open(user_agent, ip_address):
+    """Combine User-Agent and IP range information into a classification."""
+    info = parse_user_agent(user_agent)
+    ip_match = get_ip_table().lookup(ip_address) if ip_address else None
+    if ip_match and info.client_class not in PREFETCH_CLASSES:
+        label, client_class = ip_match
+        mail_client = info.mail_client
+        if 'Apple' in label:
+            mail_client = 'Apple Mail'
+        elif 'Gmail' in label:
+            mail_client = 'Gmail'
+        return UserAgentInfo(client_class, info.device_family, mail_client)
+    return info
+
+
+def enrich_pending(chunk_size=None, max_chunks=None):
+    """
+    Classify opened tracking rows that have not been enriched yet.
+
+    Works through the pending rows in ``chunk_size`` batches (one transaction
+    each) and returns the number of rows enriched. Rows re-opened after
+    enrichment are picked up again, and their prefetch counters are adjusted
+    by the difference.
+    """
+    chunk_size = chunk_size or Config.ENRICHMENT_CHUNK_SIZE
+    last_id = 0
+    enriched = 0
+    chunks = 0
+
+    while max_chunks is None or chunks < max_chunks:
+        with session_scope() as session:
+            rows = session.query(
+                EmailTracking.id,
+                EmailTracking.campaign_id,
+                EmailTracking.opened_at,
+                EmailTracking.open_count,
+                EmailTracking.ip_address,
+                EmailTracking.user_agent,
+                EmailTracking.client_class,
+                EmailTracking.enriched_open_count,
+            ).filter(
+                EmailTracking.id > last_id,
+                EmailTracking.enriched_at.is_(None),
+                EmailTracking.opened_at.isnot(None),
+            ).order_by(EmailTracking.id).limit(chunk_size).all()
+
+            if not rows:
+                break
+
+            now = datetime.utcnow()
+            updates = []
+            deltas = RollupDeltas()
+            for row_id, campaign_id, opened_at, open_count, ip, ua, previous_class, previous_count in rows:
+                info = classify_open(ua, ip)
+                updates.append({
+                    'id': row_id,
+                    'client_class': info.client_class,
+                    'device_family': info.device_family,
+                    'mail_client': info.mail_client,
+                    'enriched_at': now,
+                    'enriched_open_count': open_count or 0,
+                })
+
+                was_prefetch = previous_class in PREFETCH_CLASSES
+                is_prefetch = info.client_class in PREFETCH_CLASSES
+                opens_delta = ((open_count or 0) if is_prefetch else 0) - ((previous_count or 0) if was_prefetch else 0)
+                unique_delta = int(is_prefetch) - int(was_prefetch)
+                if opens_delta or unique_delta:
+                    deltas.add_prefetch(campaign_id, opened_at, opens_delta, unique_delta)
+
+            session.execute(update(EmailTracking), updates)
+            deltas.apply(session)
+
+            last_id = rows[-1][0]
+            enriched += len(rows)
+            chunks += 1
+
+    if enriched:
+        logger.info(f"Enriched {enriched} tracking rows")
+    return enriched
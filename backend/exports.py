@@ -0,0 +1,184 @@
+"""
+Streaming CSV/XLSX exports.
+
+Rows are read as plain column tuples with ``yield_per``, which makes
+SQLAlchemy use a server-side cursor (``stream_results``) where the driver
+has one, and fetch ``EXPORT_BATCH_SIZE`` rows at a time. CSV is encoded in
+blocks of about 64 KB and handed to Flask as a generator, so the response
+goes out chunked while rows are still being read; memory does not grow
+with the number of rows.
+
+XLSX needs openpyxl (optional). Its write-only workbook keeps memory flat
+too, but a ZIP container can only be finished once every row is in, so the
+workbook is built in a temporary file and streamed from there.
+"""
+import csv
+import io
+import os
+import re
+import tempfile
+from datetime import date, datetime
+
+from flask import Response
+
+from config import Config
+from database import Candidate, EmailTracking, Interview
+
+try:
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+except ImportError:  # pragma: no cover - optional dependency
+    openpyxl = None
+
+EXPORT_FORMATS = ('csv', 'xlsx')
+_CSV_BLOCK_BYTES = 64 * 1024
+# Leading characters that make Excel/LibreOffice/Sheets evaluate a CSV cell
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+# Signed numbers and phone numbers ("+1 (555) 010-0100"): read as numbers,
+# never as a formula, so they are exported unchanged
+_SIGNED_NUMBER = re.compile(r'^[+-][\d\s().-]*$')
+
+CANDIDATE_COLUMNS = (
+    ('id', Candidate.id),
+    ('first_name', Candidate.first_name),
+    ('last_name', Candidate.last_name),
+    ('email', Candidate.email),
+    ('phone', Candidate.phone),
+    ('country', Candidate.country),
+    ('address', Candidate.address),
+    ('citizenship', Candidate.citizenship),
+    ('notes', Candidate.notes),
+    ('created_at', Candidate.created_at),
+    ('updated_at', Candidate.updated_at),
+)
+INTERVIEW_COLUMNS = (
+    ('id', Interview.id),
+    ('candidate_id', Interview.candidate_id),
+    ('candidate_first_name', Candidate.first_name),
+    ('candidate_last_name', Candidate.last_name),
+    ('candidate_email', Candidate.email),
+    ('interview_date', Interview.interview_date),
+    ('interview_time', Interview.interview_time),
+    ('day_of_week', Interview.day_of_week),
+    ('status', Interview.status),
+    ('meet_link', Interview.meet_link),
+    ('notes', Interview.notes),
+    ('email_sent', Interview.email_sent),
+    ('email_sent_at', Interview.email_sent_at),
+    ('created_at', Interview.created_at),
+)
+TRACKING_COLUMNS = (
+    ('tracking_id', EmailTracking.tracking_id),
+    ('campaign_id', EmailTracking.campaign_id),
+    ('recipient_email', EmailTracking.recipient_email),
+    ('status', EmailTracking.status),
+    ('open_count', EmailTracking.open_count),
+    ('click_count', EmailTracking.click_count),
+    ('created_at', EmailTracking.created_at),
+    ('opened_at', EmailTracking.opened_at),
+    ('clicked_at', EmailTracking.clicked_at),
+    ('client_class', EmailTracking.client_class),
+    ('device_family', EmailTracking.device_family),
+    ('mail_client', EmailTracking.mail_client),
+)
+
+
+def export_format(value):
+    fmt = (value or 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    if fmt == 'xlsx' and openpyxl is None:
+        raise ValueError("XLSX export requires openpyxl (pip install openpyxl)")
+    return fmt
+
+
+def iter_rows(query, columns, batch_size=None):
+    """Column tuples of ``query`` restricted to ``columns``, fetched in batches"""
+    batch_size = batch_size or Config.EXPORT_BATCH_SIZE
+    projected = query.with_entities(*[column for _, column in columns])
+    return projected.execution_options(yield_per=batch_size)
+
+
+def _escape_formula(value):
+    """Quote CSV text a spreadsheet would run as a formula (CSV/formula injection)"""
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES) and not _SIGNED_NUMBER.match(value):
+        return "'" + value
+    return value
+
+
+def _xlsx_cell(sheet, value):
+    """
+    openpyxl only turns ``=`` text into a formula; write that as an explicit
+    string cell so the value stays exactly as stored
+    """
+    if isinstance(value, str) and value.startswith('='):
+        cell = WriteOnlyCell(sheet, value)
+        cell.data_type = 's'
+        return cell
+    return value
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return _escape_formula(value)
+
+
+def csv_chunks(columns, rows):
+    """Encoded CSV (header first) in blocks of about 64 KB"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in columns])
+    for row in rows:
+        writer.writerow([_cell(value) for value in row])
+        if buffer.tell() >= _CSV_BLOCK_BYTES:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def xlsx_chunks(columns, rows, sheet_title='export'):
+    """An XLSX workbook built in a temporary file, then read back in blocks"""
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title[:31])  # Excel's limit
+    sheet.append([name for name, _ in columns])
+    for row in rows:
+        sheet.append([_xlsx_cell(sheet, value) for value in row])
+
+    handle, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(handle)
+    try:
+        workbook.save(path)
+        with open(path, 'rb') as f:
+            while True:
+                block = f.read(_CSV_BLOCK_BYTES)
+                if not block:
+                    break
+                yield block
+    finally:
+        os.remove(path)
+
+
+def export_response(session, query, columns, fmt, name):
+    """
+    Streamed download of ``query``. The response owns ``session`` and closes
+    it once the body has been sent (or the client disconnected).
+    """
+    rows = iter_rows(query, columns)
+    if fmt == 'xlsx':
+        body = xlsx_chunks(columns, rows, sheet_title=name)
+        mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    else:
+        body = csv_chunks(columns, rows)
+        mimetype = 'text/csv'
+    filename = f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+    response = Response(body, mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'X-Accel-Buffering': 'no',  # let nginx pass chunks straight through
+    })
+    response.call_on_close(session.close)
+    return response
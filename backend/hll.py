@@ -0,0 +1,123 @@
+"""
+Mergeable HyperLogLog cardinality sketches.
+
+Registers are kept as a ``bytearray`` (one byte per register). Merging and
+estimating work on the whole register array with big-integer and
+``bytes.count`` operations instead of per-register Python loops, so both
+take microseconds even at the default precision of 2^12 registers
+(~1.6% standard error).
+"""
+import hashlib
+import math
+import zlib
+
+DEFAULT_PRECISION = 12
+MIN_PRECISION = 4
+MAX_PRECISION = 16
+
+_HASH_BITS = 64
+_SERIAL_VERSION = 1
+
+
+def _alpha(m):
+    if m == 16:
+        return 0.673
+    if m == 32:
+        return 0.697
+    if m == 64:
+        return 0.709
+    return 0.7213 / (1 + 1.079 / m)
+
+
+class HyperLogLog:
+    """HyperLogLog sketch with ``2 ** precision`` registers."""
+
+    def __init__(self, precision=DEFAULT_PRECISION, registers=None):
+        if not MIN_PRECISION <= precision <= MAX_PRECISION:
+            raise ValueError(f"precision must be between {MIN_PRECISION} and {MAX_PRECISION}")
+        self.precision = precision
+        self.m = 1 << precision
+        if registers is None:
+            self.registers = bytearray(self.m)
+        else:
+            if len(registers) != self.m:
+                raise ValueError("register array does not match precision")
+            self.registers = bytearray(registers)
+
+    @property
+    def relative_error(self):
+        """Standard error of the estimate (1.04 / sqrt(m))."""
+        return 1.04 / math.sqrt(self.m)
+
+    def add(self, value):
+        """Add a value (str or bytes) to the sketch."""
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        x = int.from_bytes(hashlib.blake2b(value, digest_size=8).digest(), 'big')
+        index = x >> (_HASH_BITS - self.precision)
+        remaining_bits = _HASH_BITS - self.precision
+        w = x & ((1 << remaining_bits) - 1)
+        rank = remaining_bits - w.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other):
+        """Merge another sketch into this one (register-wise max)."""
+        if other.precision != self.precision:
+            raise ValueError("cannot merge sketches with different precision")
+        n = self.m
+        a = int.from_bytes(self.registers, 'big')
+        b = int.from_bytes(other.registers, 'big')
+        high = int.from_bytes(b'\x80' * n, 'big')
+        # Registers stay below 0x80, so (a | 0x80) - b never borrows across
+        # bytes and leaves the high bit set exactly where a >= b.
+        a_ge_b = (((a | high) - b) & high) >> 7
+        keep_a = a_ge_b * 0xFF
+        merged = (a & keep_a) | (b & ~keep_a & ((1 << (8 * n)) - 1))
+        self.registers = bytearray(merged.to_bytes(n, 'big'))
+        return self
+
+    def count(self):
+        """Estimated number of distinct values added."""
+        registers = bytes(self.registers)
+        m = self.m
+        harmonic = 0.0
+        seen = 0
+        rank = 0
+        # Histogram of register values; stops once every register is accounted for
+        while seen < m:
+            occurrences = registers.count(rank)
+            if occurrences:
+                harmonic += occurrences * 2.0 ** -rank
+                seen += occurrences
+            rank += 1
+        estimate = _alpha(m) * m * m / harmonic
+        zeros = registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def copy(self):
+        return HyperLogLog(self.precision, self.registers)
+
+    def to_bytes(self):
+        """Compact serialized form (mostly-empty sketches compress well)."""
+        return bytes((_SERIAL_VERSION, self.precision)) + zlib.compress(bytes(self.registers), 1)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if not data or data[0] != _SERIAL_VERSION:
+            raise ValueError("unsupported HyperLogLog serialization")
+        return cls(data[1], zlib.decompress(data[2:]))
+
+    @classmethod
+    def union(cls, sketches, precision=DEFAULT_PRECISION):
+        """Merge an iterable of sketches into a new one."""
+        result = cls(precision)
+        for sketch in sketches:
+            result.merge(sketch)
+        return result
@@ -0,0 +1,33 @@
+"""
+Declared relationship loading per serializer.
+
+Every query whose ORM objects are serialized names the policy of the
+serializer it feeds, instead of choosing loader options ad hoc:
+
+    session.query(Interview).options(*load_policy('interview.to_dict'))
+
+A policy eager-loads exactly the relationships the serializer touches, so
+serializing N objects costs a constant number of queries. When the query
+guard is enabled (development and tests) every other relationship is set to
+``raiseload``, turning an undeclared lazy load into an immediate error
+instead of a silent N+1.
+"""
+from sqlalchemy.orm import joinedload, raiseload
+
+from database import Interview
+import query_guard
+
+LOAD_POLICIES = {
+    # Interview.to_dict() nests Candidate.to_dict(); many-to-one, so join it
+    'interview.to_dict': (joinedload(Interview.candidate),),
+    # Candidate.to_dict()/to_safe_dict() only read columns
+    'candidate.to_dict': (),
+}
+
+
+def load_policy(name):
+    """Loader options for the named serializer"""
+    options = LOAD_POLICIES[name]
+    if query_guard.strict():
+        options = options + (raiseload('*'),)
+    return options
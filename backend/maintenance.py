@@ -0,0 +1,92 @@
+"""
+Routine database maintenance, run by Celery beat (see celery_app.py).
+
+On SQLite:
+
+* ``wal_checkpoint(TRUNCATE)`` copies the WAL back into the database and
+  truncates it. Automatic checkpoints never shrink the file and are starved
+  while readers are active, so without this the WAL keeps growing.
+* ``ANALYZE`` refreshes the statistics in ``sqlite_stat1`` that the query
+  planner uses to pick indexes (and count_cache.py reads for estimates).
+* ``incremental_vacuum`` returns free pages left by deletes (retention,
+  dedup merges) to the filesystem.
+
+On PostgreSQL autovacuum does the equivalent, so only ``ANALYZE`` runs.
+
+Each step is timed; the result is logged and returned by the task.
+"""
+import logging
+import time
+
+from sqlalchemy import text
+
+from database import ENGINE
+from retention import incremental_vacuum
+
+logger = logging.getLogger(__name__)
+
+
+def _checkpoint(engine):
+    with engine.connect() as conn:
+        busy, wal_pages, checkpointed = conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)").first()
+    # busy=1 means readers kept part of the WAL from being checkpointed
+    return {'busy': bool(busy), 'wal_pages': wal_pages, 'checkpointed_pages': checkpointed}
+
+
+def _analyze(engine):
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    return None
+
+
+def _vacuum(engine):
+    return {'vacuumed': incremental_vacuum(engine=engine)}
+
+
+def run_maintenance(engine=None, steps=None):
+    """
+    Run the maintenance steps and return their timings:
+    ``{'dialect', 'total_ms', 'steps': [{'step', 'duration_ms', 'result'|'error'}]}``.
+
+    A failing step is reported and does not stop the others.
+    """
+    engine = engine or ENGINE
+    if engine.dialect.name == 'sqlite':
+        available = (('wal_checkpoint', _checkpoint), ('analyze', _analyze), ('incremental_vacuum', _vacuum))
+    else:
+        available = (('analyze', _analyze),)
+    if steps:
+        available = [(name, fn) for name, fn in available if name in steps]
+
+    report = []
+    started = time.perf_counter()
+    for name, fn in available:
+        step_started = time.perf_counter()
+        entry = {'step': name}
+        try:
+            entry['result'] = fn(engine)
+        except Exception as e:
+            logger.error(f"Database maintenance step {name} failed: {str(e)}")
+            entry['error'] = str(e)
+        entry['duration_ms'] = round((time.perf_counter() - step_started) * 1000, 3)
+        report.append(entry)
+
+    total_ms = round((time.perf_counter() - started) * 1000, 3)
+    logger.info(
+        f"Database maintenance finished in {total_ms}ms: "
+        + ', '.join(f"{e['step']}={e['duration_ms']}ms" for e in report)
+    )
+    return {'dialect': engine.dialect.name, 'total_ms': total_ms, 'steps': report}
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description='Checkpoint, analyze and vacuum the database')
+    parser.add_argument('--step', action='append', choices=('wal_checkpoint', 'analyze', 'incremental_vacuum'),
+                        help='Only run this step (repeatable)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(run_maintenance(steps=args.step), indent=2))
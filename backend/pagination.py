@@ -0,0 +1,92 @@
+"""
+Keyset (cursor) pagination.
+
+Instead of ``OFFSET n``, which makes the database walk and discard ``n``
+rows, each page continues after the sort key of the previous page's last
+row: ``WHERE (last_name, id) > (:last_name, :id) ORDER BY last_name, id``.
+With an index on the sort key every page costs the same, however deep.
+
+The position is handed to clients as an opaque, URL-safe continuation
+token. Tokens are tied to the listing they came from.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from sqlalchemy import tuple_
+
+from database import Candidate, Interview
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    """Raised for malformed or foreign continuation tokens"""
+
+
+class KeysetKey:
+    """A named, unique sort key: one or more columns ending in the primary key"""
+
+    def __init__(self, name, columns):
+        self.name = name
+        self.columns = tuple(columns)
+
+    def encode(self, row):
+        """Token for the position after ``row`` (an ORM object, row tuple or dict)"""
+        values = []
+        for column in self.columns:
+            value = row[column.key] if isinstance(row, dict) else getattr(row, column.key)
+            values.append(value.isoformat() if isinstance(value, (datetime, date)) else value)
+        payload = json.dumps({'k': self.name, 'v': values}, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(payload).rstrip(b'=').decode('ascii')
+
+    def decode(self, token):
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            if payload.get('k') != self.name or len(payload['v']) != len(self.columns):
+                raise InvalidCursor("Cursor does not belong to this listing")
+            values = []
+            for column, value in zip(self.columns, payload['v']):
+                if value is not None and column.type.python_type is datetime:
+                    value = datetime.fromisoformat(value)
+                values.append(value)
+            return values
+        except InvalidCursor:
+            raise
+        except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError, AttributeError) as e:
+            raise InvalidCursor(f"Invalid cursor: {str(e)}")
+
+
+CANDIDATES_BY_NAME = KeysetKey('candidates:last_name', (Candidate.last_name, Candidate.id))
+INTERVIEWS_BY_DATE = KeysetKey('interviews:interview_date', (Interview.interview_date, Interview.id))
+
+
+def page_size(limit):
+    """Clamp a requested page size into [1, MAX_PAGE_SIZE]"""
+    if not limit or limit < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def keyset_page(query, key, cursor=None, limit=None, fetch=None):
+    """
+    Fetch one page of ``query`` ordered by ``key``.
+
+    ``cursor`` is the token returned for the previous page (None for the
+    first page). ``fetch`` runs the final query (default ``Query.all``), e.g.
+    a serializer from serializers.py. Returns ``(rows, next_cursor)``;
+    ``next_cursor`` is None on the last page.
+    """
+    limit = page_size(limit)
+    if cursor:
+        query = query.filter(tuple_(*key.columns) > tuple_(*key.decode(cursor)))
+
+    # One extra row tells us whether another page exists without a COUNT
+    rows = (fetch or list)(query.order_by(*key.columns).limit(limit + 1))
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, key.encode(rows[-1])
+    return rows, None
@@ -0,0 +1,101 @@
+"""
+SQL statement counting for N+1 detection.
+
+``QueryCounter`` records every statement executed on the shared engine in
+the current thread while it is active. With ``QUERY_GUARD=1`` (development
+and tests) each request runs inside one: the count is returned in the
+``X-Query-Count`` response header, requests above
+``QUERY_GUARD_WARN_THRESHOLD`` statements are logged, and loader policies
+(loading.py) forbid undeclared lazy loads.
+
+Tests use ``assert_constant_queries`` to fail when an endpoint's statement
+count grows with the size of its result.
+"""
+import logging
+import threading
+
+from flask import g
+from sqlalchemy import event
+
+from config import Config
+from database import ENGINE
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def strict():
+    return Config.QUERY_GUARD
+
+
+class QueryCounter:
+    """Context manager collecting the statements run in this thread"""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def __enter__(self):
+        stack = getattr(_local, 'counters', None)
+        if stack is None:
+            stack = _local.counters = []
+        stack.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _local.counters.remove(self)
+        return False
+
+
+@event.listens_for(ENGINE, 'before_cursor_execute')
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    for counter in getattr(_local, 'counters', None) or ():
+        counter.statements.append(statement)
+
+
+def init_app(app):
+    """Count statements per request when QUERY_GUARD is enabled"""
+    if not strict():
+        return
+
+    @app.before_request
+    def _start_query_counter():
+        g.query_counter = QueryCounter().__enter__()
+
+    @app.after_request
+    def _report_query_count(response):
+        counter = g.pop('query_counter', None)
+        if counter is not None:
+            counter.__exit__(None, None, None)
+            response.headers['X-Query-Count'] = str(counter.count)
+            if counter.count > Config.QUERY_GUARD_WARN_THRESHOLD:
+                logger.warning(
+                    f"{counter.count} SQL statements for {response.status_code} response "
+                    f"(request_id={g.get('request_id')})"
+                )
+        return response
+
+    @app.teardown_request
+    def _drop_query_counter(exc):
+        counter = g.pop('query_counter', None)
+        if counter is not None:
+            counter.__exit__(None, None, None)
+
+
+def assert_constant_queries(measure, grow, sizes=(2, 6)):
+    """
+    Fail if a code path runs more statements for larger results.
+
+    ``grow(n)`` must make the result contain ``n`` (more) items and
+    ``measure()`` run the code path and return its statement count.
+    """
+    counts = []
+    for size in sizes:
+        grow(size)
+        counts.append(measure())
+    assert len(set(counts)) == 1, f"query count grows with result size: {dict(zip(sizes, counts))}"
+    return counts[0]
@@ -0,0 +1,218 @@
+"""
+Query-plan regression checker for the hot queries.
+
+Each entry in ``HOT_QUERIES`` mirrors a query the app runs on every
+scheduling or tracking request. ``check_query_plans`` runs it once to
+capture the exact SQL, explains it (``EXPLAIN QUERY PLAN`` on SQLite,
+``EXPLAIN`` with sequential scans disabled on PostgreSQL) and reports every
+full scan of a table. A non-empty report means an index was dropped or a
+query changed shape so it no longer uses one.
+
+    python query_plans.py            # against DATABASE_URL
+    python query_plans.py --seed 5000  # against a throwaway seeded SQLite DB
+
+Exits with status 1 if any hot query regressed to a full scan, or if a
+model declares an index that is a leading prefix of another index or
+unique constraint (``redundant_indexes``): the longer one serves the same
+lookups, so the shorter only costs writes.
+"""
+import logging
+import re
+from datetime import datetime, timedelta
+
+from sqlalchemy import UniqueConstraint, event, func
+
+from database import Base, EmailTracking, Interview, InterviewStatus, get_session
+
+logger = logging.getLogger(__name__)
+
+_WINDOW = datetime(2030, 1, 7, 10, 0)
+_ACTIVE = [InterviewStatus.CONFIRMED.value, InterviewStatus.PENDING.value, InterviewStatus.RESCHEDULED.value]
+
+HOT_QUERIES = {
+    # scheduler.check_scheduling_conflict
+    'scheduling_conflict': lambda session: session.query(Interview).filter(
+        Interview.candidate_id == 1,
+        Interview.interview_date >= _WINDOW - timedelta(hours=1),
+        Interview.interview_date <= _WINDOW + timedelta(hours=1),
+        Interview.status != InterviewStatus.CANCELLED.value,
+    ),
+    'scheduling_duplicate': lambda session: session.query(Interview).filter(
+        Interview.candidate_id == 1,
+        Interview.interview_date == _WINDOW,
+        Interview.status != InterviewStatus.CANCELLED.value,
+    ),
+    # scheduler.find_available_slots
+    'available_slots': lambda session: session.query(Interview.interview_date, Interview.candidate_id).filter(
+        Interview.interview_date >= _WINDOW,
+        Interview.interview_date <= _WINDOW + timedelta(days=14),
+        Interview.status != InterviewStatus.CANCELLED.value,
+    ),
+    # scheduler.get_schedule_summary
+    'schedule_summary': lambda session: session.query(Interview.status, func.count(Interview.id)).filter(
+        Interview.interview_date >= _WINDOW,
+        Interview.interview_date <= _WINDOW + timedelta(days=30),
+    ).group_by(Interview.status),
+    'upcoming_count': lambda session: session.query(func.count(Interview.id)).filter(
+        Interview.interview_date >= _WINDOW,
+        Interview.status.in_(_ACTIVE),
+    ),
+    # A campaign's rows by status (analytics, retention)
+    'campaign_tracking_by_status': lambda session: session.query(EmailTracking).filter(
+        EmailTracking.campaign_id == 'campaign-1',
+        EmailTracking.status == 'opened',
+    ),
+    # dedup._merge_chunk re-points tracking rows by address, ignoring case
+    'tracking_by_recipient': lambda session: session.query(EmailTracking.id).filter(
+        func.lower(EmailTracking.recipient_email).in_(['jane@example.com', 'john@example.com']),
+    ),
+    # app.get_system_stats
+    'tracking_status_count': lambda session: session.query(func.count(EmailTracking.id)).filter(
+        EmailTracking.status.in_(['opened', 'clicked']),
+    ),
+}
+
+_SQLITE_SCAN = re.compile(r'^SCAN (\w+)')
+_PG_SEQ_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+def _capture_statement(session, query):
+    """Run ``query`` once and return the (statement, parameters) sent to the driver"""
+    conn = session.connection()
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(conn, 'before_cursor_execute', capture)
+    try:
+        session.execute(query.statement).fetchall()
+    finally:
+        event.remove(conn, 'before_cursor_execute', capture)
+    return conn, captured[-1]
+
+
+def explain(session, query):
+    """Query plan of ``query`` as a list of lines"""
+    conn, (statement, parameters) = _capture_statement(session, query)
+    cursor = conn.connection.cursor()
+    try:
+        if conn.dialect.name == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+            # (id, parent, notused, detail)
+            return [str(row[-1]) for row in cursor.fetchall()]
+        # Small or freshly seeded tables make sequential scans genuinely
+        # cheaper; disable them so the plan shows whether an index applies
+        cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute('EXPLAIN ' + statement, parameters)
+        return [str(row[0]) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def full_scans(plan, dialect_name):
+    """Tables the plan reads in full"""
+    pattern = _SQLITE_SCAN if dialect_name == 'sqlite' else _PG_SEQ_SCAN
+    tables = set(Base.metadata.tables)
+    scans = []
+    for line in plan:
+        match = pattern.search(line.strip())
+        if match and match.group(1) in tables:
+            scans.append(match.group(1))
+    return scans
+
+
+def check_query_plans(session=None, names=None):
+    """
+    Explain each hot query and return ``[{'name', 'plan', 'full_scans'}]``.
+    """
+    own_session = session is None
+    session = session or get_session()
+    try:
+        dialect_name = session.get_bind().dialect.name
+        report = []
+        for name, build in HOT_QUERIES.items():
+            if names and name not in names:
+                continue
+            plan = explain(session, build(session))
+            report.append({'name': name, 'plan': plan, 'full_scans': full_scans(plan, dialect_name)})
+            session.rollback()
+        return report
+    finally:
+        if own_session:
+            session.close()
+
+
+def regressions(report):
+    return [entry for entry in report if entry['full_scans']]
+
+
+def redundant_indexes(metadata=Base.metadata):
+    """
+    ``[(table, index, covered_by)]`` for each plain column index whose
+    columns lead another index or unique constraint of the same table.
+    Partial and expression indexes are left out.
+    """
+    found = []
+    for table in metadata.sorted_tables:
+        keys = [
+            (constraint.name, tuple(column.name for column in constraint.columns))
+            for constraint in table.constraints if isinstance(constraint, UniqueConstraint)
+        ]
+        indexes = []
+        for index in table.indexes:
+            partial = any(options.get('where') is not None for options in index.dialect_options.values())
+            if not partial and len(index.columns) == len(index.expressions):
+                indexes.append((index.name, tuple(column.name for column in index.columns)))
+        keys += indexes
+        for name, columns in indexes:
+            for other, other_columns in keys:
+                if other != name and other_columns[:len(columns)] == columns:
+                    found.append((table.name, name, other))
+                    break
+    return found
+
+
+def seed_database(engine, interviews=5000, campaigns=20):
+    """Create the schema on ``engine`` and fill it with representative rows (seed_data.seed_scale)"""
+    from seed_data import seed_scale
+
+    seed_scale(engine, candidates=max(interviews // 5, 1), interviews=interviews, tracking=interviews * 2,
+               campaigns=campaigns)
+
+
+if __name__ == '__main__':
+    import argparse
+    import os
+    import sys
+    import tempfile
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    parser = argparse.ArgumentParser(description='Fail if a hot query regressed to a full table scan')
+    parser.add_argument('--seed', type=int, metavar='ROWS',
+                        help='Check against a temporary SQLite database seeded with ROWS interviews')
+    parser.add_argument('--verbose', action='store_true', help='Print every plan')
+    args = parser.parse_args()
+
+    if args.seed:
+        tmp = tempfile.TemporaryDirectory()
+        engine = create_engine(f"sqlite:///{os.path.join(tmp.name, 'plans.db')}")
+        seed_database(engine, interviews=args.seed)
+        with Session(engine) as session:
+            result = check_query_plans(session)
+        engine.dispose()
+        tmp.cleanup()
+    else:
+        result = check_query_plans()
+
+    for entry in result:
+        status = 'FULL SCAN of ' + ', '.join(entry['full_scans']) if entry['full_scans'] else 'ok'
+        print(f"{entry['name']:<30} {status}")
+        if args.verbose or entry['full_scans']:
+            print('\n'.join('    ' + line for line in entry['plan']))
+    redundant = redundant_indexes()
+    for table, index, covered_by in redundant:
+        print(f"{table}: {index} is redundant with {covered_by}")
+    sys.exit(1 if regressions(result) or redundant else 0)
@@ -0,0 +1,300 @@
+"""
+Retention for raw tracking data.
+
+``email_tracking`` and ``email_clicks`` grow by one row per recipient and
+per click, forever. Once a campaign is older than the retention window its
+numbers are fully described by the rollup tables and HLL sketches, so the
+raw rows are:
+
+1. checked against the rollups (rebuilt with ``backfill_rollups`` if the
+   campaign predates them),
+2. exported to compressed archive files (gzip JSONL, or Parquet when
+   pyarrow is installed and ``TRACKING_ARCHIVE_FORMAT=parquet``),
+3. deleted in small batches, one short transaction each, so the tracking
+   endpoints are never blocked for long,
+4. and the freed pages are handed back with ``PRAGMA incremental_vacuum``.
+
+Archived rows stay readable through ``read_archive`` and the analytics API.
+Campaign links are kept so redirects in old emails keep working.
+"""
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, text
+
+from analytics import ALL_TIME_BUCKET, backfill_rollups
+from config import Config, ARCHIVE_DIR
+from database import (
+    ENGINE, session_scope, EmailTracking, EmailClick, TrackingRollup, TrackingArchive
+)
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FORMATS = ('jsonl', 'parquet')
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _archive_format(requested=None):
+    fmt = (requested or Config.TRACKING_ARCHIVE_FORMAT or 'jsonl').lower()
+    if fmt not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unknown archive format: {fmt}")
+    if fmt == 'parquet' and not PARQUET_AVAILABLE:
+        logger.warning("pyarrow is not installed, archiving as JSONL instead of Parquet")
+        fmt = 'jsonl'
+    return fmt
+
+
+def find_expired_campaigns(session, cutoff):
+    """Campaign IDs whose newest tracking row was created before ``cutoff``"""
+    rows = session.query(EmailTracking.campaign_id).group_by(
+        EmailTracking.campaign_id
+    ).having(func.max(EmailTracking.created_at) < cutoff).all()
+    return [row[0] for row in rows]
+
+
+def _ensure_rollups(campaign_id):
+    """Rebuild the campaign's rollups unless they already cover every raw row"""
+    with session_scope() as session:
+        raw_sent = session.query(func.count(EmailTracking.id)).filter(
+            EmailTracking.campaign_id == campaign_id
+        ).scalar()
+        rolled_up = session.query(TrackingRollup.sent).filter(
+            TrackingRollup.campaign_id == campaign_id,
+            TrackingRollup.granularity == 'all',
+            TrackingRollup.bucket_start == ALL_TIME_BUCKET,
+        ).scalar()
+    if rolled_up != raw_sent:
+        logger.info(f"Rollups for campaign {campaign_id} are incomplete ({rolled_up} vs {raw_sent}), rebuilding")
+        backfill_rollups(campaign_id=campaign_id)
+
+
+def _export_table(session, table, campaign_filter, path, fmt):
+    """
+    Stream the selected rows of ``table`` into ``path``.
+
+    Writes to a temporary file that is renamed into place, so a crash never
+    leaves a partial archive behind. Returns (row_count, first, last created_at).
+    """
+    stmt = select(table).where(campaign_filter).order_by(table.c.id).execution_options(yield_per=5000)
+    tmp_path = path + '.tmp'
+    count = 0
+    first_created = last_created = None
+    time_column = 'created_at' if 'created_at' in table.c else 'clicked_at'
+
+    def track(row):
+        nonlocal count, first_created, last_created
+        count += 1
+        created = row[time_column]
+        if created is not None:
+            first_created = created if first_created is None else min(first_created, created)
+            last_created = created if last_created is None else max(last_created, created)
+
+    result = session.execute(stmt).mappings()
+    if fmt == 'parquet':
+        writer = None
+        try:
+            for partition in result.partitions():
+                rows = [dict(row) for row in partition]
+                for row in rows:
+                    track(row)
+                batch = pyarrow.Table.from_pylist(rows)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, batch.schema, compression='zstd')
+                writer.write_table(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            return 0, None, None
+    else:
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            for row in result:
+                track(row)
+                f.write(json.dumps(dict(row), default=_json_default))
+                f.write('\n')
+        if count == 0:
+            os.remove(tmp_path)
+            return 0, None, None
+
+    os.replace(tmp_path, path)
+    return count, first_created, last_created
+
+
+def _delete_in_batches(campaign_id, batch_size):
+    """Delete a campaign's tracking and click rows, ``batch_size`` messages per transaction"""
+    deleted = 0
+    while True:
+        with session_scope() as session:
+            rows = session.query(EmailTracking.id, EmailTracking.tracking_id).filter(
+                EmailTracking.campaign_id == campaign_id
+            ).limit(batch_size).all()
+            if not rows:
+                break
+            session.query(EmailClick).filter(
+                EmailClick.tracking_id.in_([row[1] for row in rows])
+            ).delete(synchronize_session=False)
+            session.query(EmailTracking).filter(
+                EmailTracking.id.in_([row[0] for row in rows])
+            ).delete(synchronize_session=False)
+        deleted += len(rows)
+    return deleted
+
+
+def incremental_vacuum(pages=None, engine=None):
+    """Return free pages to the filesystem (SQLite with auto_vacuum=INCREMENTAL only)"""
+    engine = engine or ENGINE
+    if engine.dialect.name != 'sqlite':
+        return False
+    with engine.connect() as conn:
+        mode = conn.execute(text("PRAGMA auto_vacuum")).scalar()
+        if mode != 2:
+            logger.info("auto_vacuum is not INCREMENTAL; run 'PRAGMA auto_vacuum=INCREMENTAL; VACUUM;' once to enable it")
+            return False
+        pragma = f"PRAGMA incremental_vacuum({int(pages)})" if pages else "PRAGMA incremental_vacuum"
+        result = conn.exec_driver_sql(pragma)
+        if result.returns_rows:
+            result.fetchall()
+    return True
+
+
+def archive_campaign(campaign_id, fmt=None, archive_dir=None, batch_size=None):
+    """
+    Archive and prune the raw tracking rows of one campaign.
+
+    Returns a dict with the archived row counts, or None if the campaign has
+    no raw rows left.
+    """
+    fmt = _archive_format(fmt)
+    archive_dir = os.path.join(archive_dir or ARCHIVE_DIR, campaign_id)
+    batch_size = batch_size or Config.RETENTION_DELETE_BATCH
+
+    _ensure_rollups(campaign_id)
+    os.makedirs(archive_dir, exist_ok=True)
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+    extension = 'parquet' if fmt == 'parquet' else 'jsonl.gz'
+
+    tracking_table = EmailTracking.__table__
+    click_table = EmailClick.__table__
+    campaign_tracking_ids = select(tracking_table.c.tracking_id).where(
+        tracking_table.c.campaign_id == campaign_id
+    )
+    exports = (
+        ('email_tracking', tracking_table, tracking_table.c.campaign_id == campaign_id),
+        ('email_clicks', click_table, click_table.c.tracking_id.in_(campaign_tracking_ids)),
+    )
+
+    summary = {}
+    with session_scope() as session:
+        for table_name, table, campaign_filter in exports:
+            path = os.path.join(archive_dir, f"{table_name}-{stamp}.{extension}")
+            count, first_created, last_created = _export_table(session, table, campaign_filter, path, fmt)
+            summary[table_name] = count
+            if count:
+                session.add(TrackingArchive(
+                    campaign_id=campaign_id,
+                    table_name=table_name,
+                    path=path,
+                    format=fmt,
+                    row_count=count,
+                    first_created_at=first_created,
+                    last_created_at=last_created,
+                ))
+
+    if not summary['email_tracking']:
+        return None
+
+    summary['deleted'] = _delete_in_batches(campaign_id, batch_size)
+    logger.info(
+        f"Archived campaign {campaign_id}: {summary['email_tracking']} tracking rows, "
+        f"{summary['email_clicks']} clicks"
+    )
+    return summary
+
+
+def apply_retention(retention_days=None, fmt=None, archive_dir=None, dry_run=False):
+    """Archive every campaign older than the retention window, then vacuum once"""
+    retention_days = retention_days if retention_days is not None else Config.TRACKING_RETENTION_DAYS
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    with session_scope() as session:
+        campaign_ids = find_expired_campaigns(session, cutoff)
+
+    if dry_run:
+        return {'campaigns': campaign_ids, 'archived': 0}
+
+    archived = 0
+    for campaign_id in campaign_ids:
+        try:
+            if archive_campaign(campaign_id, fmt=fmt, archive_dir=archive_dir):
+                archived += 1
+        except Exception as e:
+            logger.error(f"Error archiving campaign {campaign_id}: {str(e)}")
+
+    if archived:
+        incremental_vacuum()
+    return {'campaigns': campaign_ids, 'archived': archived}
+
+
+def read_archive(archive, offset=0, limit=100, recipient_email=None):
+    """Read rows back from an archive file (a ``TrackingArchive`` record)"""
+    recipient_email = recipient_email.lower() if recipient_email else None
+
+    def matches(row):
+        return recipient_email is None or (row.get('recipient_email') or '').lower() == recipient_email
+
+    rows = []
+    skipped = 0
+    if archive.format == 'parquet':
+        if not PARQUET_AVAILABLE:
+            raise RuntimeError("pyarrow is required to read Parquet archives")
+        source = (row for batch in pq.ParquetFile(archive.path).iter_batches() for row in batch.to_pylist())
+        for row in source:
+            if not matches(row):
+                continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            rows.append({k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in row.items()})
+            if len(rows) >= limit:
+                break
+        return rows
+
+    with gzip.open(archive.path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            row = json.loads(line)
+            if not matches(row):
+                continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            rows.append(row)
+            if len(rows) >= limit:
+                break
+    return rows
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Archive and prune old tracking rows')
+    parser.add_argument('--days', type=int, default=None, help='Retention window in days')
+    parser.add_argument('--format', choices=ARCHIVE_FORMATS, default=None)
+    parser.add_argument('--dry-run', action='store_true', help='Only list the campaigns that would be archived')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    print(apply_retention(retention_days=args.days, fmt=args.format, dry_run=args.dry_run))
@@ -1,21 +1,52 @@
 """
 Smart scheduling system for interview management
 """
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
+from functools import lru_cache
 from database import get_session, Candidate, Interview, TimeSlot, InterviewStatus
 import re
 import logging
 
 logger = logging.getLogger(__name__)
 
-def parse_date_string(date_str):
-    """
-    Parse date string from CSV format (e.g., "14TH NOV 2025", "15th NOV 2025")
-    Returns datetime object or None
-    """
-    if not date_str or not date_str.strip():
+# Recruiting CSVs repeat a handful of date/time strings thousands of times,
+# and find_available_slots combines the same times for every day; the
+# parsers below are memoized per distinct string.
+_MONTHS = {
+    'JAN': 1, 'FEB': 2, 'MAR': 3, 'APR': 4, 'MAY': 5, 'JUN': 6,
+    'JUL': 7, 'AUG': 8, 'SEP': 9, 'OCT': 10, 'NOV': 11, 'DEC': 12
+}
+
+# "14TH NOV 2025", "14 November 2025", "14-NOV-2025", "14/NOV/2025"
+_DAY_MONTH_YEAR_RE = re.compile(r'^(\d{1,2})(?:TH|ST|ND|RD)?([ /-])([A-Z]+)\2(\d{4})$', re.IGNORECASE)
+_CLOCK_RE = re.compile(r'^(\d{1,2}):(\d{2})$')
+
+
+def _classify_date(date_str):
+    """Fast path for the day-month-year shapes; None when the string needs the full parser"""
+    match = _DAY_MONTH_YEAR_RE.match(date_str)
+    if not match:
+        return None
+    day, separator, month_name, year = match.groups()
+    month_name = month_name.upper()
+    month = _MONTHS.get(month_name[:3])
+    if month is None:
+        return None
+    # Full month names are only accepted space-separated ("%d %B %Y")
+    if len(month_name) > 3 and (separator != ' ' or datetime(2000, month, 1).strftime('%B').upper() != month_name):
         return None
-    
+    try:
+        return datetime(int(year), month, int(day))
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_cached(date_str):
+    classified = _classify_date(date_str)
+    if classified is not None:
+        return classified
+
     try:
         # Remove ordinal suffixes (TH, ST, ND, RD)
         date_str = re.sub(r'(\d+)(TH|ST|ND|RD)', r'\1', date_str, flags=re.IGNORECASE)
@@ -35,7 +66,6 @@ def parse_date_string(date_str):
             except ValueError:
                 continue
         
-        # If all formats fail, try parsing with dateutil (if available)
         # Fallback to manual parsing
         parts = date_str.split()
         if len(parts) >= 3:
@@ -43,13 +73,8 @@ def parse_date_string(date_str):
             month_str = parts[1].upper()
             year = int(parts[2])
             
-            month_map = {
-                'JAN': 1, 'FEB': 2, 'MAR': 3, 'APR': 4, 'MAY': 5, 'JUN': 6,
-                'JUL': 7, 'AUG': 8, 'SEP': 9, 'OCT': 10, 'NOV': 11, 'DEC': 12
-            }
-            
-            if month_str in month_map:
-                return datetime(year, month_map[month_str], day)
+            if month_str in _MONTHS:
+                return datetime(year, _MONTHS[month_str], day)
         
         logger.warning(f"Could not parse date: {date_str}")
         return None
@@ -57,6 +82,36 @@ def parse_date_string(date_str):
         logger.error(f"Error parsing date '{date_str}': {str(e)}")
         return None
 
+
+def parse_date_string(date_str):
+    """
+    Parse date string from CSV format (e.g., "14TH NOV 2025", "15th NOV 2025")
+    Returns datetime object or None
+    """
+    if not date_str or not date_str.strip():
+        return None
+    return _parse_date_cached(date_str.strip())
+
+
+@lru_cache(maxsize=1024)
+def _parse_time_cached(time_str):
+    match = _CLOCK_RE.match(time_str)
+    if match:
+        hour, minute = int(match.group(1)), int(match.group(2))
+    elif ':' in time_str:
+        parts = time_str.split(':')
+        hour = int(parts[0])
+        minute = int(parts[1]) if len(parts) > 1 else 0
+    else:
+        return time_str
+
+    # Handle 12-hour format if needed
+    if hour < 9:  # Assuming interviews start at 9 AM
+        hour += 12
+
+    return f"{hour:02d}:{minute:02d}"
+
+
 def parse_time_string(time_str):
     """
     Parse time string (e.g., "9:00", "9:30", "1:00")
@@ -64,22 +119,19 @@ def parse_time_string(time_str):
     """
     if not time_str or not time_str.strip():
         return None
-    
-    time_str = time_str.strip()
-    
-    # Handle formats like "9:00", "9:30", "1:00"
-    if ':' in time_str:
-        parts = time_str.split(':')
-        hour = int(parts[0])
-        minute = int(parts[1]) if len(parts) > 1 else 0
-        
-        # Handle 12-hour format if needed
-        if hour < 9:  # Assuming interviews start at 9 AM
-            hour += 12
-        
-        return f"{hour:02d}:{minute:02d}"
-    
-    return time_str
+    return _parse_time_cached(time_str.strip())
+
+
+@lru_cache(maxsize=1024)
+def _clock_time(time_str):
+    match = _CLOCK_RE.match(time_str)
+    if match:
+        return time(int(match.group(1)), int(match.group(2)))
+    time_parts = time_str.split(':')
+    hour = int(time_parts[0])
+    minute = int(time_parts[1]) if len(time_parts) > 1 else 0
+    return time(hour, minute)
+
 
 def combine_datetime(date_obj, time_str):
     """
@@ -89,11 +141,7 @@ def combine_datetime(date_obj, time_str):
         return None
     
     try:
-        time_parts = time_str.split(':')
-        hour = int(time_parts[0])
-        minute = int(time_parts[1]) if len(time_parts) > 1 else 0
-        
-        return datetime.combine(date_obj.date(), datetime.min.time().replace(hour=hour, minute=minute))
+        return datetime.combine(date_obj.date(), _clock_time(time_str))
     except Exception as e:
         logger.error(f"Error combining datetime: {str(e)}")
         return None
@@ -111,154 +159,9 @@ def import_candidates_from_csv(csv_data):
     Import candidates and interviews from CSV data
     Returns: (imported_count, errors)
     """
-    session = get_session()
-    imported = 0
-    errors = []
-    
-    try:
-        lines = csv_data.strip().split('\n')
-        if len(lines) < 2:
-            return 0, ["CSV file must have at least a header row and one data row"]
-        
-        # Parse header
-        header = [h.strip() for h in lines[0].split(',')]
-        
-        # Map column names (case-insensitive)
-        col_map = {}
-        for i, col in enumerate(header):
-            col_upper = col.upper()
-            if 'FIRST NAME' in col_upper or 'FIRSTNAME' in col_upper:
-                col_map['first_name'] = i
-            elif 'LAST NAME' in col_upper or 'LASTNAME' in col_upper:
-                col_map['last_name'] = i
-            elif 'EMAIL' in col_upper and 'ADDRESS' in col_upper:
-                col_map['email'] = i
-            elif 'PHONE' in col_upper:
-                col_map['phone'] = i
-            elif 'STATUS' in col_upper:
-                col_map['status'] = i
-            elif 'DATE' in col_upper and 'DAY' not in col_upper:
-                col_map['date'] = i
-            elif 'DAY' in col_upper and 'INTERVIEW' in col_upper:
-                col_map['day'] = i
-            elif 'TIME' in col_upper:
-                col_map['time'] = i
-        
-        # Process data rows
-        for row_num, line in enumerate(lines[1:], start=2):
-            if not line.strip():
-                continue
-            
-            values = [v.strip() for v in line.split(',')]
-            
-            # Skip empty rows
-            if not any(values):
-                continue
-            
-            # Extract data
-            first_name = values[col_map.get('first_name', 0)] if col_map.get('first_name') is not None else ''
-            last_name = values[col_map.get('last_name', 1)] if col_map.get('last_name') is not None else ''
-            email = values[col_map.get('email', 3)] if col_map.get('email') is not None else ''
-            phone = values[col_map.get('phone', 2)] if col_map.get('phone') is not None else ''
-            status = values[col_map.get('status', 4)] if col_map.get('status') is not None else ''
-            date_str = values[col_map.get('date', 5)] if col_map.get('date') is not None else ''
-            day_str = values[col_map.get('day', 6)] if col_map.get('day') is not None else ''
-            time_str = values[col_map.get('time', 7)] if col_map.get('time') is not None else ''
-            
-            # Skip if no email (required)
-            email = normalize_email(email)
-            if not email:
-                errors.append(f"Row {row_num}: Missing email address")
-                continue
-            
-            # Skip if no name
-            if not first_name and not last_name:
-                errors.append(f"Row {row_num}: Missing name")
-                continue
-            
-            try:
-                with session.begin_nested():
-                    # Find or create candidate
-                    candidate = session.query(Candidate).filter_by(email=email).first()
-                    if not candidate:
-                        candidate = Candidate(
-                            first_name=first_name or 'Unknown',
-                            last_name=last_name or '',
-                            email=email,
-                            phone=phone,
-                            country='US', # Default to US for imports, or could infer
-                            status=status
-                        )
-                        session.add(candidate)
-                        session.flush()  # Get candidate ID
-                    else:
-                        # Update existing candidate if needed
-                        # Only update fields that are missing or empty, don't overwrite user changes
-                        if first_name and not candidate.first_name:
-                            candidate.first_name = first_name
-                        if last_name and not candidate.last_name:
-                            candidate.last_name = last_name
-                        if phone and not candidate.phone:
-                            candidate.phone = phone
-                        # Candidate status removed - status is now only on interviews
-                    
-                    # Create interview if date/time provided
-                    if date_str or time_str:
-                        interview_date = parse_date_string(date_str)
-                        interview_time = parse_time_string(time_str)
-                        
-                        if interview_date and interview_time:
-                            interview_datetime = combine_datetime(interview_date, interview_time)
-                            
-                            if interview_datetime:
-                                # Check if interview already exists
-                                existing = session.query(Interview).filter_by(
-                                    candidate_id=candidate.id,
-                                    interview_date=interview_datetime
-                                ).first()
-                                
-                                if not existing:
-                                    interview_status = InterviewStatus.CONFIRMED.value if status and 'confirmed' in status.lower() else InterviewStatus.PENDING.value
-                                    
-                                    interview = Interview(
-                                        candidate_id=candidate.id,
-                                        interview_date=interview_datetime,
-                                        interview_time=interview_time,
-                                        day_of_week=day_str,
-                                        status=interview_status,
-                                        notes=status if status and 'reschedule' in status.lower() else None
-                                    )
-                                    session.add(interview)
-                                    imported += 1
-                                else:
-                                    # Update existing interview
-                                    if status and 'confirmed' in status.lower():
-                                        existing.status = InterviewStatus.CONFIRMED.value
-                                    if day_str:
-                                        existing.day_of_week = day_str
-                                    if interview_time:
-                                        existing.interview_time = interview_time
-                        elif interview_date:
-                            # Date only, no time
-                            errors.append(f"Row {row_num}: Date provided but time is missing or invalid")
-                    else:
-                        # No interview data, just candidate
-                        imported += 1
-                
-            except Exception as e:
-                errors.append(f"Row {row_num}: {str(e)}")
-                logger.error(f"Error processing row {row_num}: {str(e)}")
-                continue
-        
-        session.commit()
-        return imported, errors
-    
-    except Exception as e:
-        session.rollback()
-        logger.error(f"Error importing CSV: {str(e)}")
-        return 0, [f"Import failed: {str(e)}"]
-    finally:
-        session.close()
+    # Set-based pipeline: a few chunked queries instead of two per row
+    from csv_import import import_candidates_from_csv as bulk_import
+    return bulk_import(csv_data)
 
 def check_scheduling_conflict(candidate_id, interview_datetime, exclude_interview_id=None, session=None):
     """
@@ -329,7 +232,8 @@ def find_available_slots(start_date, end_date, preferred_times=None, exclude_can
         
         # 1. Fetch ALL interviews in the date range (Active only)
         # Note: We query a bit wider to be safe, or exact range
-        existing_interviews = session.query(Interview).filter(
+        # Only the columns ix_interviews_date_status_candidate covers
+        existing_interviews = session.query(Interview.interview_date, Interview.candidate_id).filter(
             Interview.interview_date >= start_date,
             Interview.interview_date <= end_date,
             Interview.status != InterviewStatus.CANCELLED.value
@@ -3,9 +3,8 @@ API endpoints for candidate and interview scheduling management
 """
 from flask import Blueprint, request, jsonify
 from datetime import datetime, timedelta
-from sqlalchemy import func, or_
 from database import (
-    get_session, Candidate, Interview, TimeSlot, InterviewStatus,
+    get_session, Candidate, DedupJob, ImportJob, Interview, TimeSlot, InterviewStatus,
     init_db
 )
 from scheduler import (
@@ -19,6 +18,15 @@ from scheduler import (
     normalize_email,
 )
 from services.scheduling_service import schedule_interview_for_candidate
+from search_index import apply_candidate_search
+from count_cache import TOTAL_MODES, list_total
+from serializers import serialize_candidates, serialize_interviews, group_by_date
+from loading import load_policy
+from dedup import create_dedup_job, merge_clusters
+from config import Config
+from csv_import import UploadTooLarge, create_import_job
+from exports import CANDIDATE_COLUMNS, INTERVIEW_COLUMNS, export_format, export_response
+from pagination import CANDIDATES_BY_NAME, INTERVIEWS_BY_DATE, InvalidCursor, keyset_page, page_size
 from functools import wraps
 import logging
 
@@ -54,6 +62,277 @@ def import_candidates():
         logger.error(f"Error importing candidates: {str(e)}")
         return jsonify({'error': f'Import failed: {str(e)}'}), 500
 
+@scheduling_bp.route('/api/candidates/import-jobs', methods=['POST'])
+@require_auth
+def create_import_job_endpoint():
+    """
+    Start a background CSV import. Accepts a multipart upload (``file``
+    field) or the raw CSV as the request body.
+    """
+    try:
+        from tasks import import_job_task
+
+        # Reject before Werkzeug spools a multipart body to disk; a raw body
+        # without Content-Length is capped while save_upload copies it
+        max_bytes = Config.IMPORT_UPLOAD_MAX_BYTES
+        if request.content_length is not None and request.content_length > max_bytes:
+            return jsonify({'error': f'File exceeds the {max_bytes} byte upload limit'}), 413
+        if request.mimetype == 'multipart/form-data':
+            if request.content_length is None:
+                return jsonify({'error': 'Content-Length required for multipart uploads'}), 411
+            upload = request.files.get('file')
+            if upload is None:
+                return jsonify({'error': 'CSV file required'}), 400
+            job = create_import_job(upload.stream, upload.filename)
+        elif request.content_length or request.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            job = create_import_job(request.stream, request.args.get('filename'))
+        else:
+            return jsonify({'error': 'CSV file required'}), 400
+
+        import_job_task.delay(job['id'])
+        return jsonify({'success': True, 'job': job}), 202
+    except UploadTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    except Exception as e:
+        logger.error(f"Error creating import job: {str(e)}")
+        return jsonify({'error': f'Import failed: {str(e)}'}), 500
+
+
+@scheduling_bp.route('/api/candidates/import-jobs/<job_id>', methods=['GET'])
+@require_auth
+def get_import_job(job_id):
+    """Import job progress and a page of its row errors (?errors_offset, ?errors_limit)"""
+    session = get_session()
+    try:
+        job = session.get(ImportJob, job_id)
+        if not job:
+            return jsonify({'error': 'Import job not found'}), 404
+        offset = max(int(request.args.get('errors_offset', 0)), 0)
+        limit = page_size(int(request.args.get('errors_limit', 100)))
+        errors = job.error_list()
+        return jsonify({
+            'success': True,
+            'job': job.to_dict(),
+            'errors': errors[offset:offset + limit],
+            'errors_truncated': (job.error_count or 0) > len(errors),
+        })
+    except ValueError:
+        return jsonify({'error': 'errors_offset and errors_limit must be integers'}), 400
+    except Exception as e:
+        logger.error(f"Error getting import job {job_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    finally:
+        session.close()
+
+
+@scheduling_bp.route('/api/candidates/export', methods=['GET'])
+@require_auth
+def export_candidates():
+    """Stream candidates as CSV or XLSX (?format=); same filters as /api/candidates"""
+    session = get_session()
+    try:
+        fmt = export_format(request.args.get('format'))
+        query, rank, _ = _filter_candidates(session.query(Candidate))
+        query = query.order_by(rank, Candidate.id) if rank is not None else query.order_by(Candidate.id)
+        return export_response(session, query, CANDIDATE_COLUMNS, fmt, 'candidates')
+    except ValueError as e:
+        session.close()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        session.close()
+        logger.error(f"Error exporting candidates: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@scheduling_bp.route('/api/interviews/export', methods=['GET'])
+@require_auth
+def export_interviews():
+    """Stream interviews with their candidate as CSV or XLSX (?format=); same filters as /api/interviews"""
+    session = get_session()
+    try:
+        fmt = export_format(request.args.get('format'))
+        query, _ = _filter_interviews(session.query(Interview))
+        query = query.outerjoin(Candidate, Interview.candidate_id == Candidate.id).order_by(
+            Interview.interview_date, Interview.id
+        )
+        return export_response(session, query, INTERVIEW_COLUMNS, fmt, 'interviews')
+    except ValueError as e:
+        session.close()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        session.close()
+        logger.error(f"Error exporting interviews: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@scheduling_bp.route('/api/candidates/duplicates', methods=['POST'])
+@require_auth
+def find_duplicate_candidates():
+    """Start a background search for likely duplicate candidates"""
+    try:
+        from tasks import dedup_job_task
+
+        job = create_dedup_job()
+        dedup_job_task.delay(job['id'])
+        return jsonify({'success': True, 'job': job}), 202
+    except Exception as e:
+        logger.error(f"Error creating dedup job: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@scheduling_bp.route('/api/candidates/duplicates/<job_id>', methods=['GET'])
+@require_auth
+def get_duplicate_candidates(job_id):
+    """Dedup job status and a page of the clusters it found (?offset, ?limit)"""
+    session = get_session()
+    try:
+        job = session.get(DedupJob, job_id)
+        if not job:
+            return jsonify({'error': 'Dedup job not found'}), 404
+        offset = max(int(request.args.get('offset', 0)), 0)
+        limit = page_size(int(request.args.get('limit', 50)))
+        return jsonify({
+            'success': True,
+            'job': job.to_dict(),
+            'clusters': job.cluster_list()[offset:offset + limit],
+        })
+    except ValueError:
+        return jsonify({'error': 'offset and limit must be integers'}), 400
+    except Exception as e:
+        logger.error(f"Error getting dedup job {job_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    finally:
+        session.close()
+
+
+@scheduling_bp.route('/api/candidates/merge', methods=['POST'])
+@require_auth
+def merge_duplicate_candidates():
+    """
+    Merge duplicates into their survivor. Body: ``{"clusters": [{"survivor_id",
+    "duplicate_ids"}]}``, or ``{"all": true}`` to find and merge every cluster
+    in a background job (poll ``/api/candidates/duplicates/<job_id>``).
+    """
+    try:
+        data = request.json or {}
+        if data.get('all'):
+            from tasks import dedup_job_task
+
+            job = create_dedup_job(merge=True)
+            dedup_job_task.delay(job['id'])
+            return jsonify({'success': True, 'job': job}), 202
+        if not data.get('clusters'):
+            return jsonify({'error': 'clusters or all required'}), 400
+        result = merge_clusters(data['clusters'])
+        return jsonify({'success': True, **result})
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid clusters: {str(e)}'}), 400
+    except Exception as e:
+        logger.error(f"Error merging candidates: {str(e)}")
+        return jsonify({'error': f'Merge failed: {str(e)}'}), 500
+
+
+def _filter_candidates(query):
+    """
+    Apply the candidate list filters (?search, ?country) from the request.
+    Returns ``(query, rank, count_filters)``.
+    """
+    search = request.args.get('search', '').strip()
+    country = request.args.get('country', '').strip()
+    
+    # Full-text index; every search term must match
+    query, rank = apply_candidate_search(query, search)
+    count_filters = {'search': ' '.join(search.lower().split()), 'country': country}
+    
+    if country:
+        query = query.filter(Candidate.country == country)
+    
+    # Status filtering removed - use interview status instead
+    return query, rank, count_filters
+
+
+def _filter_interviews(query):
+    """
+    Apply the interview list filters (?candidate_id, ?start_date, ?end_date,
+    ?status) from the request. Returns ``(query, count_filters)``; the
+    count filters mirror the applied filters for the count cache.
+    """
+    candidate_id = request.args.get('candidate_id', type=int)
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    status = request.args.get('status')
+    
+    count_filters = {}
+    if candidate_id:
+        query = query.filter(Interview.candidate_id == candidate_id)
+        count_filters['candidate_id'] = candidate_id
+    
+    if start_date:
+        try:
+            start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
+            query = query.filter(Interview.interview_date >= start_dt)
+            count_filters['start_date'] = start_dt
+        except:
+            pass
+    
+    if end_date:
+        try:
+            end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
+            query = query.filter(Interview.interview_date <= end_dt)
+            count_filters['end_date'] = end_dt
+        except:
+            pass
+    
+    if status:
+        query = query.filter(Interview.status == status)
+        count_filters['status'] = status
+    return query, count_filters
+
+
+def _total_mode(default):
+    """?total=exact|estimate|none (?include_total=1 is shorthand for exact)"""
+    mode = request.args.get('total')
+    if mode is None:
+        if request.args.get('include_total', '0').lower() in {'1', 'true', 'yes'}:
+            return 'exact'
+        return default
+    mode = mode.lower()
+    if mode not in TOTAL_MODES:
+        raise ValueError(f"total must be one of: {', '.join(TOTAL_MODES)}")
+    return mode
+
+
+def _add_total(response, query, model, count_filters, mode):
+    total, estimated = list_total(query, model, count_filters, mode)
+    if mode != 'none':
+        response['total'] = total
+    if estimated:
+        response['total_estimated'] = True
+    return response
+
+
+def _keyset_response(name, query, key, limit, fetch, model, count_filters):
+    """
+    One page of a listing in keyset mode. No total is computed unless asked
+    for with ?total= or ?include_total=1.
+    """
+    try:
+        total_mode = _total_mode('none')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        rows, next_cursor = keyset_page(query, key, request.args.get('cursor') or None, limit, fetch)
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    
+    response = {
+        'success': True,
+        name: rows,
+        'limit': page_size(limit),
+        'next_cursor': next_cursor
+    }
+    return jsonify(_add_total(response, query, model, count_filters, total_mode))
+
 @scheduling_bp.route('/api/candidates', methods=['GET'])
 @require_auth
 def get_candidates():
@@ -78,27 +357,21 @@ def get_candidates():
             },
         )
         
-        query = session.query(Candidate)
-        
-        # Apply filters
-        if search:
-            query = query.filter(
-                or_(
-                    Candidate.first_name.ilike(f'%{search}%'),
-                    Candidate.last_name.ilike(f'%{search}%'),
-                    Candidate.email.ilike(f'%{search}%'),
-                    func.concat(Candidate.first_name, ' ', Candidate.last_name).ilike(f'%{search}%')
-                )
-            )
-        
-        # Apply country filter if provided
-        if country:
-            query = query.filter(Candidate.country == country)
+        query, rank, count_filters = _filter_candidates(session.query(Candidate))
         
-        # Status filtering removed - use interview status instead
+        # Keyset pagination: ?cursor= (empty for the first page), ordered by (last_name, id)
+        if 'cursor' in request.args:
+            return _keyset_response(
+                'candidates', query, CANDIDATES_BY_NAME, limit, serialize_candidates,
+                Candidate, count_filters
+            )
         
-        # Get total count
-        total = query.count()
+        # Get total count (cached per filter set; ?total=estimate|none for large tables)
+        try:
+            total_mode = _total_mode('exact')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        total, total_estimated = list_total(query, Candidate, count_filters, total_mode)
         logger.debug(
             "Get candidates results",
             extra={
@@ -107,19 +380,24 @@ def get_candidates():
             },
         )
         
+        # Best matches first; id keeps pages stable
+        if rank is not None:
+            query = query.order_by(rank, Candidate.id)
+        
         # Apply pagination
         if limit:
             query = query.limit(limit).offset(offset)
         
-        candidates = query.all()
-        
-        return jsonify({
+        response = {
             'success': True,
-            'candidates': [c.to_dict() for c in candidates],
+            'candidates': serialize_candidates(query),
             'total': total,
             'limit': limit,
             'offset': offset
-        })
+        }
+        if total_estimated:
+            response['total_estimated'] = True
+        return jsonify(response)
     
     except Exception as e:
         logger.error(f"Error fetching candidates: {str(e)}")
@@ -293,59 +571,44 @@ def get_interviews():
     try:
         session = get_session()
         
-        # Query parameters
-        candidate_id = request.args.get('candidate_id', type=int)
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
-        status = request.args.get('status')
+        # Query parameters (filters: see _filter_interviews)
         limit = request.args.get('limit', type=int)
         offset = request.args.get('offset', 0, type=int)
         
-        from sqlalchemy.orm import joinedload
-        query = session.query(Interview).options(
-            joinedload(Interview.candidate)
-        )
-        
-        # Apply filters
-        if candidate_id:
-            query = query.filter(Interview.candidate_id == candidate_id)
-        
-        if start_date:
-            try:
-                start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-                query = query.filter(Interview.interview_date >= start_dt)
-            except:
-                pass
-        
-        if end_date:
-            try:
-                end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-                query = query.filter(Interview.interview_date <= end_dt)
-            except:
-                pass
+        # Candidates are joined in by serialize_interviews
+        query, count_filters = _filter_interviews(session.query(Interview))
         
-        if status:
-            query = query.filter(Interview.status == status)
+        # Keyset pagination: ?cursor= (empty for the first page), ordered by (interview_date, id)
+        if 'cursor' in request.args:
+            return _keyset_response(
+                'interviews', query, INTERVIEWS_BY_DATE, limit, serialize_interviews,
+                Interview, count_filters
+            )
         
-        # Get total count
-        total = query.count()
+        # Get total count (cached per filter set; ?total=estimate|none for large tables)
+        try:
+            total_mode = _total_mode('exact')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        total, total_estimated = list_total(query, Interview, count_filters, total_mode)
         
-        # Order by date
-        query = query.order_by(Interview.interview_date)
+        # Order by date (id breaks ties so offset pages don't overlap)
+        query = query.order_by(Interview.interview_date, Interview.id)
         
         # Apply pagination
         if limit:
             query = query.limit(limit).offset(offset)
         
-        interviews = query.all()
-        
-        return jsonify({
+        response = {
             'success': True,
-            'interviews': [i.to_dict() for i in interviews],
+            'interviews': serialize_interviews(query),
             'total': total,
             'limit': limit,
             'offset': offset
-        })
+        }
+        if total_estimated:
+            response['total_estimated'] = True
+        return jsonify(response)
     
     except Exception as e:
         logger.error(f"Error fetching interviews: {str(e)}")
@@ -359,9 +622,8 @@ def get_interview(interview_id):
     """Get a specific interview by ID"""
     try:
         session = get_session()
-        from sqlalchemy.orm import joinedload
         interview = session.query(Interview).options(
-            joinedload(Interview.candidate)
+            *load_policy('interview.to_dict')
         ).filter_by(id=interview_id).first()
         
         if not interview:
@@ -616,26 +878,15 @@ def get_calendar_view():
                 end_date = start_date + timedelta(days=30)
         
         session = get_session()
-        from sqlalchemy.orm import joinedload
-        interviews = session.query(Interview).options(
-            joinedload(Interview.candidate)
-        ).filter(
-            Interview.interview_date >= start_date,
-            Interview.interview_date <= end_date
-        ).order_by(Interview.interview_date).all()
+        interviews = serialize_interviews(
+            session.query(Interview).filter(
+                Interview.interview_date >= start_date,
+                Interview.interview_date <= end_date
+            ).order_by(Interview.interview_date, Interview.id)
+        )
         
         # Group by date
-        calendar = {}
-        for interview in interviews:
-            date_key = interview.interview_date.date().isoformat()
-            if date_key not in calendar:
-                calendar[date_key] = []
-            # Ensure candidate data is fresh from database
-            interview_dict = interview.to_dict()
-            # Verify candidate status is included
-            if interview_dict.get('candidate') and interview_dict['candidate'].get('status'):
-                logger.debug(f"Interview {interview.id}: Candidate status = '{interview_dict['candidate']['status']}'")
-            calendar[date_key].append(interview_dict)
+        calendar = group_by_date(interviews)
         
         return jsonify({
             'success': True,
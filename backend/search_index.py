@@ -0,0 +1,225 @@
+"""
+Full-text search index for candidates.
+
+On SQLite the ``candidates`` table is shadowed by an FTS5 external-content
+table using the trigram tokenizer, kept in sync by triggers. Trigram
+matching finds any substring of three or more characters (like
+``ILIKE '%term%'``) but through an index, and results can be ranked with
+bm25. Terms shorter than three characters cannot be matched by trigrams and
+fall back to ``LIKE``, as does everything on databases without FTS5.
+
+On PostgreSQL the searched columns get ``pg_trgm`` GIN indexes instead,
+which the planner uses for ``ILIKE '%term%'`` directly; results are ranked
+by trigram word similarity. Without the extension search is plain ILIKE.
+"""
+import logging
+
+from sqlalchemy import Float, Integer, and_, func, or_, text
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+from database import Candidate
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'candidates_fts'
+SEARCH_COLUMNS = ('first_name', 'last_name', 'email', 'phone', 'notes')
+# bm25 weights, in SEARCH_COLUMNS order: a name hit outranks a hit in the notes
+RANK_WEIGHTS = (10.0, 10.0, 5.0, 2.0, 1.0)
+MIN_TRIGRAM_LENGTH = 3
+
+_COLUMN_LIST = ', '.join(SEARCH_COLUMNS)
+_NEW_VALUES = ', '.join(f'new.{c}' for c in SEARCH_COLUMNS)
+_OLD_VALUES = ', '.join(f'old.{c}' for c in SEARCH_COLUMNS)
+
+CREATE_FTS_TABLE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{_COLUMN_LIST}, content='candidates', content_rowid='id', tokenize='trigram')"
+)
+
+CREATE_TRIGGERS = (
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON candidates BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {_COLUMN_LIST}) VALUES (new.id, {_NEW_VALUES});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON candidates BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLUMN_LIST}) VALUES ('delete', old.id, {_OLD_VALUES});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {_COLUMN_LIST} ON candidates BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLUMN_LIST}) VALUES ('delete', old.id, {_OLD_VALUES});
+        INSERT INTO {FTS_TABLE}(rowid, {_COLUMN_LIST}) VALUES (new.id, {_NEW_VALUES});
+    END""",
+)
+
+BACKEND_FTS5 = 'fts5'
+BACKEND_PG_TRGM = 'pg_trgm'
+
+# Search backend in use (or None for plain LIKE), per database URL
+_available = {}
+
+
+def _trgm_index_name(column):
+    return f"ix_candidates_{column}_trgm"
+
+
+def ensure_search_index(engine):
+    """
+    Create the search index if missing: FTS5 table and triggers on SQLite,
+    pg_trgm GIN indexes on PostgreSQL.
+
+    A newly created FTS5 index is populated from the existing rows. Returns
+    whether an index is usable.
+    """
+    key = str(engine.url)
+    if engine.dialect.name == 'postgresql':
+        _available[key] = _ensure_pg_trgm(engine)
+        return _available[key] is not None
+    if engine.dialect.name != 'sqlite':
+        _available[key] = None
+        return False
+
+    try:
+        with engine.begin() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': FTS_TABLE}
+            ).first()
+            conn.exec_driver_sql(CREATE_FTS_TABLE)
+            for trigger in CREATE_TRIGGERS:
+                conn.exec_driver_sql(trigger)
+            if not exists:
+                conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+                logger.info("Built candidate search index")
+    except OperationalError as e:
+        # SQLite builds without FTS5 or older than 3.34 (no trigram tokenizer)
+        logger.warning(f"Candidate search index unavailable, using LIKE search: {str(e)}")
+        _available[key] = None
+        return False
+
+    _available[key] = BACKEND_FTS5
+    return True
+
+
+def _ensure_pg_trgm(engine):
+    try:
+        with engine.begin() as conn:
+            conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except DBAPIError as e:
+        # Creating extensions needs elevated privileges; it may already exist
+        logger.info(f"Could not create pg_trgm extension: {str(e)}")
+
+    try:
+        with engine.begin() as conn:
+            for column in SEARCH_COLUMNS:
+                conn.exec_driver_sql(
+                    f"CREATE INDEX IF NOT EXISTS {_trgm_index_name(column)} "
+                    f"ON candidates USING gin ({column} gin_trgm_ops)"
+                )
+    except DBAPIError as e:
+        logger.warning(f"pg_trgm unavailable, using unindexed ILIKE search: {str(e)}")
+        return None
+    return BACKEND_PG_TRGM
+
+
+def rebuild_search_index(engine):
+    """Re-index every candidate (e.g. after bulk writes that bypassed the triggers)"""
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def search_backend(bind):
+    """BACKEND_FTS5, BACKEND_PG_TRGM or None for the database behind ``bind``"""
+    key = str(bind.engine.url)
+    if key not in _available:
+        dialect = bind.dialect.name
+        backend = None
+        with bind.engine.connect() as conn:
+            if dialect == 'sqlite':
+                found = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {'name': FTS_TABLE}
+                ).first()
+                backend = BACKEND_FTS5 if found else None
+            elif dialect == 'postgresql':
+                found = conn.execute(
+                    text("SELECT 1 FROM pg_indexes WHERE indexname = :name"),
+                    {'name': _trgm_index_name(SEARCH_COLUMNS[0])}
+                ).first()
+                backend = BACKEND_PG_TRGM if found else None
+        _available[key] = backend
+    return _available[key]
+
+
+def search_index_available(bind):
+    return search_backend(bind) is not None
+
+
+def _quote(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _split_criteria(search, fields):
+    """(columns, term) pairs: ``search`` terms match any column, ``fields`` only their own"""
+    criteria = [(SEARCH_COLUMNS, term) for term in (search or '').split()]
+    for column, value in fields.items():
+        if column not in SEARCH_COLUMNS:
+            raise ValueError(f"Unknown search column: {column}")
+        if value:
+            criteria.extend(((column,), term) for term in str(value).split())
+    return criteria
+
+
+def match_expression(criteria):
+    """FTS5 MATCH string requiring every (columns, term) criterion"""
+    parts = []
+    for columns, term in criteria:
+        prefix = '' if columns == SEARCH_COLUMNS else '{' + ' '.join(columns) + '} : '
+        parts.append(prefix + _quote(term))
+    return ' AND '.join(parts)
+
+
+def apply_candidate_search(query, search=None, **fields):
+    """
+    Restrict a ``Candidate`` query to rows matching every search term.
+
+    ``search`` terms may match any indexed column; keyword arguments
+    (``first_name``, ``email``, ...) restrict their terms to one column.
+    Returns ``(query, rank)`` where ``rank`` is a bm25 column to order by
+    (lower is better), or None when the search could not use the index.
+    """
+    criteria = _split_criteria(search, fields)
+    if not criteria:
+        return query, None
+
+    backend = search_backend(query.session.get_bind())
+    indexed = [c for c in criteria if backend and len(c[1]) >= MIN_TRIGRAM_LENGTH]
+    rank = None
+
+    if backend == BACKEND_FTS5 and indexed:
+        matches = text(
+            f"SELECT rowid AS candidate_id, bm25({FTS_TABLE}, {', '.join(map(str, RANK_WEIGHTS))}) AS rank "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+        ).bindparams(match=match_expression(indexed)).columns(candidate_id=Integer, rank=Float).subquery()
+        query = query.join(matches, matches.c.candidate_id == Candidate.id)
+        rank = matches.c.rank
+        unindexed = [c for c in criteria if c not in indexed]
+    else:
+        # PostgreSQL: the trigram GIN indexes serve ILIKE itself
+        unindexed = criteria
+        if backend == BACKEND_PG_TRGM and indexed:
+            weights = dict(zip(SEARCH_COLUMNS, RANK_WEIGHTS))
+            similarity = [
+                func.greatest(*[
+                    func.word_similarity(term, func.coalesce(getattr(Candidate, column), '')) * weights[column]
+                    for column in columns
+                ])
+                for columns, term in indexed
+            ]
+            # Negated so that, as with bm25, lower sorts first
+            rank = -sum(similarity[1:], similarity[0])
+
+    if unindexed:
+        query = query.filter(and_(*[
+            or_(*[getattr(Candidate, column).ilike(f'%{term}%') for column in columns])
+            for columns, term in unindexed
+        ]))
+
+    return query, rank
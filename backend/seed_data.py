@@ -1,12 +1,25 @@
+"""
+Seed data.
+
+``seed_database`` wipes the candidate tables and creates a small demo set
+with Faker. ``seed_scale`` generates scale-test data instead (see below).
+"""
+import bisect
+import json
+import math
 import random
+import uuid
 from datetime import datetime, timedelta
-from faker import Faker
-from database import get_session, Candidate, Interview, InterviewStatus
 
-fake_us = Faker('en_US')
-fake_uk = Faker('en_GB')
+from sqlalchemy import Column, MetaData, String, Table, Text, create_engine, func, select
+
+from database import Base, get_session, Candidate, EmailTracking, Interview, InterviewStatus
 
 def seed_database():
+    from faker import Faker
+
+    fake_us = Faker('en_US')
+    fake_uk = Faker('en_GB')
     session = get_session()
     print("--- Seeding Database ---")
     
@@ -97,5 +110,390 @@ def seed_database():
     finally:
         session.close()
 
+
+
+# --- Scale-test data ------------------------------------------------------
+#
+# ``seed_scale`` fills a database with up to millions of candidates,
+# interviews and tracking rows:
+#
+# - Deterministic: row ``n`` of a table depends only on the seed, ``n`` and
+#   the chunk size, so the same parameters always give the same database.
+#   A candidate's identity (name, email, country, signup time) is a pure
+#   function of its id, which lets interviews and tracking rows refer to
+#   candidates without reading them back.
+# - Bulk: rows are written ``SEED_CHUNK_ROWS`` at a time with executemany on
+#   SQLite and ``COPY`` on PostgreSQL, one transaction per chunk.
+# - Resumable: ids are assigned by the generator and every chunk commits on
+#   its own, so a rerun continues after the highest id in each table. The
+#   parameters are recorded in ``scale_seed`` and a rerun with different
+#   ones is refused.
+#
+# Distributions: Zipf-like first/last names, a few dominant email domains,
+# signups growing over two years, a heavy-tailed number of interview rounds
+# per candidate on weekday half-hour slots with date-dependent statuses,
+# campaigns of log-normal size with an open/click funnel.
+
+SCALE_DEFAULTS = {'candidates': 1_000_000, 'interviews': 5_000_000, 'tracking': 50_000_000}
+SEED_CHUNK_ROWS = 50_000
+SEED_ANCHOR = datetime(2030, 1, 1)  # "now" for the generated data
+_SIGNUP_SPAN = timedelta(days=730)
+_MASK64 = (1 << 64) - 1
+
+_manifest = Table(
+    'scale_seed', MetaData(),
+    Column('name', String(50), primary_key=True),
+    Column('value', Text, nullable=False),
+)
+
+_FIRST_NAMES = (
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth',
+    'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Carlos', 'Karen',
+    'Daniel', 'Priya', 'Matthew', 'Nancy', 'Anthony', 'Lisa', 'Mark', 'Aisha', 'Oliver', 'Emily',
+    'Wei', 'Sofia', 'Ahmed', 'Chloe', 'Lukas', 'Hannah', 'Rahul', 'Grace', 'Mateo', 'Amara',
+)
+_LAST_NAMES = (
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+    'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
+    'Lee', 'Patel', 'Thompson', 'White', 'Harris', 'Sanchez', 'Clark', 'Ramirez', 'Lewis', 'Robinson',
+    'Walker', 'Young', 'Allen', 'King', 'Wright', 'Scott', 'Nguyen', 'Hill', 'Flores', 'Green',
+    'Khan', 'Singh', 'Evans', 'Murphy', 'Kim', 'Chen', 'Mueller', 'Okafor', 'Silva', 'Cohen',
+)
+_DOMAINS = (('gmail.com', 40), ('yahoo.com', 12), ('outlook.com', 12), ('hotmail.com', 8), ('icloud.com', 5),
+            ('example.com', 13), ('example.org', 10))
+_COUNTRIES = (('US', 60), ('UK', 20), ('CA', 8), ('IN', 7), ('DE', 5))
+_CITIZENSHIP = {'US': 'United States', 'UK': 'United Kingdom', 'CA': 'Canada', 'IN': 'India', 'DE': 'Germany'}
+_STREETS = ('Main St', 'Oak Ave', 'Park Rd', 'High St', 'Maple Dr', 'Station Rd', 'Cedar Ln', 'Church St')
+_CITIES = {'US': ('Springfield', 'Austin', 'Riverside', 'Columbus'), 'UK': ('London', 'Manchester', 'Leeds'),
+           'CA': ('Toronto', 'Vancouver', 'Montreal'), 'IN': ('Pune', 'Bengaluru', 'Chennai'),
+           'DE': ('Berlin', 'Munich', 'Hamburg')}
+_NOTES = ('Referred by employee', 'Strong portfolio', 'Prefers mornings', 'Needs visa sponsorship',
+          'Relocating', 'Second-round candidate')
+_PAST_STATUSES = ((InterviewStatus.COMPLETED.value, 65), (InterviewStatus.CANCELLED.value, 15),
+                  (InterviewStatus.CONFIRMED.value, 10), (InterviewStatus.RESCHEDULED.value, 10))
+_FUTURE_STATUSES = ((InterviewStatus.PENDING.value, 55), (InterviewStatus.CONFIRMED.value, 40),
+                    (InterviewStatus.RESCHEDULED.value, 5))
+_CLIENT_CLASSES = (('human', 70), ('proxy', 25), ('bot', 5))
+_DEVICES = (('desktop', 45), ('mobile', 45), ('tablet', 10))
+_MAIL_CLIENTS = (('Gmail', 45), ('Apple Mail', 25), ('Outlook', 20), ('Yahoo Mail', 6), ('Thunderbird', 4))
+
+_CANDIDATE_COLUMNS = ('id', 'first_name', 'last_name', 'email', 'phone', 'country', 'address', 'citizenship',
+                      'status', 'notes', 'created_at', 'updated_at')
+_INTERVIEW_COLUMNS = ('id', 'candidate_id', 'interview_date', 'interview_time', 'day_of_week', 'status',
+                      'meet_link', 'email_sent', 'email_sent_at', 'created_at', 'updated_at')
+_TRACKING_COLUMNS = ('id', 'tracking_id', 'campaign_id', 'recipient_email', 'status', 'open_count', 'click_count',
+                     'created_at', 'opened_at', 'clicked_at', 'client_class', 'device_family', 'mail_client')
+
+
+def _hash64(seed, n):
+    """splitmix64 of (seed, n): a cheap, well-mixed per-row random number"""
+    z = (seed * 0x9E3779B97F4A7C15 + n * 0xBF58476D1CE4E5B9 + 0x94D049BB133111EB) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+def _lookup(weighted, size=1024):
+    """Table of ``size`` entries in which each value appears in proportion to its weight"""
+    total = sum(weight for _, weight in weighted)
+    table = []
+    for value, weight in weighted:
+        table.extend([value] * round(weight * size / total))
+    return tuple(table)
+
+
+def _zipf(values):
+    return _lookup([(value, 1 / (rank + 1)) for rank, value in enumerate(values)])
+
+
+_FIRST = _zipf(_FIRST_NAMES)
+_LAST = _zipf(_LAST_NAMES)
+_DOMAIN = _lookup(_DOMAINS)
+_COUNTRY = _lookup(_COUNTRIES)
+
+
+def candidate_identity(seed, candidate_id, candidates):
+    """(first_name, last_name, email, country, created_at) of generated candidate ``candidate_id``"""
+    h = _hash64(seed, candidate_id)
+    first = _FIRST[h % len(_FIRST)]
+    last = _LAST[(h >> 10) % len(_LAST)]
+    style = (h >> 20) % 3
+    local = (f"{first}.{last}", f"{first}{last}", f"{first[0]}{last}")[style].lower()
+    email = f"{local}{candidate_id}@{_DOMAIN[(h >> 22) % len(_DOMAIN)]}"
+    country = _COUNTRY[(h >> 32) % len(_COUNTRY)]
+    # Signups grow linearly over the span, so ids get denser towards SEED_ANCHOR
+    position = math.sqrt(candidate_id / max(candidates, 1))
+    jitter = timedelta(seconds=(h >> 42) % 3600)
+    created_at = SEED_ANCHOR - _SIGNUP_SPAN + _SIGNUP_SPAN * position - jitter
+    return first, last, email, country, created_at
+
+
+def _phone(rng, country):
+    if country in ('US', 'CA'):
+        return f"+1 ({rng.randint(201, 989)}) {rng.randint(200, 999)}-{rng.randint(0, 9999):04d}"
+    if country == 'UK':
+        return f"+44 7{rng.randint(100, 999)} {rng.randint(0, 999999):06d}"
+    return f"+{ {'IN': 91, 'DE': 49}[country] } {rng.randint(10000, 99999)} {rng.randint(10000, 99999)}"
+
+
+def _candidate_rows(seed, start, end, params, rng):
+    rows = []
+    for candidate_id in range(start, end):
+        first, last, email, country, created_at = candidate_identity(seed, candidate_id, params['candidates'])
+        rows.append((
+            candidate_id, first, last, email,
+            _phone(rng, country) if rng.random() < 0.9 else None,
+            country,
+            f"{rng.randint(1, 9999)} {rng.choice(_STREETS)}, {rng.choice(_CITIES[country])}" if rng.random() < 0.6 else None,
+            _CITIZENSHIP[country] if rng.random() < 0.8 else None,
+            rng.choice(('Confirmed', 'Pending')) if rng.random() < 0.3 else None,
+            rng.choice(_NOTES) if rng.random() < 0.2 else None,
+            created_at, created_at,
+        ))
+    return rows
+
+
+def _slot(moment):
+    """``moment`` moved to a weekday half-hour slot between 9:00 and 16:30"""
+    while moment.weekday() >= 5:
+        moment += timedelta(days=1)
+    minutes = 9 * 60 + (moment.hour * 60 + moment.minute) % (8 * 60) // 30 * 30
+    return moment.replace(hour=minutes // 60, minute=minutes % 60, second=0, microsecond=0)
+
+
+def interview_ends(seed, candidates, interviews):
+    """
+    Cumulative interview counts per candidate (``ends[c - 1]`` is the last
+    interview id of candidate ``c``): a heavy-tailed number of rounds each,
+    adding up to ``interviews``. About a third of candidates never get one.
+    """
+    weights = []
+    for c in range(1, candidates + 1):
+        h = _hash64(seed + 1, c) % 1000
+        weights.append(0 if h < 300 else min(1 / ((h - 300) / 700 + 0.05), 8))
+    scale = interviews / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    leftover = interviews - sum(counts)
+    interviewed = [i for i, weight in enumerate(weights) if weight] or list(range(candidates))
+    for i in range(leftover):
+        counts[interviewed[i * len(interviewed) // leftover]] += 1
+    ends, running = [], 0
+    for count in counts:
+        running += count
+        ends.append(running)
+    return ends
+
+
+def _interview_rows(seed, start, end, params, rng):
+    candidates, ends = params['candidates'], params['_interview_ends']
+    past, future = _lookup(_PAST_STATUSES, 100), _lookup(_FUTURE_STATUSES, 100)
+    rows = []
+    for interview_id in range(start, end):
+        index = bisect.bisect_left(ends, interview_id)
+        candidate_id = index + 1
+        interview_round = interview_id - (ends[index - 1] if index else 0) - 1
+        signed_up = candidate_identity(seed, candidate_id, candidates)[4]
+        # A week or so between rounds, so a candidate never has two at once
+        when = _slot(signed_up + timedelta(days=3 + 7 * interview_round, hours=rng.random() * 96))
+        status = rng.choice(past if when < SEED_ANCHOR else future)
+        created_at = min(signed_up + timedelta(days=7 * interview_round, hours=rng.random() * 48), when)
+        sent = status != InterviewStatus.PENDING.value
+        rows.append((
+            interview_id, candidate_id, when, when.strftime('%H:%M'), when.strftime('%A').upper(), status,
+            f"https://meet.example.com/{_hash64(seed, interview_id) % 36 ** 10:010x}" if sent else None,
+            sent, created_at if sent else None, created_at, created_at,
+        ))
+    return rows
+
+
+def campaign_sizes(seed, tracking, campaigns):
+    """Recipients per campaign: log-normal sizes adding up to ``tracking``"""
+    rng = random.Random(f"{seed}:campaigns")
+    weights = [rng.lognormvariate(0, 1) for _ in range(campaigns)]
+    total = sum(weights)
+    sizes = [int(tracking * weight / total) for weight in weights]
+    sizes[-1] += tracking - sum(sizes)
+    return sizes
+
+
+def _tracking_rows(seed, start, end, params, rng):
+    candidates, campaigns = params['candidates'], params['campaigns']
+    ends = params['_campaign_ends']
+    clients, devices, mail_clients = _lookup(_CLIENT_CLASSES, 100), _lookup(_DEVICES, 100), _lookup(_MAIL_CLIENTS, 100)
+    spacing = _SIGNUP_SPAN / 2 / max(campaigns, 1)
+    rows = []
+    for tracking_row in range(start, end):
+        campaign = bisect.bisect_left(ends, tracking_row)
+        first_row = ends[campaign - 1] + 1 if campaign else 1
+        created_at = SEED_ANCHOR - _SIGNUP_SPAN / 2 + spacing * campaign + timedelta(
+            milliseconds=20 * (tracking_row - first_row)
+        )
+        recipient = candidate_identity(seed, rng.randint(1, candidates), candidates)[2] if candidates else (
+            f"recipient{tracking_row}@example.com"
+        )
+        roll = rng.random()
+        status = 'clicked' if roll < 0.03 else 'opened' if roll < 0.25 else 'sent'
+        opened_at = clicked_at = None
+        open_count = click_count = 0
+        if status != 'sent':
+            open_count = 1 + int(rng.expovariate(1))
+            opened_at = created_at + timedelta(hours=rng.expovariate(1 / 6))
+        if status == 'clicked':
+            click_count = 1 + int(rng.expovariate(2))
+            clicked_at = opened_at + timedelta(minutes=rng.expovariate(1 / 10))
+        rows.append((
+            tracking_row, str(uuid.UUID(int=(_hash64(seed, tracking_row) << 64) | tracking_row)),
+            f"campaign-{campaign}", recipient, status, open_count, click_count, created_at, opened_at, clicked_at,
+            rng.choice(clients) if opened_at else None,
+            rng.choice(devices) if opened_at else None,
+            rng.choice(mail_clients) if opened_at else None,
+        ))
+    return rows
+
+
+_SEED_TABLES = (
+    ('candidates', Candidate.__table__, _CANDIDATE_COLUMNS, _candidate_rows),
+    ('interviews', Interview.__table__, _INTERVIEW_COLUMNS, _interview_rows),
+    ('tracking', EmailTracking.__table__, _TRACKING_COLUMNS, _tracking_rows),
+)
+
+
+def _bulk_insert(conn, table, columns, rows):
+    if conn.dialect.name == 'postgresql':
+        cursor = conn.connection.driver_connection.cursor()
+        with cursor.copy(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+    elif conn.dialect.name == 'sqlite':
+        # sqlite3's own datetime adapter drops zero microseconds; SQLAlchemy always
+        # writes them, and compares DateTime columns as text, so match its format
+        rows = [
+            tuple(value.isoformat(' ', 'microseconds') if isinstance(value, datetime) else value for value in row)
+            for row in rows
+        ]
+        placeholders = ', '.join('?' * len(columns))
+        conn.exec_driver_sql(f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+    else:
+        conn.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+
+
+def _check_manifest(conn, params):
+    recorded = conn.execute(select(_manifest.c.value).where(_manifest.c.name == 'params')).scalar()
+    if recorded is None:
+        for _, table, _, _ in _SEED_TABLES:
+            if conn.execute(select(func.count()).select_from(table)).scalar():
+                raise ValueError(f"{table.name} already has rows; scale data must go into an empty database")
+        conn.execute(_manifest.insert(), {'name': 'params', 'value': json.dumps(params, sort_keys=True)})
+    elif json.loads(recorded) != params:
+        raise ValueError(f"Database was seeded with different parameters: {recorded}")
+
+
+def seed_scale(engine, candidates=None, interviews=None, tracking=None, campaigns=None, seed=0,
+               chunk_rows=None, progress=None):
+    """
+    Generate scale-test data on ``engine``, or finish an interrupted run.
+
+    Counts default to ``SCALE_DEFAULTS``; ``campaigns`` to one per 5,000
+    tracking rows. ``progress(table, rows_done, rows_total)`` is called
+    after every committed chunk. Returns the row count per table.
+    """
+    params = {
+        'candidates': SCALE_DEFAULTS['candidates'] if candidates is None else candidates,
+        'interviews': SCALE_DEFAULTS['interviews'] if interviews is None else interviews,
+        'tracking': SCALE_DEFAULTS['tracking'] if tracking is None else tracking,
+        'seed': seed,
+        'chunk_rows': chunk_rows or SEED_CHUNK_ROWS,
+    }
+    params['campaigns'] = campaigns or max(1, params['tracking'] // 5000)
+    if params['interviews'] and not params['candidates']:
+        raise ValueError("Interviews need candidates")
+
+    Base.metadata.create_all(engine)
+    _manifest.create(engine, checkfirst=True)
+    with engine.begin() as conn:
+        _check_manifest(conn, params)
+
+    sizes = campaign_sizes(seed, params['tracking'], params['campaigns']) if params['tracking'] else []
+    campaign_ends, running = [], 0
+    for size in sizes:
+        running += size
+        campaign_ends.append(running)
+    generation = {**params, '_campaign_ends': campaign_ends, '_interview_ends': []}
+
+    chunk = params['chunk_rows']
+    counts = {}
+    for name, table, columns, generate in _SEED_TABLES:
+        total = params[name]
+        with engine.connect() as conn:
+            done = conn.execute(select(func.coalesce(func.max(table.c.id), 0))).scalar()
+        if name == 'interviews' and done < total:
+            generation['_interview_ends'] = interview_ends(seed, params['candidates'], total)
+        for start in range(done + 1, total + 1, chunk):
+            end = min(start + chunk, total + 1)
+            rng = random.Random(f"{seed}:{name}:{(start - 1) // chunk}")
+            rows = generate(seed, start, end, generation, rng)
+            with engine.begin() as conn:
+                _bulk_insert(conn, table, columns, rows)
+            if progress:
+                progress(name, end - 1, total)
+        counts[name] = total
+
+    if engine.dialect.name == 'postgresql':
+        with engine.begin() as conn:
+            for _, table, _, _ in _SEED_TABLES:
+                conn.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 0) + 1 FROM {table.name}), false)"
+                )
+    with engine.begin() as conn:
+        conn.exec_driver_sql('ANALYZE')
+    return counts
+
+
+def scale_database(path, **params):
+    """
+    Engine for a SQLite file at ``path`` holding ``seed_scale(**params)`` data.
+
+    Meant as a benchmark/test fixture: an existing file seeded with the same
+    parameters is reused (and finished if a previous run was interrupted).
+    """
+    engine = create_engine(f"sqlite:///{path}")
+    seed_scale(engine, **params)
+    return engine
+
+
 if __name__ == "__main__":
-    seed_database()
+    import argparse
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description='Seed demo data, or scale-test data with --scale')
+    parser.add_argument('--scale', action='store_true', help='Generate scale-test data (does not wipe anything)')
+    parser.add_argument('--url', help='Database URL (default: DATABASE_URL / the app database)')
+    parser.add_argument('--candidates', type=int, default=SCALE_DEFAULTS['candidates'])
+    parser.add_argument('--interviews', type=int, default=SCALE_DEFAULTS['interviews'])
+    parser.add_argument('--tracking', type=int, default=SCALE_DEFAULTS['tracking'])
+    parser.add_argument('--campaigns', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-rows', type=int, default=SEED_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    if not args.scale:
+        seed_database()
+        sys.exit(0)
+
+    from database import ENGINE
+
+    started = time.perf_counter()
+
+    def report(table, done, total):
+        elapsed = time.perf_counter() - started
+        print(f"{table:<11} {done:>11,}/{total:,}  {elapsed:8.1f}s", flush=True)
+
+    target = create_engine(args.url) if args.url else ENGINE
+    try:
+        result = seed_scale(target, args.candidates, args.interviews, args.tracking, args.campaigns,
+                            seed=args.seed, chunk_rows=args.chunk_rows, progress=report)
+    except ValueError as e:
+        sys.exit(str(e))
+    print(json.dumps(result))
@@ -0,0 +1,155 @@
+"""
+Column-projected serialization for list and calendar endpoints.
+
+``Model.to_dict()`` needs fully hydrated ORM objects (identity map, state
+tracking, relationship loading) just to copy a few attributes into a dict.
+The functions here select only the columns a response needs, as plain row
+tuples, and build the same dicts ``to_dict()`` would. Datetimes are left as
+``datetime`` objects; ``FastJSONProvider`` formats them in bulk while
+encoding (orjson does it natively), producing the same ISO 8601 strings.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+import enum
+
+from flask.json.provider import DefaultJSONProvider
+
+from database import Candidate, Interview
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+CANDIDATE_FIELDS = (
+    'id', 'first_name', 'last_name', 'email', 'phone', 'country', 'address',
+    'citizenship', 'notes', 'created_at', 'updated_at',
+)
+INTERVIEW_FIELDS = (
+    'id', 'candidate_id', 'interview_date', 'interview_time', 'day_of_week', 'status',
+    'meet_link', 'notes', 'email_sent', 'email_sent_at', 'created_at', 'updated_at',
+)
+
+_CANDIDATE_COLUMNS = tuple(getattr(Candidate, f) for f in CANDIDATE_FIELDS)
+_INTERVIEW_COLUMNS = tuple(getattr(Interview, f) for f in INTERVIEW_FIELDS)
+# Labelled so they don't clash with the interview columns in one row
+_NESTED_CANDIDATE_COLUMNS = tuple(c.label(f'candidate_{c.key}') for c in _CANDIDATE_COLUMNS)
+_INTERVIEW_WIDTH = len(INTERVIEW_FIELDS)
+
+
+def _candidate(values):
+    """Same keys as Candidate.to_dict(), from a CANDIDATE_FIELDS tuple"""
+    (id_, first_name, last_name, email, phone, country, address,
+     citizenship, notes, created_at, updated_at) = values
+    return {
+        'id': id_,
+        'first_name': first_name,
+        'last_name': last_name,
+        'full_name': f"{first_name} {last_name}",
+        'email': email,
+        'phone': phone,
+        'country': country,
+        'address': address,
+        'citizenship': citizenship,
+        'notes': notes,
+        'created_at': created_at,
+        'updated_at': updated_at,
+    }
+
+
+def _interview(row):
+    """Same keys as Interview.to_dict(), from an interview + candidate row"""
+    (id_, candidate_id, interview_date, interview_time, day_of_week, status,
+     meet_link, notes, email_sent, email_sent_at, created_at, updated_at) = row[:_INTERVIEW_WIDTH]
+    candidate_values = row[_INTERVIEW_WIDTH:]
+    return {
+        'id': id_,
+        'candidate_id': candidate_id,
+        'candidate': _candidate(candidate_values) if candidate_values[0] is not None else None,
+        'interview_date': interview_date,
+        'interview_time': interview_time,
+        'day_of_week': day_of_week,
+        'status': status,
+        'meet_link': meet_link,
+        'notes': notes,
+        'email_sent': email_sent,
+        'email_sent_at': email_sent_at,
+        'created_at': created_at,
+        'updated_at': updated_at,
+    }
+
+
+def serialize_candidates(query):
+    """Run a ``Candidate`` query (filters/order/limit kept) and return dicts"""
+    return [_candidate(row) for row in query.with_entities(*_CANDIDATE_COLUMNS)]
+
+
+def serialize_interviews(query):
+    """
+    Run an ``Interview`` query and return dicts with the candidate nested.
+
+    The candidate is fetched in the same statement through an outer join, so
+    the query must not join ``Candidate`` or carry loader options already.
+    """
+    # The join may come after limit/offset: it is many-to-one, so it
+    # cannot change which interview rows a LIMIT selects
+    query = query.enable_assertions(False).outerjoin(
+        Candidate, Interview.candidate_id == Candidate.id
+    ).with_entities(*_INTERVIEW_COLUMNS, *_NESTED_CANDIDATE_COLUMNS)
+    return [_interview(row) for row in query]
+
+
+def group_by_date(interviews):
+    """Calendar grouping: {'YYYY-MM-DD': [interview, ...]} in input order"""
+    calendar = {}
+    for interview in interviews:
+        calendar.setdefault(interview['interview_date'].date().isoformat(), []).append(interview)
+    return calendar
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson, with the stdlib as fallback.
+
+    Datetimes are always written as ISO 8601 (Flask's default provider
+    would use HTTP date format). Keys are not sorted.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None:
+            option = orjson.OPT_NON_STR_KEYS
+            if kwargs.get('indent'):
+                option |= orjson.OPT_INDENT_2
+            if kwargs.get('sort_keys', self.sort_keys):
+                option |= orjson.OPT_SORT_KEYS
+            try:
+                return orjson.dumps(obj, default=_default, option=option).decode('utf-8')
+            except TypeError:
+                # e.g. integers beyond 64 bits; the stdlib handles those
+                pass
+        kwargs.setdefault('default', _default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
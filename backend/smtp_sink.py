@@ -0,0 +1,344 @@
+"""
+Local SMTP/SMTPS sink for tests and benchmarks.
+
+Speaks just enough ESMTP for smtplib (EHLO/HELO, AUTH PLAIN/LOGIN, MAIL,
+RCPT, DATA, RSET, NOOP, QUIT), accepts every message and counts it. With
+``tls=True`` connections are wrapped in TLS from the start (SMTPS, as
+``send_campaign_task`` expects); ``generate_certificate`` makes a
+self-signed certificate for 127.0.0.1/localhost with the ``openssl`` CLI.
+
+Faults are injected per delivery attempt (each MAIL FROM), from a
+``Faults`` plan:
+
+- ``421``: ``421`` to MAIL FROM, then the connection is closed;
+- ``451``: the message is read, then refused with ``451`` (temporary);
+- ``550``: the recipient is refused with ``550`` (permanent);
+- ``disconnect``: the message is read, then the connection is dropped
+  without a reply;
+
+plus a fixed ``latency`` (and random ``jitter``) before each DATA reply and
+a per-connection message cap (``421`` once reached, like providers that
+limit messages per session). ``script`` lists the outcomes of the first
+attempts explicitly (``'ok'`` or a fault); after that, each fault happens
+with its configured probability, drawn from a seeded RNG, so a run is
+reproducible.
+
+    with SMTPSink(tls=True) as sink:
+        ...  # point SMTP_SERVER/SMTP_PORT at sink.host/sink.port
+        assert sink.message_count == 10
+
+    with SMTPSink(faults=Faults(script=['451'], disconnect=0.01, latency=0.02)) as sink:
+        ...
+
+    python smtp_sink.py --port 2525 [--tls] [--latency 0.05 --p451 0.02 --max-per-connection 100]
+"""
+import os
+import random
+import socketserver
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+
+
+def generate_certificate(directory):
+    """Self-signed (certfile, keyfile) valid for localhost and 127.0.0.1"""
+    certfile = os.path.join(directory, 'sink-cert.pem')
+    keyfile = os.path.join(directory, 'sink-key.pem')
+    subprocess.run([
+        'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '2',
+        '-keyout', keyfile, '-out', certfile, '-subj', '/CN=localhost',
+        '-addext', 'subjectAltName=DNS:localhost,IP:127.0.0.1',
+    ], check=True, capture_output=True)
+    return certfile, keyfile
+
+
+FAULTS = ('421', '451', '550', 'disconnect')
+
+
+class Faults:
+    """What the sink does wrong; see the module docstring"""
+
+    def __init__(self, script=(), p421=0.0, p451=0.0, p550=0.0, disconnect=0.0, latency=0.0, jitter=0.0,
+                 max_per_connection=None, seed=0):
+        unknown = set(script) - set(FAULTS) - {'ok'}
+        if unknown:
+            raise ValueError(f"Unknown fault(s) in script: {sorted(unknown)}")
+        self.script = list(script)
+        self.probabilities = (('421', p421), ('451', p451), ('550', p550), ('disconnect', disconnect))
+        self.latency = latency
+        self.jitter = jitter
+        self.max_per_connection = max_per_connection
+        self.rng = random.Random(seed)
+        self._jitter_rng = random.Random(seed + 1)  # drawn per DATA, from any thread
+
+    def next_outcome(self, attempt):
+        """Outcome of delivery attempt number ``attempt`` (0-based); call in attempt order"""
+        if attempt < len(self.script):
+            return self.script[attempt]
+        roll = self.rng.random()
+        for fault, probability in self.probabilities:
+            if roll < probability:
+                return fault
+            roll -= probability
+        return 'ok'
+
+    def delay(self):
+        return self.latency + (self._jitter_rng.random() * self.jitter if self.jitter else 0)
+
+
+def _address(argument):
+    """``FROM:<a@b.c> SIZE=123`` -> ``a@b.c``"""
+    return argument.partition(':')[2].strip().split(' ')[0].strip('<>')
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        sink = self.server.sink
+        sink._connection_opened()
+        try:
+            self.reply('220 smtp-sink ESMTP ready')
+            self.envelope = None
+            self.delivered = 0
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    return
+                command, _, argument = line.decode('utf-8', 'replace').rstrip('\r\n').partition(' ')
+                handler = getattr(self, f"smtp_{command.upper()}", None)
+                if handler is None:
+                    self.reply('502 5.5.2 Command not recognized')
+                elif handler(argument) is False:
+                    return
+        except (ConnectionError, ssl.SSLError, OSError):
+            pass
+
+    def smtp_EHLO(self, argument):
+        self.wfile.write(b'250-smtp-sink\r\n250-AUTH PLAIN LOGIN\r\n250-8BITMIME\r\n250 SIZE 52428800\r\n')
+
+    def smtp_HELO(self, argument):
+        self.reply('250 smtp-sink')
+
+    def smtp_AUTH(self, argument):
+        # Any credentials are accepted
+        mechanism, _, initial = argument.partition(' ')
+        mechanism = mechanism.upper()
+        if mechanism == 'PLAIN':
+            if not initial:
+                self.reply('334 ')
+                self.rfile.readline()
+        elif mechanism == 'LOGIN':
+            if not initial:
+                self.reply('334 VXNlcm5hbWU6')  # "Username:"
+                self.rfile.readline()
+            self.reply('334 UGFzc3dvcmQ6')  # "Password:"
+            self.rfile.readline()
+        else:
+            self.reply('504 5.5.4 Unrecognized authentication type')
+            return
+        self.reply('235 2.7.0 Authentication successful')
+
+    def smtp_MAIL(self, argument):
+        sink = self.server.sink
+        cap = sink.faults.max_per_connection
+        if cap is not None and self.delivered >= cap:
+            sink._injected('cap')
+            self.reply('421 4.7.0 Too many messages for this session, closing connection')
+            return False
+        outcome = sink._next_outcome()
+        if outcome == '421':
+            self.reply('421 4.3.2 Service not available, closing transmission channel')
+            return False
+        self.envelope = {'from': _address(argument), 'to': [], 'outcome': outcome}
+        self.reply('250 2.1.0 OK')
+
+    def smtp_RCPT(self, argument):
+        if self.envelope is None:
+            self.reply('503 5.5.1 MAIL first')
+            return
+        if self.envelope['outcome'] == '550':
+            self.reply('550 5.1.1 Mailbox unavailable')
+            return
+        self.envelope['to'].append(_address(argument))
+        self.reply('250 2.1.5 OK')
+
+    def smtp_DATA(self, argument):
+        if not self.envelope or not self.envelope['to']:
+            self.reply('503 5.5.1 RCPT first')
+            return
+        self.reply('354 End data with <CR><LF>.<CR><LF>')
+        size = 0
+        lines = [] if self.server.sink.keep_messages else None
+        while True:
+            line = self.rfile.readline()
+            if not line or line == b'.\r\n' or line == b'.\n':
+                break
+            if line.startswith(b'.'):
+                line = line[1:]
+            size += len(line)
+            if lines is not None:
+                lines.append(line)
+        sink = self.server.sink
+        delay = sink.faults.delay()
+        if delay:
+            sink._stopping.wait(delay)
+        outcome, self.envelope['outcome'] = self.envelope['outcome'], None
+        if outcome == 'disconnect':
+            return False
+        if outcome == '451':
+            self.envelope = None
+            self.reply('451 4.3.0 Temporary failure, try again later')
+            return
+        sink._accepted(self.envelope, size, b''.join(lines) if lines is not None else None)
+        self.delivered += 1
+        self.envelope = None
+        self.reply('250 2.0.0 Queued')
+
+    def smtp_RSET(self, argument):
+        self.envelope = None
+        self.reply('250 2.0.0 OK')
+
+    def smtp_NOOP(self, argument):
+        self.reply('250 2.0.0 OK')
+
+    def smtp_QUIT(self, argument):
+        self.reply('221 2.0.0 Bye')
+        return False
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, sink):
+        self.sink = sink
+        super().__init__(address, _Handler)
+
+    def get_request(self):
+        sock, address = super().get_request()
+        if self.sink.ssl_context:
+            # Handshake in the connection's own thread, not the accept loop
+            sock = self.sink.ssl_context.wrap_socket(sock, server_side=True, do_handshake_on_connect=False)
+        return sock, address
+
+
+class SMTPSink:
+    """Threaded SMTP(S) server that accepts and counts messages, with optional ``Faults``"""
+
+    def __init__(self, host='127.0.0.1', port=0, tls=False, certfile=None, keyfile=None, keep_messages=False,
+                 faults=None):
+        self.host = host
+        self.keep_messages = keep_messages
+        self.faults = faults or Faults()
+        self.ssl_context = None
+        self._tmp = None
+        if tls:
+            if not certfile:
+                self._tmp = tempfile.TemporaryDirectory()
+                certfile, keyfile = generate_certificate(self._tmp.name)
+            self.ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            self.ssl_context.load_cert_chain(certfile, keyfile)
+        self.certfile = certfile
+        self._lock = threading.Lock()
+        self.message_count = 0
+        self.recipient_count = 0
+        self.byte_count = 0
+        self.connection_count = 0
+        self.attempt_count = 0
+        self.injected = {fault: 0 for fault in FAULTS + ('cap',)}
+        self.messages = []
+        self._stopping = threading.Event()
+        self.started_at = None
+        self._server = _Server((host, port), self)
+        self.port = self._server.server_address[1]
+        self._thread = None
+
+    def _connection_opened(self):
+        with self._lock:
+            self.connection_count += 1
+
+    def _next_outcome(self):
+        with self._lock:
+            outcome = self.faults.next_outcome(self.attempt_count)
+            self.attempt_count += 1
+            if outcome != 'ok':
+                self.injected[outcome] += 1
+            return outcome
+
+    def _injected(self, fault):
+        with self._lock:
+            self.injected[fault] += 1
+
+    def _accepted(self, envelope, size, data):
+        with self._lock:
+            self.message_count += 1
+            self.recipient_count += len(envelope['to'])
+            self.byte_count += size
+            if data is not None:
+                self.messages.append({'from': envelope['from'], 'to': envelope['to'], 'data': data})
+
+    def stats(self):
+        with self._lock:
+            elapsed = time.perf_counter() - self.started_at if self.started_at else 0
+            return {
+                'messages': self.message_count,
+                'recipients': self.recipient_count,
+                'bytes': self.byte_count,
+                'connections': self.connection_count,
+                'attempts': self.attempt_count,
+                'injected': dict(self.injected),
+                'messages_per_sec': round(self.message_count / elapsed, 1) if elapsed else 0,
+            }
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._server.serve_forever, name='smtp-sink', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopping.set()
+        self._server.shutdown()
+        self._server.server_close()
+        if self._tmp:
+            self._tmp.cleanup()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run a local SMTP sink')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=2525)
+    parser.add_argument('--tls', action='store_true', help='SMTPS with a generated self-signed certificate')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds before each DATA reply')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Up to this many extra random seconds')
+    parser.add_argument('--p421', type=float, default=0.0, help='Probability of 421 + disconnect at MAIL FROM')
+    parser.add_argument('--p451', type=float, default=0.0, help='Probability of 451 after DATA')
+    parser.add_argument('--p550', type=float, default=0.0, help='Probability of 550 at RCPT TO')
+    parser.add_argument('--disconnect', type=float, default=0.0, help='Probability of dropping the connection after DATA')
+    parser.add_argument('--max-per-connection', type=int, help='421 once a connection has sent this many messages')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    faults = Faults(p421=args.p421, p451=args.p451, p550=args.p550, disconnect=args.disconnect,
+                    latency=args.latency, jitter=args.jitter, max_per_connection=args.max_per_connection,
+                    seed=args.seed)
+    sink = SMTPSink(args.host, args.port, tls=args.tls, faults=faults).start()
+    print(f"Listening on {args.host}:{sink.port}" + (f" (SMTPS, certificate {sink.certfile})" if args.tls else ''))
+    try:
+        while True:
+            time.sleep(5)
+            print(sink.stats(), flush=True)
+    except KeyboardInterrupt:
+        sink.stop()
@@ -6,15 +6,47 @@ import logging
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from celery_app import celery
+from celery.signals import worker_process_init
 from utils import personalize_email, ensure_html_formatting, html_to_plain_text, make_mime_html_base64
-from database import get_session, EmailTracking, Template
+from database import ENGINE, get_session, EmailTracking, Template
 from templates import get_template  # Legacy defaults (fallback only)
+from tracking import prepare_campaign_links, apply_tracking_id
+from analytics import RollupDeltas, backfill_rollups
 from config import Config
 import uuid
+from datetime import datetime
+import db_metrics
+from write_queue import run_write
+from memory_profile import CampaignMemoryProfiler
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
+# Per-task query counts and DB time (see db_metrics.py)
+db_metrics.connect_celery()
+
+
+@worker_process_init.connect(weak=False)
+def _reset_engine_pool(**kwargs):
+    # Pooled connections inherited from the parent must not be shared
+    # across forked worker processes
+    ENGINE.dispose(close=False)
+
+
+def _log_sent(session, campaign_id, tracking_id, recipient_email):
+    sent_at = datetime.utcnow()
+    session.add(EmailTracking(
+        tracking_id=tracking_id,
+        campaign_id=campaign_id,
+        recipient_email=recipient_email,
+        status='sent',
+        created_at=sent_at
+    ))
+    deltas = RollupDeltas()
+    deltas.add(campaign_id, sent_at, sent=1)
+    deltas.apply(session)
+
+
 @celery.task(bind=True)
 def send_campaign_task(self, campaign_id, sender_email, subject, recipients, template_id=None, html_template=None, plain_template=None):
     """
@@ -95,10 +127,31 @@ def send_campaign_task(self, campaign_id, sender_email, subject, recipients, tem
             'results': []
         }
 
+    # Rewrite links once for the whole campaign; recipients only add their token
+    api_base = Config.API_BASE_URL
+    try:
+        html_template = prepare_campaign_links(campaign_id, html_template, api_base=api_base)
+    except Exception as e:
+        logger.error(f"Failed to prepare tracked links for campaign {campaign_id}: {e}")
+
     results = []
     total = len(recipients)
     successful = 0
     failed = 0
+    # Only the first CAMPAIGN_RESULTS_LIMIT entries per status are kept, so
+    # the result (held here, then stored by the result backend) stays bounded
+    kept = {'success': 0, 'failed': 0}
+    results_omitted = 0
+
+    def record(entry):
+        nonlocal results_omitted
+        if kept[entry['status']] < Config.CAMPAIGN_RESULTS_LIMIT:
+            kept[entry['status']] += 1
+            results.append(entry)
+        else:
+            results_omitted += 1
+
+    profiler = CampaignMemoryProfiler(campaign_id).start() if Config.CAMPAIGN_MEMORY_PROFILE else None
     
     # helper for safe connection
     def create_server():
@@ -113,135 +166,197 @@ def send_campaign_task(self, campaign_id, sender_email, subject, recipients, tem
 
     server = create_server()
     
-    for i, recipient in enumerate(recipients):
-        # Update task state
-        self.update_state(state='PROGRESS', meta={
-            'current': i,
-            'total': total,
-            'successful': successful,
-            'failed': failed,
-            'status': 'sending'
-        })
+    # tracemalloc and the SMTP connection are released even if the loop
+    # raises outside the per-recipient try (e.g. in update_state)
+    memory_profile = None
+    try:
+        for i, recipient in enumerate(recipients):
+            if profiler:
+                profiler.tick(i)
+            # Update task state
+            self.update_state(state='PROGRESS', meta={
+                'current': i,
+                'total': total,
+                'successful': successful,
+                'failed': failed,
+                'status': 'sending'
+            })
         
-        recipient_email = recipient.get('Email', '').strip()
-        recipient_name = recipient.get('Name', 'Unknown')
+            recipient_email = recipient.get('Email', '').strip()
+            recipient_name = recipient.get('Name', 'Unknown')
         
-        if not recipient_email:
-            results.append({'email': '', 'status': 'failed', 'message': 'No email provided'})
-            failed += 1
-            continue
+            if not recipient_email:
+                record({'email': '', 'status': 'failed', 'message': 'No email provided'})
+                failed += 1
+                continue
         
-        try:
-            # Generate tracking ID
-            tracking_id = str(uuid.uuid4())
+            try:
+                # Generate tracking ID
+                tracking_id = str(uuid.uuid4())
                 
-            # Personalize content
-            html_body = personalize_email(html_template, recipient)
-            html_body = ensure_html_formatting(html_body)
+                # Personalize content
+                html_body = personalize_email(html_template, recipient)
+                html_body = ensure_html_formatting(html_body)
+                html_body = apply_tracking_id(html_body, tracking_id)
             
-            # Inject tracking pixel
-            # Determine API base URL (env var or default)
-            api_base = os.getenv('API_BASE_URL', 'http://localhost:5000')
-            pixel_url = f"{api_base}/api/track/{tracking_id}"
-            pixel_html = f'<img src="{pixel_url}" width="1" height="1" style="display:none;" alt="" />'
+                # Inject tracking pixel
+                pixel_url = f"{api_base}/api/track/{tracking_id}"
+                pixel_html = f'<img src="{pixel_url}" width="1" height="1" style="display:none;" alt="" />'
             
-            if '</body>' in html_body:
-                html_body = html_body.replace('</body>', f'{pixel_html}</body>')
-            else:
-                html_body += pixel_html
+                if '</body>' in html_body:
+                    html_body = html_body.replace('</body>', f'{pixel_html}</body>')
+                else:
+                    html_body += pixel_html
             
-            if plain_template:
-                plain_body = personalize_email(plain_template, recipient)
-            else:
-                plain_body = html_to_plain_text(html_body)
+                if plain_template:
+                    plain_body = personalize_email(plain_template, recipient)
+                else:
+                    plain_body = html_to_plain_text(html_body)
                 
-            # Log to database
-            try:
-                session = get_session()
-                tracking_record = EmailTracking(
-                    tracking_id=tracking_id,
-                    campaign_id=campaign_id,
-                    recipient_email=recipient_email,
-                    status='sent'
-                )
-                session.add(tracking_record)
-                session.commit()
-                session.close()
-            except Exception as e:
-                logger.error(f"Failed to log email tracking: {str(e)}")
-
-            # Create message
-            msg = MIMEMultipart("alternative")
-            msg["From"] = sender_email
-            msg["To"] = recipient_email
-            msg["Subject"] = subject
-            # msg["Bcc"] = sender_email  # Disabled to reduce spam likelihood/quota usage
-            msg["X-Campaign-ID"] = campaign_id
+                # Log to database
+                try:
+                    run_write(lambda session: _log_sent(session, campaign_id, tracking_id, recipient_email))
+                except Exception as e:
+                    logger.error(f"Failed to log email tracking: {str(e)}")
+
+                # Create message
+                msg = MIMEMultipart("alternative")
+                msg["From"] = sender_email
+                msg["To"] = recipient_email
+                msg["Subject"] = subject
+                # msg["Bcc"] = sender_email  # Disabled to reduce spam likelihood/quota usage
+                msg["X-Campaign-ID"] = campaign_id
             
-            msg.attach(MIMEText(plain_body, "plain", "utf-8"))
-            msg.attach(make_mime_html_base64(html_body))
+                msg.attach(MIMEText(plain_body, "plain", "utf-8"))
+                msg.attach(make_mime_html_base64(html_body))
             
-            # Send logic with retry
-            max_retries = 2
-            sent = False
-            for attempt in range(max_retries):
-                try:
-                    if server is None:
-                        server = create_server()
+                # Send logic with retry
+                max_retries = 2
+                sent = False
+                for attempt in range(max_retries):
+                    try:
                         if server is None:
-                            raise Exception("Could not connect to SMTP server")
+                            server = create_server()
+                            if server is None:
+                                raise Exception("Could not connect to SMTP server")
                             
-                    server.sendmail(sender_email, [recipient_email], msg.as_string())
-                    sent = True
-                    break
-                except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, smtplib.SMTPResponseException) as e:
-                    logger.warning(f"SMTP Error on attempt {attempt+1}: {e}. Reconnecting...")
-                    try:
-                        server.close()
-                    except:
-                        pass
-                    server = None # Force recreate next loop
-                    time.sleep(1) # Backoff
-                except Exception as e:
-                    logger.error(f"Unexpected SMTP error: {e}")
-                    raise e # Don't retry logic errors
+                        server.sendmail(sender_email, [recipient_email], msg.as_string())
+                        sent = True
+                        break
+                    except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, smtplib.SMTPResponseException) as e:
+                        logger.warning(f"SMTP Error on attempt {attempt+1}: {e}. Reconnecting...")
+                        try:
+                            server.close()
+                        except:
+                            pass
+                        server = None # Force recreate next loop
+                        time.sleep(1) # Backoff
+                    except Exception as e:
+                        logger.error(f"Unexpected SMTP error: {e}")
+                        raise e # Don't retry logic errors
+
+                if sent:
+                    record({
+                        'name': recipient_name,
+                        'email': recipient_email,
+                        'status': 'success',
+                        'message': 'Sent'
+                    })
+                    successful += 1
+                else:
+                    raise Exception("Failed to send after retries")
 
-            if sent:
-                results.append({
+                # Rate limit
+                if i < total - 1:
+                    time.sleep(RATE_LIMIT_DELAY)
+                
+            except Exception as e:
+                record({
                     'name': recipient_name,
                     'email': recipient_email,
-                    'status': 'success',
-                    'message': 'Sent'
+                    'status': 'failed',
+                    'message': str(e)
                 })
-                successful += 1
-            else:
-                raise Exception("Failed to send after retries")
-
-            # Rate limit
-            if i < total - 1:
-                time.sleep(RATE_LIMIT_DELAY)
-                
-        except Exception as e:
-            results.append({
-                'name': recipient_name,
-                'email': recipient_email,
-                'status': 'failed',
-                'message': str(e)
-            })
-            failed += 1
-            logger.error(f"Failed to send to {recipient_email}: {e}")
-
-    # Cleanup
-    if server:
-        try:
-            server.quit()
-        except:
-            pass
+                failed += 1
+                logger.error(f"Failed to send to {recipient_email}: {e}")
+    finally:
+        # Cleanup
+        if server:
+            try:
+                server.quit()
+            except:
+                pass
+        if profiler:
+            memory_profile = profiler.finish(successful + failed)
         
-    return {
+    summary = {
         'status': 'completed',
         'total': total,
         'successful': successful,
         'failed': failed,
-        'results': results
+        'results': results,
+        'results_omitted': results_omitted,
     }
+    if memory_profile:
+        summary['memory_profile'] = memory_profile
+    return summary
+
+
+@celery.task
+def backfill_rollups_task(campaign_id=None):
+    """
+    Rebuild analytics rollups from raw tracking rows (all campaigns by default).
+    """
+    processed = backfill_rollups(campaign_id=campaign_id)
+    return {'status': 'completed', 'campaign_id': campaign_id, 'processed': processed}
+
+
+@celery.task
+def enrich_tracking_task(max_chunks=None):
+    """
+    Classify opened tracking rows (bot/proxy vs. human, device, mail client).
+    Runs periodically via Celery beat; see celery_app.py.
+    """
+    from enrichment import enrich_pending
+
+    enriched = enrich_pending(max_chunks=max_chunks)
+    return {'status': 'completed', 'enriched': enriched}
+
+
+@celery.task
+def retention_task(retention_days=None):
+    """
+    Archive and prune raw tracking rows of campaigns older than the retention
+    window. Runs daily via Celery beat; see celery_app.py.
+    """
+    from retention import apply_retention
+
+    result = apply_retention(retention_days=retention_days)
+    return {'status': 'completed', **result}
+
+
+@celery.task
+def maintenance_task():
+    """
+    Checkpoint the WAL, refresh planner statistics and vacuum free pages.
+    Runs periodically via Celery beat; see celery_app.py.
+    """
+    from maintenance import run_maintenance
+
+    return {'status': 'completed', **run_maintenance()}
+
+
+@celery.task
+def import_job_task(job_id):
+    """Process an uploaded CSV import job in chunks; see csv_import.py."""
+    from csv_import import run_import_job
+
+    return run_import_job(job_id)
+
+
+@celery.task
+def dedup_job_task(job_id):
+    """Find (and optionally merge) duplicate candidates; see dedup.py."""
+    from dedup import run_dedup_job
+
+    return run_dedup_job(job_id)
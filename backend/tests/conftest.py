@@ -1,5 +1,6 @@
 import os
 import sys
+import tempfile
 
 import pytest
 
@@ -11,6 +12,12 @@ os.environ.setdefault("SECRET_KEY", "test-secret-key-32-bytes-minimum!!")
 os.environ.setdefault("JWT_SECRET_KEY", "test-jwt-secret-key-32-bytes-min!!")
 os.environ.setdefault("ADMIN_EMAIL", "admin@example.com")
 os.environ.setdefault("ADMIN_PASSWORD", "admin123")
+# Count SQL per request and forbid undeclared lazy loads (query_guard.py)
+os.environ.setdefault("QUERY_GUARD", "1")
+# db_metrics opens the slow-query log at import; keep it out of data/
+os.environ.setdefault(
+    "SLOW_QUERY_LOG", os.path.join(tempfile.mkdtemp(prefix="slow-queries-"), "slow_queries.log")
+)
 
 # Ensure backend package is importable
 BACKEND_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
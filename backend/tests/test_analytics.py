@@ -0,0 +1,116 @@
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from analytics import RollupDeltas, backfill_rollups, estimate_unique, get_campaign_summary, get_campaign_timeseries
+from database import EmailTracking, TimeToOpenRollup, TrackingRollup, TrackingSketch, session_scope
+from tracking import tracking_buffer
+
+
+def _seed_campaign(db_session, campaign_id, sent_at, count):
+    tracking_ids = [str(uuid.uuid4()) for _ in range(count)]
+    deltas = RollupDeltas()
+    for tracking_id in tracking_ids:
+        db_session.add(EmailTracking(
+            tracking_id=tracking_id,
+            campaign_id=campaign_id,
+            recipient_email=f"{tracking_id}@example.com",
+            status="sent",
+            created_at=sent_at,
+        ))
+        deltas.add(campaign_id, sent_at, sent=1)
+    deltas.apply(db_session)
+    db_session.commit()
+    return tracking_ids
+
+
+def _cleanup(db_session, campaign_id):
+    db_session.query(EmailTracking).filter_by(campaign_id=campaign_id).delete()
+    db_session.query(TrackingRollup).filter_by(campaign_id=campaign_id).delete()
+    db_session.query(TimeToOpenRollup).filter_by(campaign_id=campaign_id).delete()
+    db_session.query(TrackingSketch).filter_by(campaign_id=campaign_id).delete()
+    db_session.commit()
+
+
+def test_rollups_are_maintained_on_ingest_and_match_backfill(client, auth_headers, db_session):
+    campaign_id = f"test-rollup-{uuid.uuid4()}"
+    sent_at = datetime(2026, 3, 2, 9, 15)
+    try:
+        tracking_ids = _seed_campaign(db_session, campaign_id, sent_at, 3)
+
+        # Two recipients open; the first one opens twice, on different days
+        tracking_buffer.record_open(tracking_ids[0], at=sent_at + timedelta(minutes=2))
+        tracking_buffer.record_open(tracking_ids[1], at=sent_at + timedelta(hours=2))
+        tracking_buffer.record_open(tracking_ids[0], at=sent_at + timedelta(days=1))
+        tracking_buffer.flush()
+
+        summary = get_campaign_summary(db_session, campaign_id)
+        assert summary['sent'] == 3
+        assert summary['opens'] == 3
+        assert summary['unique_opens'] == 2
+        assert summary['open_rate'] == round(2 / 3, 4)
+
+        daily = get_campaign_timeseries(db_session, campaign_id, 'day')
+        assert [(b['bucket_start'][:10], b['opens']) for b in daily] == [('2026-03-02', 2), ('2026-03-03', 1)]
+        hourly = get_campaign_timeseries(db_session, campaign_id, 'hour', start_date=sent_at, end_date=sent_at + timedelta(hours=3))
+        assert [b['opens'] for b in hourly] == [1, 1]
+
+        resp = client.get(f"/api/analytics/campaigns/{campaign_id}/time-to-open", headers=auth_headers)
+        assert resp.status_code == 200
+        histogram = resp.json['histogram']
+        assert sum(b['count'] for b in histogram) == 2
+        assert histogram[1]['count'] == 1  # 1-5 minutes
+
+        # Backfill rebuilds unique/sent counters from raw rows
+        backfill_rollups(campaign_id=campaign_id)
+        db_session.expire_all()
+        rebuilt = get_campaign_summary(db_session, campaign_id)
+        assert rebuilt['sent'] == 3
+        assert rebuilt['unique_opens'] == 2
+        assert rebuilt['opens'] == 3
+    finally:
+        _cleanup(db_session, campaign_id)
+
+
+def test_analytics_summary_endpoint(client, auth_headers):
+    resp = client.get("/api/analytics/campaigns/unknown-campaign/summary", headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.json['summary']['sent'] == 0
+
+    resp = client.get("/api/analytics/campaigns/unknown-campaign/timeseries?granularity=week", headers=auth_headers)
+    assert resp.status_code == 400
+
+
+def test_concurrent_flushes_merge_sketches_of_the_same_new_bucket(db_session):
+    campaign_id = f"test-sketch-race-{uuid.uuid4()}"
+    at = datetime(2030, 3, 1, 9, 30)
+    workers = 4
+    barrier = threading.Barrier(workers)
+    errors = []
+
+    def flush(worker):
+        deltas = RollupDeltas()
+        # Sketches only: no counter upsert takes SQLite's write lock first, so the
+        # sketch rows are read before anyone writes
+        for i in range(50):
+            deltas.add_distinct(campaign_id, 'open', at, f"worker{worker}-{i}@example.com")
+        barrier.wait()
+        try:
+            with session_scope() as session:
+                deltas.apply(session)
+        except Exception as e:
+            errors.append(e)
+
+    try:
+        threads = [threading.Thread(target=flush, args=(worker,)) for worker in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert db_session.query(TrackingSketch).filter_by(campaign_id=campaign_id).count() == 3
+        estimate = estimate_unique(db_session, campaign_id, 'open')['estimate']
+        assert 190 <= estimate <= 210  # every worker's registers survived, not just the last writer's
+    finally:
+        _cleanup(db_session, campaign_id)
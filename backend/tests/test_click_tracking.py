@@ -0,0 +1,89 @@
+import uuid
+
+from database import CampaignLink, EmailClick, EmailTracking
+from tracking import (
+    TRACKING_ID_PLACEHOLDER,
+    apply_tracking_id,
+    prepare_campaign_links,
+    resolve_link,
+    tracking_buffer,
+)
+
+
+def _cleanup(db_session, campaign_id):
+    link_ids = [l.id for l in db_session.query(CampaignLink).filter_by(campaign_id=campaign_id)]
+    if link_ids:
+        db_session.query(EmailClick).filter(EmailClick.link_id.in_(link_ids)).delete(synchronize_session=False)
+    db_session.query(CampaignLink).filter_by(campaign_id=campaign_id).delete()
+    db_session.query(EmailTracking).filter_by(campaign_id=campaign_id).delete()
+    db_session.commit()
+
+
+def test_prepare_campaign_links_rewrites_static_links_only(db_session):
+    campaign_id = f"test-links-{uuid.uuid4()}"
+    template = (
+        '<p><a href="https://example.com/jobs?a=1&amp;b=2">Jobs</a> '
+        '<a href="{MeetLink}">Join</a> '
+        '<a href="mailto:hr@example.com">Mail</a> '
+        "<a class='btn' href='http://example.com/apply'>Apply</a></p>"
+    )
+    try:
+        rewritten = prepare_campaign_links(campaign_id, template, api_base="http://api.test")
+
+        links = db_session.query(CampaignLink).filter_by(campaign_id=campaign_id).order_by(CampaignLink.position).all()
+        assert [l.url for l in links] == ["https://example.com/jobs?a=1&b=2", "http://example.com/apply"]
+
+        assert f'href="http://api.test/api/click/{links[0].id}/{TRACKING_ID_PLACEHOLDER}"' in rewritten
+        assert f"href='http://api.test/api/click/{links[1].id}/{TRACKING_ID_PLACEHOLDER}'" in rewritten
+        assert 'href="{MeetLink}"' in rewritten
+        assert 'href="mailto:hr@example.com"' in rewritten
+
+        personalized = apply_tracking_id(rewritten, "abc-123")
+        assert TRACKING_ID_PLACEHOLDER not in personalized
+        assert f"/api/click/{links[0].id}/abc-123" in personalized
+    finally:
+        _cleanup(db_session, campaign_id)
+
+
+def test_click_redirects_and_is_recorded_through_buffer(client, db_session):
+    campaign_id = f"test-click-{uuid.uuid4()}"
+    tracking_id = str(uuid.uuid4())
+    try:
+        db_session.add(EmailTracking(
+            tracking_id=tracking_id,
+            campaign_id=campaign_id,
+            recipient_email="click@example.com",
+            status="sent",
+        ))
+        db_session.commit()
+        prepare_campaign_links(campaign_id, '<a href="https://example.com/offer">Offer</a>')
+        link = db_session.query(CampaignLink).filter_by(campaign_id=campaign_id).one()
+
+        resp = client.get(f"/api/track/{tracking_id}")
+        assert resp.status_code == 200
+        assert resp.mimetype == "image/gif"
+
+        resp = client.get(f"/api/click/{link.id}/{tracking_id}", headers={"User-Agent": "pytest"})
+        assert resp.status_code == 302
+        assert resp.headers["Location"] == "https://example.com/offer"
+        assert resolve_link(link.id) == "https://example.com/offer"
+
+        tracking_buffer.flush()
+        db_session.expire_all()
+
+        record = db_session.query(EmailTracking).filter_by(tracking_id=tracking_id).one()
+        assert record.open_count == 1
+        assert record.click_count == 1
+        assert record.status == "clicked"
+        assert record.opened_at is not None and record.clicked_at is not None
+
+        clicks = db_session.query(EmailClick).filter_by(tracking_id=tracking_id).all()
+        assert [c.link_id for c in clicks] == [link.id]
+        assert clicks[0].user_agent == "pytest"
+    finally:
+        _cleanup(db_session, campaign_id)
+
+
+def test_click_on_unknown_link_returns_404(client):
+    resp = client.get(f"/api/click/999999999/{uuid.uuid4()}")
+    assert resp.status_code == 404
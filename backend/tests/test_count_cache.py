@@ -0,0 +1,59 @@
+import uuid
+
+from count_cache import CountCache, count_cache, normalize_filters
+from database import Candidate
+
+
+def test_count_cache_hits_and_generation_guard():
+    cache = CountCache(ttl=60)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return 42
+
+    assert cache.get_or_compute(('candidates',), {'search': 'ann ', 'country': ''}, compute) == 42
+    assert cache.get_or_compute(('candidates',), {'search': 'ann'}, compute) == 42
+    assert len(calls) == 1
+    assert normalize_filters({'b': 1, 'a': None, 'c': ' x '}) == (('b', 1), ('c', 'x'))
+
+    # A write during the count must not leave the old value cached
+    def racing_compute():
+        cache.invalidate({'interviews'})
+        return 1
+
+    cache.get_or_compute(('interviews',), {}, racing_compute)
+    assert cache.get_or_compute(('interviews',), {}, lambda: 2) == 2
+
+
+def test_session_writes_invalidate_cached_totals(client, auth_headers, db_session):
+    tag = uuid.uuid4().hex[:8]
+    url = f"/api/candidates?search=countcache-{tag}&limit=5"
+    try:
+        assert client.get(url, headers=auth_headers).json['total'] == 0
+
+        db_session.add(Candidate(first_name="Count", last_name="Cache", email=f"countcache-{tag}@example.com"))
+        db_session.commit()
+        assert client.get(url, headers=auth_headers).json['total'] == 1
+
+        # Bulk deletes go through do_orm_execute
+        db_session.query(Candidate).filter_by(email=f"countcache-{tag}@example.com").delete()
+        db_session.commit()
+        assert client.get(url, headers=auth_headers).json['total'] == 0
+    finally:
+        db_session.query(Candidate).filter_by(email=f"countcache-{tag}@example.com").delete()
+        db_session.commit()
+        count_cache.clear()
+
+
+def test_total_modes(client, auth_headers):
+    resp = client.get("/api/candidates?limit=1&total=estimate", headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.json['total_estimated'] is True
+    assert resp.json['total'] >= 0
+
+    resp = client.get("/api/interviews?limit=1&total=none", headers=auth_headers)
+    assert resp.json['total'] is None
+
+    resp = client.get("/api/interviews?limit=1&total=bogus", headers=auth_headers)
+    assert resp.status_code == 400
@@ -0,0 +1,103 @@
+import uuid
+from datetime import datetime
+
+from database import Candidate, Interview
+from query_guard import QueryCounter
+
+HEADER = "First Name,Last Name,Phone,Email Address,Status,Date,Interview Day,Time"
+
+
+def _cleanup(db_session, tag):
+    candidates = db_session.query(Candidate).filter(Candidate.email.like(f"%{tag}%")).all()
+    for candidate in candidates:
+        db_session.delete(candidate)
+    db_session.commit()
+
+
+def test_import_creates_updates_and_reports_rows(client, auth_headers, db_session):
+    tag = uuid.uuid4().hex[:8]
+    existing = Candidate(first_name="Old", last_name="", email=f"existing-{tag}@example.com")
+    db_session.add(existing)
+    db_session.commit()
+    try:
+        csv_data = "\n".join([
+            HEADER,
+            f"Ann,Lee,555-0100,ann-{tag}@example.com,Confirmed,14TH NOV 2031,FRIDAY,9:00",
+            f"Ann,Lee,,ann-{tag}@example.com,Confirmed,14TH NOV 2031,FRIDAY,9:30",
+            f"Ann,Lee,,ANN-{tag}@example.com ,,14TH NOV 2031,FRIDAY,9:00",
+            f"New,Last,555-0101,existing-{tag}@example.com,,,,",
+            f",,555-0102,noname-{tag}@example.com,,,,",
+            "Nobody,Here,555-0103,,,,,",
+            f"Bob,Ray,555-0104,bob-{tag}@example.com,,15TH NOV 2031,SATURDAY,",
+        ])
+        resp = client.post('/api/candidates/import', json={'csv_data': csv_data}, headers=auth_headers)
+        assert resp.status_code == 200
+        body = resp.json
+        # Two interviews for Ann, plus the candidate-only row
+        assert body['imported'] == 3
+        assert body['errors'] == [
+            "Row 6: Missing name",
+            "Row 7: Missing email address",
+            "Row 8: Date provided but time is missing or invalid",
+        ]
+
+        db_session.expire_all()
+        ann = db_session.query(Candidate).filter_by(email=f"ann-{tag}@example.com").one()
+        assert ann.phone == "555-0100"
+        dates = sorted(i.interview_date for i in db_session.query(Interview).filter_by(candidate_id=ann.id))
+        assert dates == [datetime(2031, 11, 14, 9, 0), datetime(2031, 11, 14, 9, 30)]
+
+        refreshed = db_session.get(Candidate, existing.id)
+        assert refreshed.first_name == "Old"
+        assert refreshed.last_name == "Last"
+        assert refreshed.phone == "555-0101"
+        # Reported, but the candidate is still created
+        assert db_session.query(Candidate).filter_by(email=f"bob-{tag}@example.com").count() == 1
+
+        # Importing the same file again creates nothing new
+        resp = client.post('/api/candidates/import', json={'csv_data': csv_data}, headers=auth_headers)
+        assert resp.json['imported'] == 1
+    finally:
+        _cleanup(db_session, tag)
+
+
+def test_import_reports_errors_in_row_order(db_session):
+    from csv_import import import_candidates_from_csv
+
+    tag = uuid.uuid4().hex[:8]
+    try:
+        imported, errors = import_candidates_from_csv("\n".join([
+            HEADER,
+            f"Bob,Ray,555-0104,bob-{tag}@example.com,,15TH NOV 2031,SATURDAY,",
+            "Nobody,Here,555-0103,,,,,",
+            f"Ann,Lee,555-0100,ann-{tag}@example.com,,14TH NOV 2031,FRIDAY,",
+        ]))
+        assert imported == 0
+        # Row 2 and 4 are reported while writing, row 3 while parsing
+        assert errors == [
+            "Row 2: Date provided but time is missing or invalid",
+            "Row 3: Missing email address",
+            "Row 4: Date provided but time is missing or invalid",
+        ]
+    finally:
+        _cleanup(db_session, tag)
+
+
+def test_import_queries_do_not_grow_with_rows(db_session):
+    from csv_import import import_candidates_from_csv
+
+    tag = uuid.uuid4().hex[:8]
+    counts = []
+    try:
+        for size in (10, 60):
+            rows = [
+                f"Bulk,{i},555-{i:04d},bulk-{tag}-{size}-{i}@example.com,Confirmed,14TH NOV 2031,FRIDAY,{9 + i % 8}:00"
+                for i in range(size)
+            ]
+            with QueryCounter() as counter:
+                imported, errors = import_candidates_from_csv("\n".join([HEADER] + rows))
+            assert (imported, errors) == (size, [])
+            counts.append(counter.count)
+        assert counts[0] == counts[1]
+    finally:
+        _cleanup(db_session, tag)
@@ -0,0 +1,40 @@
+from datetime import datetime
+
+import pytest
+
+from scheduler import _parse_date_cached, combine_datetime, parse_date_string, parse_time_string
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("14TH NOV 2025", datetime(2025, 11, 14)),
+    ("1st Dec 2025", datetime(2025, 12, 1)),
+    ("  22nd nov 2025 ", datetime(2025, 11, 22)),
+    ("14 November 2025", datetime(2025, 11, 14)),
+    ("14-NOV-2025", datetime(2025, 11, 14)),
+    ("14/NOV/2025", datetime(2025, 11, 14)),
+    # Not handled by the fast path; same results as the full parser
+    ("14  NOV 2025", datetime(2025, 11, 14)),
+    ("14 SEPT 2025", None),
+    ("31 FEB 2025", None),
+    ("2025-11-14", None),
+    ("", None),
+])
+def test_parse_date_string(text, expected):
+    assert parse_date_string(text) == expected
+
+
+def test_date_parsing_is_memoized():
+    _parse_date_cached.cache_clear()
+    for _ in range(100):
+        parse_date_string("14TH NOV 2025")
+    info = _parse_date_cached.cache_info()
+    assert (info.misses, info.hits) == (1, 99)
+
+
+def test_time_parsing_and_combining():
+    assert parse_time_string("9:30") == "09:30"
+    assert parse_time_string("1:00") == "13:00"
+    assert parse_time_string(" 10:00:00 ") == "10:00"
+    assert parse_time_string("noon") == "noon"
+    assert combine_datetime(datetime(2025, 11, 14), "13:30") == datetime(2025, 11, 14, 13, 30)
+    assert combine_datetime(datetime(2025, 11, 14), "25:00") is None
@@ -0,0 +1,51 @@
+import os
+
+from sqlalchemy import text
+
+import db_metrics
+from config import DATA_DIR, Config
+from database import get_session
+
+
+def test_request_scopes_are_aggregated(client, auth_headers):
+    db_metrics.metrics.reset()
+    resp = client.get("/api/interviews?limit=1", headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.headers['Server-Timing'].startswith('db;dur=')
+
+    resp = client.get("/api/system/db-metrics", headers=auth_headers)
+    assert resp.status_code == 200
+    scopes = {s['name']: s for s in resp.json['scopes']}
+    listing = scopes['scheduling.get_interviews']
+    assert listing['kind'] == 'request'
+    assert listing['calls'] == 1
+    assert listing['queries'] >= 1
+    assert resp.json['totals']['queries'] >= listing['queries']
+
+
+def test_slow_queries_are_logged_with_plan(monkeypatch):
+    db_metrics.metrics.reset()
+    monkeypatch.setattr(Config, 'SLOW_QUERY_MS', 0.0)
+    session = get_session()
+    try:
+        db_metrics.begin_scope('task', 'tasks.example', 'task-123')
+        session.execute(text("SELECT id FROM candidates WHERE email = :email"), {'email': 'nobody@example.com'})
+        stats = db_metrics.end_scope()
+    finally:
+        session.close()
+
+    assert stats.queries >= 1 and stats.slow_queries >= 1
+    snapshot = db_metrics.metrics.snapshot()
+    slow = [s for s in snapshot['slow_queries'] if 'FROM candidates WHERE email' in s['statement']]
+    assert slow and slow[-1]['scope'] == 'task:tasks.example'
+    assert slow[-1]['scope_id'] == 'task-123'
+    if session.get_bind().dialect.name == 'sqlite':
+        assert 'USING INDEX' in slow[-1]['plan'] or 'SEARCH' in slow[-1]['plan']
+    else:
+        assert slow[-1]['plan']
+    assert any(s['name'] == 'tasks.example' for s in snapshot['scopes'])
+
+    # Written to the log conftest points outside the repository's data directory
+    assert not os.path.abspath(Config.SLOW_QUERY_LOG).startswith(os.path.abspath(DATA_DIR) + os.sep)
+    with open(Config.SLOW_QUERY_LOG) as f:
+        assert '[task:tasks.example task-123]' in f.read()
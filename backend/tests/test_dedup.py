@@ -0,0 +1,117 @@
+import random
+import string
+import uuid
+from datetime import datetime
+
+import pytest
+
+import tasks
+from database import Candidate, DedupJob, EmailTracking, Interview
+from dedup import canonical_email, find_duplicates, merge_clusters, phone_key, run_dedup_job, soundex
+
+
+def test_blocking_keys():
+    assert canonical_email(" John.Smith+jobs@GoogleMail.com") == "johnsmith@gmail.com"
+    assert canonical_email("j.smith+x@corp.com") == "j.smith@corp.com"
+    assert canonical_email("not-an-email") is None
+    assert phone_key("+1 (555) 123-4567") == phone_key("555.123.4567") == "5551234567"
+    assert phone_key("ext 12") is None
+    assert [soundex(n) for n in ("Robert", "Rupert", "Ashcraft", "Tymczak", "Pfister")] == [
+        "R163", "R163", "A261", "T522", "P236"
+    ]
+
+
+@pytest.fixture
+def people(db_session):
+    surname = 'Q' + ''.join(random.choices(string.ascii_lowercase, k=10))
+    tag = uuid.uuid4().hex[:8]
+    phone = f"555-{random.randint(1000000, 9999999)}"
+    candidates = [
+        Candidate(first_name="John", last_name=surname, email=f"john.{tag}+jobs@gmail.com", phone=phone),
+        Candidate(first_name="John", last_name=surname, email=f"john{tag}@googlemail.com",
+                  address="1 Main St"),
+        Candidate(first_name="Jon", last_name=surname, email=f"jon-{tag}@example.com", phone=f"+1 {phone}"),
+        # Same name only: not enough on its own
+        Candidate(first_name="John", last_name=surname, email=f"other-{tag}@example.com"),
+    ]
+    db_session.add_all(candidates)
+    db_session.commit()
+    ids = [c.id for c in candidates]
+    yield ids
+    db_session.query(EmailTracking).filter(EmailTracking.campaign_id == f"dedup-{tag}").delete()
+    db_session.query(Interview).filter(Interview.candidate_id.in_(ids)).delete(synchronize_session=False)
+    db_session.query(Candidate).filter(Candidate.id.in_(ids)).delete(synchronize_session=False)
+    db_session.commit()
+
+
+def _cluster(ids):
+    clusters, stats = find_duplicates()
+    return [c for c in clusters if c['survivor_id'] in ids], stats
+
+
+def test_find_duplicates_clusters_by_email_phone_and_name(people):
+    clusters, stats = _cluster(people)
+    assert [(c['survivor_id'], c['duplicate_ids']) for c in clusters] == [(people[0], people[1:3])]
+    assert stats['comparisons'] < stats['candidates'] ** 2
+
+
+def test_merge_reparents_interviews_and_tracking(people, db_session):
+    survivor, email_dup, phone_dup, _ = people
+    survivor_email = db_session.get(Candidate, survivor).email
+    dup_email = db_session.get(Candidate, email_dup).email
+    tag = dup_email.split('@')[0][4:]
+    db_session.add_all([
+        Interview(candidate_id=survivor, interview_date=datetime(2035, 1, 2, 9)),
+        Interview(candidate_id=email_dup, interview_date=datetime(2035, 1, 2, 9)),
+        Interview(candidate_id=phone_dup, interview_date=datetime(2035, 1, 3, 9)),
+        EmailTracking(tracking_id=f"dedup-{tag}", campaign_id=f"dedup-{tag}", recipient_email=dup_email.upper()),
+    ])
+    db_session.commit()
+
+    result = merge_clusters([{'survivor_id': survivor, 'duplicate_ids': [email_dup, phone_dup]}])
+    assert result == {'merged': 2, 'interviews_moved': 1, 'interviews_dropped': 1, 'tracking_updated': 1}
+
+    db_session.expire_all()
+    assert db_session.query(Candidate).filter(Candidate.id.in_([email_dup, phone_dup])).count() == 0
+    merged = db_session.get(Candidate, survivor)
+    assert merged.address == "1 Main St"
+    assert sorted(i.interview_date.day for i in merged.interviews) == [2, 3]
+    assert db_session.query(EmailTracking).filter_by(campaign_id=f"dedup-{tag}").one().recipient_email == survivor_email
+
+
+def test_duplicate_endpoints(client, auth_headers, people, db_session, monkeypatch):
+    queued = []
+    monkeypatch.setattr(tasks.dedup_job_task, 'delay', queued.append)
+    job_ids = []
+    try:
+        resp = client.post('/api/candidates/duplicates', headers=auth_headers)
+        assert resp.status_code == 202
+        job = resp.json['job']
+        job_ids.append(job['id'])
+        assert (job['status'], job['merge']) == ('queued', False)
+        assert queued == [job['id']]
+
+        result = run_dedup_job(job['id'])
+        assert result['status'] == 'completed'
+        assert result['stats']['clusters'] >= 1 and result['result'] is None
+
+        resp = client.get(f"/api/candidates/duplicates/{job['id']}?limit=1000", headers=auth_headers)
+        assert resp.status_code == 200
+        assert any(c['survivor_id'] == people[0] for c in resp.json['clusters'])
+        resp = client.get(f"/api/candidates/duplicates/{job['id']}?offset=0&limit=1", headers=auth_headers)
+        assert len(resp.json['clusters']) == 1
+
+        # Merging everything is queued rather than run in the request
+        resp = client.post('/api/candidates/merge', json={'all': True}, headers=auth_headers)
+        assert resp.status_code == 202
+        job_ids.append(resp.json['job']['id'])
+        assert resp.json['job']['merge'] is True and queued[-1] == job_ids[-1]
+
+        resp = client.post('/api/candidates/merge', json={'clusters': [{'survivor_id': people[0],
+                                                                        'duplicate_ids': [people[0]]}]},
+                           headers=auth_headers)
+        assert resp.status_code == 400
+        assert client.get('/api/candidates/duplicates/missing', headers=auth_headers).status_code == 404
+    finally:
+        db_session.query(DedupJob).filter(DedupJob.id.in_(job_ids)).delete(synchronize_session=False)
+        db_session.commit()
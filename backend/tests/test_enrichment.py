@@ -0,0 +1,169 @@
+import uuid
+from datetime import datetime, timedelta
+
+from analytics import get_campaign_summary, get_campaign_timeseries
+from database import CampaignLink, EmailClick, EmailTracking, TimeToOpenRollup, TrackingRollup, TrackingSketch
+from enrichment import IPRangeTable, classify_open, enrich_pending, parse_user_agent
+from tracking import tracking_buffer
+
+GMAIL_PROXY_UA = "Mozilla/5.0 (Windows NT 5.1; rv:11.0) Gecko Firefox/11.0 (via ggpht.com GoogleImageProxy)"
+IPHONE_MAIL_UA = (
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148"
+)
+OUTLOOK_UA = "Mozilla/4.0 (compatible; ms-office; MSOffice 16)"
+
+
+def test_user_agent_and_ip_classification():
+    assert parse_user_agent(GMAIL_PROXY_UA).client_class == "proxy"
+    assert parse_user_agent(GMAIL_PROXY_UA).mail_client == "Gmail"
+
+    iphone = parse_user_agent(IPHONE_MAIL_UA)
+    assert (iphone.client_class, iphone.device_family, iphone.mail_client) == ("human", "iPhone", "Apple Mail")
+    assert parse_user_agent(OUTLOOK_UA).mail_client == "Outlook"
+    assert parse_user_agent("python-requests/2.31").client_class == "bot"
+    assert parse_user_agent(None).client_class == "unknown"
+
+    # Memoized
+    parse_user_agent.cache_clear()
+    parse_user_agent(OUTLOOK_UA)
+    parse_user_agent(OUTLOOK_UA)
+    assert parse_user_agent.cache_info().hits == 1
+
+    table = IPRangeTable([("10.0.0.0/8", "Internal", "bot"), ("2001:db8::/32", "Docs", "proxy")])
+    assert table.lookup("10.1.2.3") == ("Internal", "bot")
+    assert table.lookup("11.0.0.1") is None
+    assert table.lookup("2001:db8::1") == ("Docs", "proxy")
+    assert table.lookup("not-an-ip") is None
+
+    # Apple Mail Privacy Protection fetches from Apple's 17.0.0.0/8 range
+    assert classify_open(IPHONE_MAIL_UA, "17.58.1.2").client_class == "proxy"
+    assert classify_open(IPHONE_MAIL_UA, "203.0.113.9").client_class == "human"
+
+
+def test_enrichment_feeds_prefetch_counters(db_session):
+    campaign_id = f"test-enrich-{uuid.uuid4()}"
+    sent_at = datetime(2026, 5, 4, 8, 0)
+    try:
+        human_id, proxy_id = str(uuid.uuid4()), str(uuid.uuid4())
+        for tracking_id in (human_id, proxy_id):
+            db_session.add(EmailTracking(
+                tracking_id=tracking_id,
+                campaign_id=campaign_id,
+                recipient_email=f"{tracking_id}@example.com",
+                status="sent",
+                created_at=sent_at,
+            ))
+        db_session.commit()
+
+        tracking_buffer.record_open(human_id, ip_address="203.0.113.9", user_agent=IPHONE_MAIL_UA, at=sent_at + timedelta(minutes=5))
+        tracking_buffer.record_open(proxy_id, ip_address="66.102.8.1", user_agent=GMAIL_PROXY_UA, at=sent_at + timedelta(seconds=3))
+        tracking_buffer.record_open(proxy_id, ip_address="66.102.8.1", user_agent=GMAIL_PROXY_UA, at=sent_at + timedelta(hours=1))
+        tracking_buffer.flush()
+
+        assert enrich_pending() >= 2
+
+        db_session.expire_all()
+        proxy_row = db_session.query(EmailTracking).filter_by(tracking_id=proxy_id).one()
+        assert proxy_row.client_class == "proxy"
+        assert proxy_row.mail_client == "Gmail"
+        assert proxy_row.enriched_at is not None
+
+        summary = get_campaign_summary(db_session, campaign_id)
+        assert summary["unique_opens"] == 2
+        assert summary["prefetch_unique_opens"] == 1
+        assert summary["prefetch_opens"] == 2
+        assert summary["human_unique_opens"] == 1
+
+        # Buckets only know when the proxy first opened; its repeat open is
+        # discounted from the lifetime totals alone
+        daily = get_campaign_timeseries(db_session, campaign_id, "day", exclude_prefetch=True)
+        assert daily[0]["opens"] == 2
+        assert daily[0]["unique_opens"] == 1
+
+        # Nothing left to do until a row is opened again
+        assert enrich_pending() == 0
+        tracking_buffer.record_open(proxy_id, ip_address="66.102.8.1", user_agent=GMAIL_PROXY_UA)
+        tracking_buffer.flush()
+        assert enrich_pending() == 1
+        db_session.expire_all()
+        summary = get_campaign_summary(db_session, campaign_id)
+        assert summary["prefetch_opens"] == 3
+        assert summary["prefetch_unique_opens"] == 1
+    finally:
+        db_session.query(EmailTracking).filter_by(campaign_id=campaign_id).delete()
+        db_session.query(TrackingRollup).filter_by(campaign_id=campaign_id).delete()
+        db_session.query(TimeToOpenRollup).filter_by(campaign_id=campaign_id).delete()
+        db_session.query(TrackingSketch).filter_by(campaign_id=campaign_id).delete()
+        db_session.commit()
+
+
+def _cleanup(db_session, campaign_id):
+    tracking_ids = db_session.query(EmailTracking.tracking_id).filter_by(campaign_id=campaign_id)
+    db_session.query(EmailClick).filter(EmailClick.tracking_id.in_(tracking_ids)).delete(synchronize_session=False)
+    db_session.query(CampaignLink).filter_by(campaign_id=campaign_id).delete()
+    db_session.query(EmailTracking).filter_by(campaign_id=campaign_id).delete()
+    db_session.query(TrackingRollup).filter_by(campaign_id=campaign_id).delete()
+    db_session.query(TimeToOpenRollup).filter_by(campaign_id=campaign_id).delete()
+    db_session.query(TrackingSketch).filter_by(campaign_id=campaign_id).delete()
+    db_session.commit()
+
+
+def test_hourly_buckets_never_go_negative_without_prefetch(db_session):
+    campaign_id = f"test-enrich-{uuid.uuid4()}"
+    sent_at = datetime(2026, 5, 4, 8, 0)
+    try:
+        proxy_id = str(uuid.uuid4())
+        db_session.add(EmailTracking(
+            tracking_id=proxy_id,
+            campaign_id=campaign_id,
+            recipient_email=f"{proxy_id}@example.com",
+            status="sent",
+            created_at=sent_at,
+        ))
+        db_session.commit()
+
+        for hours in (0, 2, 2):
+            tracking_buffer.record_open(proxy_id, ip_address="66.102.8.1", user_agent=GMAIL_PROXY_UA, at=sent_at + timedelta(hours=hours, minutes=1))
+        tracking_buffer.flush()
+        assert enrich_pending() >= 1
+
+        hourly = get_campaign_timeseries(db_session, campaign_id, "hour", exclude_prefetch=True)
+        assert [(b["opens"], b["unique_opens"]) for b in hourly] == [(0, 0), (2, 0)]
+        assert get_campaign_summary(db_session, campaign_id)["human_opens"] == 0
+    finally:
+        _cleanup(db_session, campaign_id)
+
+
+def test_clicks_do_not_reclassify_the_open(db_session):
+    campaign_id = f"test-enrich-{uuid.uuid4()}"
+    sent_at = datetime(2026, 5, 4, 8, 0)
+    try:
+        tracking_id = str(uuid.uuid4())
+        db_session.add(EmailTracking(
+            tracking_id=tracking_id,
+            campaign_id=campaign_id,
+            recipient_email=f"{tracking_id}@example.com",
+            status="sent",
+            created_at=sent_at,
+        ))
+        link = CampaignLink(campaign_id=campaign_id, position=0, url="https://example.com/jobs")
+        db_session.add(link)
+        db_session.commit()
+
+        tracking_buffer.record_open(tracking_id, ip_address="203.0.113.9", user_agent=IPHONE_MAIL_UA, at=sent_at + timedelta(minutes=5))
+        tracking_buffer.flush()
+        assert enrich_pending() >= 1
+        db_session.expire_all()
+        enriched_at = db_session.query(EmailTracking).filter_by(tracking_id=tracking_id).one().enriched_at
+
+        tracking_buffer.record_click(tracking_id, link.id, ip_address="10.1.2.3", user_agent="python-requests/2.31", at=sent_at + timedelta(minutes=6))
+        tracking_buffer.flush()
+
+        db_session.expire_all()
+        row = db_session.query(EmailTracking).filter_by(tracking_id=tracking_id).one()
+        assert (row.user_agent, row.ip_address) == (IPHONE_MAIL_UA, "203.0.113.9")
+        assert row.client_class == "human"
+        assert row.enriched_at == enriched_at
+        assert row.click_count == 1
+    finally:
+        _cleanup(db_session, campaign_id)
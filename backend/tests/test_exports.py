@@ -0,0 +1,101 @@
+import csv
+import io
+import uuid
+from datetime import datetime
+
+import pytest
+
+import exports
+from database import Candidate, EmailTracking, Interview
+
+
+@pytest.fixture
+def exported(db_session):
+    tag = uuid.uuid4().hex[:8]
+    candidates = [
+        Candidate(first_name="Export", last_name=f"Zed{tag}{i}", email=f"export-{tag}-{i}@example.com",
+                  phone="555, ext. 1" if i == 0 else None, country='CA' if i < 3 else 'US')
+        for i in range(4)
+    ]
+    db_session.add_all(candidates)
+    db_session.flush()
+    db_session.add_all([
+        Interview(candidate_id=c.id, interview_date=datetime(2034, 3, 1, 9 + i), status='confirmed')
+        for i, c in enumerate(candidates)
+    ])
+    db_session.add_all([
+        EmailTracking(tracking_id=f"export-{tag}-{i}", campaign_id=f"export-{tag}",
+                      recipient_email=c.email, status='opened' if i % 2 else 'sent')
+        for i, c in enumerate(candidates)
+    ])
+    db_session.commit()
+    yield tag
+    db_session.query(EmailTracking).filter_by(campaign_id=f"export-{tag}").delete()
+    for c in candidates:
+        db_session.delete(c)
+    db_session.commit()
+
+
+def _rows(resp):
+    assert resp.status_code == 200, resp.data
+    assert resp.is_streamed
+    assert resp.mimetype == 'text/csv'
+    return list(csv.DictReader(io.StringIO(resp.get_data(as_text=True))))
+
+
+def test_candidate_export_honors_list_filters(client, auth_headers, exported, monkeypatch):
+    monkeypatch.setattr(exports, '_CSV_BLOCK_BYTES', 64)
+    query = f"search=export-{exported}&country=CA"
+    rows = _rows(client.get(f"/api/candidates/export?{query}", headers=auth_headers))
+    listed = client.get(f"/api/candidates?{query}", headers=auth_headers).json['candidates']
+    # Same rows, in the same (relevance) order as the list endpoint
+    assert [r['email'] for r in rows] == [c['email'] for c in listed]
+    assert sorted(r['email'] for r in rows) == [f"export-{exported}-{i}@example.com" for i in range(3)]
+    assert {r['phone'] for r in rows} == {"555, ext. 1", ""}
+    assert rows[0]['created_at'].startswith(str(datetime.utcnow().year))
+
+
+def test_interview_and_tracking_exports(client, auth_headers, exported):
+    rows = _rows(client.get(
+        "/api/interviews/export?start_date=2034-03-01T10:00:00&end_date=2034-03-01T11:00:00", headers=auth_headers
+    ))
+    assert [(r['interview_date'], r['candidate_last_name']) for r in rows] == [
+        ("2034-03-01T10:00:00", f"Zed{exported}1"), ("2034-03-01T11:00:00", f"Zed{exported}2"),
+    ]
+
+    rows = _rows(client.get(f"/api/analytics/campaigns/export-{exported}/export?status=opened", headers=auth_headers))
+    assert [r['tracking_id'] for r in rows] == [f"export-{exported}-1", f"export-{exported}-3"]
+
+
+def test_export_rejects_unknown_format(client, auth_headers):
+    resp = client.get("/api/candidates/export?format=pdf", headers=auth_headers)
+    assert resp.status_code == 400
+
+
+FORMULA_COLUMNS = [('name', None), ('phone', None), ('count', None)]
+FORMULA_ROWS = [
+    ("=HYPERLINK(\"http://evil\")", "+1 (555) 010-0100", -3),
+    ("@SUM(A1)", "\tcmd", 0),
+    ("+cmd|' /C calc'!A0", "-2", 1),
+    ("Plain", None, 2),
+]
+
+
+def test_csv_export_neutralizes_formulas():
+    text = b''.join(exports.csv_chunks(FORMULA_COLUMNS, FORMULA_ROWS)).decode()
+    assert list(csv.reader(io.StringIO(text)))[1:] == [
+        ["'=HYPERLINK(\"http://evil\")", "+1 (555) 010-0100", "-3"],
+        ["'@SUM(A1)", "'\tcmd", "0"],
+        ["'+cmd|' /C calc'!A0", "-2", "1"],
+        ["Plain", "", "2"],
+    ]
+
+
+def test_xlsx_export_keeps_formula_text_as_strings():
+    openpyxl = pytest.importorskip('openpyxl')
+    data = b''.join(exports.xlsx_chunks(FORMULA_COLUMNS, FORMULA_ROWS))
+    sheet = openpyxl.load_workbook(io.BytesIO(data)).active
+    rows = list(sheet.iter_rows(min_row=2))
+    # Values come back exactly as stored, and no cell is a formula
+    assert [tuple(cell.value for cell in row) for row in rows] == FORMULA_ROWS
+    assert all(cell.data_type != 'f' for row in rows for cell in row)
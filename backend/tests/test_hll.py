@@ -0,0 +1,70 @@
+import uuid
+from datetime import datetime, timedelta
+
+from analytics import RollupDeltas, estimate_unique
+from database import TrackingRollup, TrackingSketch
+from hll import HyperLogLog
+
+
+def test_hyperloglog_estimates_within_error_and_merges():
+    a = HyperLogLog()
+    b = HyperLogLog()
+    a.update(f"user{i}@example.com" for i in range(20000))
+    b.update(f"user{i}@example.com" for i in range(10000, 30000))
+
+    tolerance = 4 * a.relative_error
+    assert abs(a.count() - 20000) / 20000 < tolerance
+
+    merged = HyperLogLog.from_bytes(a.to_bytes()).merge(b)
+    assert abs(merged.count() - 30000) / 30000 < tolerance
+    assert merged.registers == bytearray(max(x, y) for x, y in zip(a.registers, b.registers))
+
+    # Re-adding existing values never changes the sketch
+    before = bytes(merged.registers)
+    merged.update(f"user{i}@example.com" for i in range(100))
+    assert bytes(merged.registers) == before
+
+    assert HyperLogLog().count() == 0
+
+
+def test_estimate_unique_over_date_ranges(db_session):
+    campaign_id = f"test-hll-{uuid.uuid4()}"
+    day = datetime(2026, 4, 1)
+    try:
+        deltas = RollupDeltas()
+        # Day 1 at 10:00: users 0-9; day 2 at 23:00: users 5-14; day 3 at 01:00: users 0-2
+        for i in range(10):
+            deltas.add_distinct(campaign_id, 'open', day + timedelta(hours=10), f"u{i}")
+        for i in range(5, 15):
+            deltas.add_distinct(campaign_id, 'open', day + timedelta(days=1, hours=23), f"u{i}")
+        for i in range(3):
+            deltas.add_distinct(campaign_id, 'open', day + timedelta(days=2, hours=1), f"u{i}")
+        deltas.apply(db_session)
+        db_session.commit()
+
+        assert estimate_unique(db_session, campaign_id, 'open')['estimate'] == 15
+        assert estimate_unique(db_session, campaign_id, 'open', day, day + timedelta(hours=23))['estimate'] == 10
+
+        # Partial day 2 evening through early day 3 (hourly buckets only): u5-14 plus u0-2
+        result = estimate_unique(db_session, campaign_id, 'open', day + timedelta(days=1, hours=20), day + timedelta(days=2, hours=5))
+        assert result['estimate'] == 13
+
+        # Whole day 1 plus a partial day 2 morning (nothing opened then)
+        result = estimate_unique(db_session, campaign_id, 'open', day, day + timedelta(days=1, hours=12))
+        assert result['estimate'] == 10
+        assert result['buckets_merged'] == 1
+
+        assert estimate_unique(db_session, campaign_id, 'click')['estimate'] == 0
+    finally:
+        db_session.query(TrackingSketch).filter_by(campaign_id=campaign_id).delete()
+        db_session.query(TrackingRollup).filter_by(campaign_id=campaign_id).delete()
+        db_session.commit()
+
+
+def test_unique_endpoint_validates_event(client, auth_headers):
+    resp = client.get("/api/analytics/campaigns/any/unique?event=bounce", headers=auth_headers)
+    assert resp.status_code == 400
+
+    resp = client.get("/api/analytics/campaigns/any/unique?event=click", headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.json['estimate'] == 0
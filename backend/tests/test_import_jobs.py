@@ -0,0 +1,161 @@
+import io
+import os
+import uuid
+
+import pytest
+
+import tasks
+from config import Config
+from csv_import import run_import_job
+from database import Candidate, ImportJob
+
+HEADER = "First Name,Last Name,Phone,Email Address,Status,Date,Interview Day,Time"
+
+
+def test_import_job_processes_upload_in_chunks(client, auth_headers, db_session, monkeypatch):
+    tag = uuid.uuid4().hex[:8]
+    queued = []
+    monkeypatch.setattr(tasks.import_job_task, 'delay', queued.append)
+    monkeypatch.setattr(Config, 'IMPORT_JOB_CHUNK_ROWS', 3)
+
+    rows = [f'"Lee, Jr.",Job{i},555-{i:04d},job-{tag}-{i}@example.com,Confirmed,,,' for i in range(7)]
+    rows.insert(4, "Missing,Email,555-0000,,,,,")
+    csv_bytes = "\n".join([HEADER] + rows).encode()
+
+    resp = client.post(
+        '/api/candidates/import-jobs',
+        data={'file': (io.BytesIO(csv_bytes), 'candidates.csv')},
+        headers=auth_headers,
+        content_type='multipart/form-data',
+    )
+    assert resp.status_code == 202
+    job = resp.json['job']
+    assert job['status'] == 'queued' and job['total_bytes'] == len(csv_bytes)
+    assert queued == [job['id']]
+    path = db_session.get(ImportJob, job['id']).path
+    try:
+        result = run_import_job(job['id'])
+        assert result['status'] == 'completed'
+        assert (result['imported'], result['rows_processed'], result['error_count']) == (7, 8, 1)
+        assert result['progress'] == 1.0
+        assert not os.path.exists(path)
+
+        resp = client.get(f"/api/candidates/import-jobs/{job['id']}", headers=auth_headers)
+        assert resp.status_code == 200
+        assert resp.json['errors'] == ["Row 6: Missing email address"]
+        assert resp.json['errors_truncated'] is False
+
+        # Quoted commas stay inside their field
+        candidate = db_session.query(Candidate).filter_by(email=f"job-{tag}-0@example.com").one()
+        assert (candidate.first_name, candidate.last_name) == ("Lee, Jr.", "Job0")
+    finally:
+        db_session.query(Candidate).filter(Candidate.email.like(f"job-{tag}-%")).delete(synchronize_session=False)
+        db_session.query(ImportJob).filter_by(id=job['id']).delete()
+        db_session.commit()
+
+
+def test_import_job_rejects_files_without_email_column(client, auth_headers, db_session, monkeypatch):
+    monkeypatch.setattr(tasks.import_job_task, 'delay', lambda job_id: None)
+    resp = client.post(
+        '/api/candidates/import-jobs?filename=bad.csv',
+        data=b"Name,Phone\nAnn,555\n",
+        headers={**auth_headers, 'Content-Type': 'text/csv'},
+    )
+    assert resp.status_code == 202
+    job_id = resp.json['job']['id']
+    try:
+        result = run_import_job(job_id)
+        assert result['status'] == 'failed'
+        assert 'email' in result['message']
+    finally:
+        db_session.query(ImportJob).filter_by(id=job_id).delete()
+        db_session.commit()
+
+
+def test_import_job_reports_errors_in_row_order(client, auth_headers, db_session, monkeypatch):
+    tag = uuid.uuid4().hex[:8]
+    monkeypatch.setattr(tasks.import_job_task, 'delay', lambda job_id: None)
+    csv_bytes = "\n".join([
+        HEADER,
+        f"Ann,Lee,555-0100,order-{tag}-0@example.com,,14TH NOV 2031,FRIDAY,",
+        "Missing,Email,555-0000,,,,,",
+        f"Bob,Ray,555-0101,order-{tag}-1@example.com,,,,",
+    ]).encode()
+    resp = client.post('/api/candidates/import-jobs', data=csv_bytes,
+                       headers={**auth_headers, 'Content-Type': 'text/csv'})
+    job_id = resp.json['job']['id']
+    try:
+        run_import_job(job_id)
+        resp = client.get(f"/api/candidates/import-jobs/{job_id}", headers=auth_headers)
+        # Row 2 is reported while writing the chunk, row 3 while reading it
+        assert resp.json['errors'] == [
+            "Row 2: Date provided but time is missing or invalid",
+            "Row 3: Missing email address",
+        ]
+    finally:
+        db_session.query(Candidate).filter(Candidate.email.like(f"order-{tag}-%")).delete(synchronize_session=False)
+        db_session.query(ImportJob).filter_by(id=job_id).delete()
+        db_session.commit()
+
+
+def test_import_job_of_invalid_rows_still_commits_in_chunks(client, auth_headers, db_session, monkeypatch):
+    import csv_import
+
+    monkeypatch.setattr(tasks.import_job_task, 'delay', lambda job_id: None)
+    monkeypatch.setattr(Config, 'IMPORT_JOB_CHUNK_ROWS', 2)
+    chunks = []
+    commit_chunk = csv_import._commit_chunk
+
+    def spy(session, job, records, errors, rows, position, max_errors):
+        chunks.append((rows, len(errors), position))
+        return commit_chunk(session, job, records, errors, rows, position, max_errors)
+
+    monkeypatch.setattr(csv_import, '_commit_chunk', spy)
+    csv_bytes = "\n".join([HEADER] + [f"Missing,Email{i},555-{i:04d},,,,," for i in range(5)]).encode()
+    resp = client.post('/api/candidates/import-jobs', data=csv_bytes,
+                       headers={**auth_headers, 'Content-Type': 'text/csv'})
+    job_id = resp.json['job']['id']
+    try:
+        result = run_import_job(job_id)
+        assert (result['imported'], result['rows_processed'], result['error_count']) == (0, 5, 5)
+        # Progress moves every two rows even though none of them is imported
+        assert [(rows, errors) for rows, errors, _ in chunks] == [(2, 2), (2, 2), (1, 1)]
+        assert chunks[-1][2] == len(csv_bytes)
+    finally:
+        db_session.query(ImportJob).filter_by(id=job_id).delete()
+        db_session.commit()
+
+
+def test_oversized_upload_is_rejected_before_it_is_read(client, auth_headers, monkeypatch):
+    import csv_import
+    import scheduling_api
+
+    monkeypatch.setattr(tasks.import_job_task, 'delay', lambda job_id: None)
+    monkeypatch.setattr(Config, 'IMPORT_UPLOAD_MAX_BYTES', 64)
+    saved = []
+    monkeypatch.setattr(scheduling_api, 'create_import_job', lambda *args: saved.append(args))
+    csv_bytes = "\n".join([HEADER, "Ann,Lee,555-0100,ann@example.com,,,,"]).encode()
+
+    resp = client.post('/api/candidates/import-jobs', data={'file': (io.BytesIO(csv_bytes), 'big.csv')},
+                       headers=auth_headers, content_type='multipart/form-data')
+    assert resp.status_code == 413
+    resp = client.post('/api/candidates/import-jobs', data=csv_bytes,
+                       headers={**auth_headers, 'Content-Type': 'text/csv'})
+    assert resp.status_code == 413
+    assert saved == []
+
+    # Bodies without a Content-Length are capped while they are copied
+    with pytest.raises(csv_import.UploadTooLarge):
+        csv_import.save_upload(io.BytesIO(csv_bytes), f"too-large-{uuid.uuid4()}", max_bytes=64)
+
+
+def test_other_import_job_errors_are_not_reported_as_too_large(client, auth_headers, monkeypatch):
+    import scheduling_api
+
+    def broken(*args):
+        raise ValueError("unexpected")
+
+    monkeypatch.setattr(scheduling_api, 'create_import_job', broken)
+    resp = client.post('/api/candidates/import-jobs', data=b"Email\na@example.com\n",
+                       headers={**auth_headers, 'Content-Type': 'text/csv'})
+    assert resp.status_code == 500
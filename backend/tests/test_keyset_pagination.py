@@ -0,0 +1,71 @@
+import uuid
+from datetime import datetime, timedelta
+
+from database import Candidate, Interview
+
+
+def _walk(client, auth_headers, url, key):
+    """Follow next_cursor until the last page; returns the pages' ids"""
+    pages = []
+    cursor = ''
+    while cursor is not None:
+        resp = client.get(f"{url}&cursor={cursor}", headers=auth_headers)
+        assert resp.status_code == 200, resp.data
+        pages.append([row['id'] for row in resp.json[key]])
+        cursor = resp.json['next_cursor']
+    return pages
+
+
+def test_candidate_and_interview_cursors(client, auth_headers, db_session):
+    tag = uuid.uuid4().hex[:8]
+    # Duplicate last names so the id tie-breaker matters
+    candidates = [
+        Candidate(first_name="Keyset", last_name=f"Cursor{tag}{i // 2}", email=f"keyset-{tag}-{i}@example.com")
+        for i in range(7)
+    ]
+    db_session.add_all(candidates)
+    db_session.flush()
+    start = datetime(2031, 5, 1, 9, 0)
+    interviews = [
+        Interview(candidate_id=c.id, interview_date=start + timedelta(minutes=30 * (i // 3)))
+        for i, c in enumerate(candidates)
+    ]
+    db_session.add_all(interviews)
+    db_session.commit()
+    try:
+        pages = _walk(client, auth_headers, f"/api/candidates?search=keyset-{tag}&limit=3", 'candidates')
+        expected = [c.id for c in sorted(candidates, key=lambda c: (c.last_name, c.id))]
+        assert [len(p) for p in pages] == [3, 3, 1]
+        assert sum(pages, []) == expected
+
+        pages = _walk(
+            client, auth_headers,
+            f"/api/interviews?start_date={start.isoformat()}&end_date={(start + timedelta(hours=2)).isoformat()}&limit=4",
+            'interviews'
+        )
+        ours = {iv.id for iv in interviews}
+        ids = [i for i in sum(pages, []) if i in ours]
+        assert ids == [iv.id for iv in sorted(interviews, key=lambda iv: (iv.interview_date, iv.id))]
+
+        resp = client.get(f"/api/candidates?search=keyset-{tag}&limit=3&cursor=&include_total=1", headers=auth_headers)
+        assert resp.json['total'] == 7
+
+        # Tokens are opaque and bound to their listing
+        resp = client.get("/api/interviews?cursor=not-a-cursor", headers=auth_headers)
+        assert resp.status_code == 400
+        candidate_cursor = client.get(
+            f"/api/candidates?search=keyset-{tag}&limit=3&cursor=", headers=auth_headers
+        ).json['next_cursor']
+        resp = client.get(f"/api/interviews?cursor={candidate_cursor}", headers=auth_headers)
+        assert resp.status_code == 400
+
+        # Offset pagination keeps working
+        resp = client.get(f"/api/candidates?search=keyset-{tag}&limit=3&offset=6", headers=auth_headers)
+        assert resp.json['total'] == 7
+        assert len(resp.json['candidates']) == 1
+    finally:
+        for interview in interviews:
+            db_session.delete(interview)
+        for candidate in candidates:
+            db_session.delete(candidate)
+        db_session.commit()
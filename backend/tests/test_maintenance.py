@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from config import Config
+from database import SQLITE_PROFILES, Base, Candidate, sqlite_profile
+from maintenance import run_maintenance
+
+
+def test_configured_profile_is_applied(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'SQLITE_PROFILE', 'durable')
+    engine = create_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 2  # FULL
+        assert conn.exec_driver_sql("PRAGMA cache_size").scalar() == SQLITE_PROFILES['durable']['cache_size']
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == Config.SQLITE_BUSY_TIMEOUT_MS
+    engine.dispose()
+
+    monkeypatch.setattr(Config, 'SQLITE_PROFILE', 'fastest')
+    with pytest.raises(ValueError, match="SQLITE_PROFILE"):
+        sqlite_profile()
+
+
+def test_maintenance_reports_each_step(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'maintenance.db'}")
+    Base.metadata.create_all(engine, tables=[Candidate.__table__])
+    with engine.begin() as conn:
+        conn.execute(Candidate.__table__.insert(), [
+            {'first_name': 'M', 'last_name': str(i), 'email': f"m{i}@example.com"} for i in range(50)
+        ])
+
+    report = run_maintenance(engine)
+
+    assert [s['step'] for s in report['steps']] == ['wal_checkpoint', 'analyze', 'incremental_vacuum']
+    assert all('error' not in s and s['duration_ms'] >= 0 for s in report['steps'])
+    assert report['steps'][0]['result']['busy'] is False
+    assert report['steps'][2]['result'] == {'vacuumed': True}
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM sqlite_stat1 WHERE tbl = 'candidates'")).scalar() > 0
+    engine.dispose()
@@ -0,0 +1,51 @@
+import tracemalloc
+
+import pytest
+
+import tasks
+from config import Config
+from memory_profile import CampaignMemoryProfiler
+
+
+def test_profiler_checkpoints_every_n_messages_and_names_the_grower():
+    profiler = CampaignMemoryProfiler('profile-test', every=2, top=5).start()
+    hoard = []
+    for i in range(5):
+        profiler.tick(i)
+        hoard.append(bytearray(256 * 1024))
+    report = profiler.finish(5)
+
+    assert [c['messages'] for c in report['checkpoints']] == [0, 2, 4, 5]
+    assert not tracemalloc.is_tracing()
+    last = report['checkpoints'][-1]
+    assert last['traced_mb'] >= 1.0
+    assert last['rss_mb'] and last['rss_peak_mb'] >= last['rss_mb'] and last['max_rss_mb']
+    assert report['checkpoints'][1]['growth'][0]['where'].endswith('test_memory_profile.py:15')
+    assert report['checkpoints'][1]['growth'][0]['size_diff_kb'] >= 512
+
+
+def test_profiler_leaves_existing_tracing_running():
+    tracemalloc.start()
+    try:
+        CampaignMemoryProfiler('profile-test', every=10).start().finish(0)
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_send_campaign_stops_tracing_when_the_loop_raises(monkeypatch):
+    monkeypatch.setattr(Config, 'CAMPAIGN_MEMORY_PROFILE', True)
+    monkeypatch.setattr(Config, 'EMAIL_PASSWORD', 'profile-test')
+    monkeypatch.setattr(Config, 'SMTP_SERVER', '127.0.0.1')
+    monkeypatch.setattr(Config, 'SMTP_PORT', 1)  # nothing listens; create_server gives up
+
+    def update_state(**kwargs):
+        raise RuntimeError("result backend unavailable")
+
+    monkeypatch.setattr(tasks.send_campaign_task, 'update_state', update_state)
+    with pytest.raises(RuntimeError):
+        tasks.send_campaign_task(
+            'profile-test', 'sender@example.com', 'Profile test', [{'Name': 'A', 'Email': 'a@example.com'}],
+            html_template='<p>Hi {Name}</p>', plain_template='Hi {Name}',
+        )
+    assert not tracemalloc.is_tracing()
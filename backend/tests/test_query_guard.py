@@ -0,0 +1,78 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from agent.tools import AgentTools
+from database import Candidate, Interview
+from query_guard import QueryCounter, assert_constant_queries
+
+WINDOW_START = datetime(2033, 6, 1, 9, 0)
+
+
+@pytest.fixture
+def seeded(db_session):
+    """grow(n) adds n interviews, each with its own candidate, in a fixed window"""
+    tag = uuid.uuid4().hex[:8]
+    created = []
+
+    def grow(count):
+        for _ in range(count):
+            index = len(created)
+            candidate = Candidate(first_name="Guard", last_name=f"Nplus{index}", email=f"guard-{tag}-{index}@example.com")
+            db_session.add(candidate)
+            db_session.flush()
+            interview = Interview(candidate_id=candidate.id, interview_date=WINDOW_START + timedelta(hours=index))
+            db_session.add(interview)
+            created.append((candidate, interview))
+        db_session.commit()
+
+    grow.tag = tag
+    yield grow
+
+    for candidate, interview in created:
+        db_session.delete(interview)
+        db_session.delete(candidate)
+    db_session.commit()
+
+
+def _request_count(client, auth_headers, url):
+    resp = client.get(url, headers=auth_headers)
+    assert resp.status_code == 200, resp.data
+    return int(resp.headers['X-Query-Count'])
+
+
+@pytest.mark.parametrize('url', [
+    "/api/interviews?start_date=2033-06-01&end_date=2033-06-03",
+    "/api/interviews?start_date=2033-06-01&end_date=2033-06-03&cursor=",
+    "/api/schedule/calendar?start_date=2033-06-01&end_date=2033-06-03",
+])
+def test_listing_endpoints_run_constant_queries(client, auth_headers, seeded, url):
+    assert_constant_queries(lambda: _request_count(client, auth_headers, url), seeded)
+
+
+def test_candidate_search_runs_constant_queries(client, auth_headers, seeded):
+    url = f"/api/candidates?search=guard-{seeded.tag}"
+    assert_constant_queries(lambda: _request_count(client, auth_headers, url), seeded)
+
+
+def test_agent_schedule_declares_its_loads(seeded, db_session):
+    def measure():
+        with QueryCounter() as counter:
+            AgentTools().get_schedule(limit=50)
+        return counter.count
+
+    assert_constant_queries(measure, seeded)
+
+    # The detector catches the pattern get_schedule used to have
+    def lazy_measure():
+        db_session.expire_all()
+        with QueryCounter() as counter:
+            interviews = db_session.query(Interview).filter(
+                Interview.interview_date >= WINDOW_START
+            ).limit(50).all()
+            [i.to_dict() for i in interviews]
+        return counter.count
+
+    with pytest.raises(AssertionError, match="grows with result size"):
+        assert_constant_queries(lazy_measure, seeded)
@@ -0,0 +1,63 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from database import _drop_redundant_indexes
+from query_plans import HOT_QUERIES, check_query_plans, redundant_indexes, regressions, seed_database
+
+
+@pytest.fixture
+def seeded_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'plans.db'}")
+    seed_database(engine, interviews=500)
+    yield engine
+    engine.dispose()
+
+
+def test_hot_queries_use_indexes(seeded_engine):
+    with Session(seeded_engine) as session:
+        report = check_query_plans(session)
+
+    assert {entry['name'] for entry in report} == set(HOT_QUERIES)
+    assert regressions(report) == [], report
+
+
+def test_dropped_index_is_reported(seeded_engine):
+    with seeded_engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_email_tracking_status")
+
+    with Session(seeded_engine) as session:
+        report = check_query_plans(session, names={'tracking_status_count'})
+
+    assert report[0]['full_scans'] == ['email_tracking']
+
+
+def test_no_index_is_a_prefix_of_another():
+    assert redundant_indexes() == []
+
+
+def test_redundant_indexes_are_only_dropped_when_covered(tmp_path):
+    # Legacy schema: interviews predates uq_candidate_interview_date
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        for ddl in (
+            "CREATE TABLE interviews (id INTEGER PRIMARY KEY, candidate_id INTEGER, interview_date DATETIME, status VARCHAR(50))",
+            "CREATE INDEX ix_interviews_candidate_id ON interviews (candidate_id)",
+            "CREATE INDEX ix_interviews_interview_date ON interviews (interview_date)",
+            "CREATE INDEX ix_interviews_date_status_candidate ON interviews (interview_date, status, candidate_id)",
+            "CREATE TABLE campaign_links (id INTEGER PRIMARY KEY, campaign_id VARCHAR(50), position INTEGER, "
+            "CONSTRAINT uq_campaign_link_position UNIQUE (campaign_id, position))",
+            "CREATE INDEX ix_campaign_links_campaign_id ON campaign_links (campaign_id)",
+        ):
+            conn.exec_driver_sql(ddl)
+
+    _drop_redundant_indexes(engine)
+
+    with engine.connect() as conn:
+        names = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN SELECT * FROM interviews WHERE candidate_id = 1").fetchall()
+    engine.dispose()
+    assert 'ix_interviews_candidate_id' in names
+    assert 'ix_interviews_interview_date' not in names
+    assert 'ix_campaign_links_campaign_id' not in names
+    assert plan[0][-1].startswith('SEARCH interviews USING INDEX ix_interviews_candidate_id')
@@ -0,0 +1,99 @@
+import uuid
+from datetime import datetime, timedelta
+
+from database import CampaignLink, EmailClick, EmailTracking, TrackingArchive, TrackingRollup, TrackingSketch, TimeToOpenRollup
+from analytics import backfill_rollups
+from retention import apply_retention, archive_campaign, read_archive
+
+
+def _cleanup(db_session, campaign_id):
+    db_session.query(EmailTracking).filter_by(campaign_id=campaign_id).delete()
+    db_session.query(TrackingRollup).filter_by(campaign_id=campaign_id).delete()
+    db_session.query(TrackingSketch).filter_by(campaign_id=campaign_id).delete()
+    db_session.query(TimeToOpenRollup).filter_by(campaign_id=campaign_id).delete()
+    db_session.query(TrackingArchive).filter_by(campaign_id=campaign_id).delete()
+    db_session.query(CampaignLink).filter_by(campaign_id=campaign_id).delete()
+    db_session.commit()
+
+
+def test_archive_campaign_keeps_data_queryable(client, auth_headers, db_session, tmp_path):
+    campaign_id = f"test-retention-{uuid.uuid4()}"
+    sent_at = datetime.utcnow() - timedelta(days=400)
+    try:
+        # Rows written without rollups, as for campaigns sent before rollups existed
+        for i in range(5):
+            db_session.add(EmailTracking(
+                tracking_id=f"{campaign_id}-{i}",
+                campaign_id=campaign_id,
+                recipient_email=f"person{i}@example.com",
+                status="opened" if i < 2 else "sent",
+                opened_at=sent_at + timedelta(hours=1) if i < 2 else None,
+                open_count=1 if i < 2 else 0,
+                created_at=sent_at,
+            ))
+        link = CampaignLink(campaign_id=campaign_id, position=0, url="https://example.com/")
+        db_session.add(link)
+        db_session.flush()
+        db_session.add(EmailClick(tracking_id=f"{campaign_id}-0", link_id=link.id, clicked_at=sent_at + timedelta(hours=2)))
+        db_session.commit()
+
+        result = apply_retention(retention_days=365, dry_run=True)
+        assert campaign_id in result['campaigns']
+
+        summary = archive_campaign(campaign_id, archive_dir=str(tmp_path), batch_size=2)
+        assert summary == {'email_tracking': 5, 'email_clicks': 1, 'deleted': 5}
+
+        db_session.expire_all()
+        assert db_session.query(EmailTracking).filter_by(campaign_id=campaign_id).count() == 0
+        assert db_session.query(EmailClick).filter(EmailClick.tracking_id.like(f"{campaign_id}-%")).count() == 0
+
+        # Aggregates were rolled up before the raw rows went away
+        resp = client.get(f"/api/analytics/campaigns/{campaign_id}/summary", headers=auth_headers)
+        assert resp.json['summary']['sent'] == 5
+        assert resp.json['summary']['unique_opens'] == 2
+
+        resp = client.get(f"/api/analytics/campaigns/{campaign_id}/archives", headers=auth_headers)
+        assert resp.status_code == 200
+        archives = {a['table_name']: a for a in resp.json['archives']}
+        assert archives['email_tracking']['row_count'] == 5
+
+        resp = client.get(
+            f"/api/analytics/archives/{archives['email_tracking']['id']}/rows?recipient_email=PERSON1@example.com",
+            headers=auth_headers
+        )
+        assert resp.status_code == 200
+        assert [row['tracking_id'] for row in resp.json['rows']] == [f"{campaign_id}-1"]
+
+        archive = db_session.get(TrackingArchive, archives['email_clicks']['id'])
+        assert read_archive(archive)[0]['tracking_id'] == f"{campaign_id}-0"
+    finally:
+        _cleanup(db_session, campaign_id)
+
+
+def test_backfill_leaves_archived_campaign_rollups_alone(client, auth_headers, db_session, tmp_path):
+    campaign_id = f"test-retention-{uuid.uuid4()}"
+    sent_at = datetime.utcnow() - timedelta(days=400)
+    try:
+        for i in range(3):
+            db_session.add(EmailTracking(
+                tracking_id=f"{campaign_id}-{i}",
+                campaign_id=campaign_id,
+                recipient_email=f"person{i}@example.com",
+                status="opened",
+                opened_at=sent_at + timedelta(hours=1),
+                open_count=1,
+                created_at=sent_at,
+            ))
+        db_session.commit()
+        archive_campaign(campaign_id, archive_dir=str(tmp_path))
+
+        resp = client.post('/api/analytics/backfill', json={'campaign_id': campaign_id}, headers=auth_headers)
+        assert resp.status_code == 409
+
+        assert backfill_rollups(campaign_id=campaign_id) == 0
+        resp = client.get(f"/api/analytics/campaigns/{campaign_id}/summary", headers=auth_headers)
+        assert resp.json['summary']['sent'] == 3
+        assert resp.json['summary']['unique_opens'] == 3
+        assert db_session.query(TrackingSketch).filter_by(campaign_id=campaign_id).count() > 0
+    finally:
+        _cleanup(db_session, campaign_id)
@@ -0,0 +1,41 @@
+import uuid
+
+from agent.tools import AgentTools
+from database import Candidate
+
+
+def test_search_index_ranks_and_tracks_changes(client, auth_headers, db_session):
+    tag = uuid.uuid4().hex[:8]
+    by_name = Candidate(first_name=f"Zephyrine{tag}", last_name="Okafor", email=f"zo-{tag}@example.com")
+    by_notes = Candidate(first_name="Ann", last_name="Lee", email=f"al-{tag}@example.com",
+                         notes=f"referred by Zephyrine{tag}")
+    db_session.add_all([by_name, by_notes])
+    db_session.commit()
+    try:
+        resp = client.get(f"/api/candidates?search=zephyrine{tag}", headers=auth_headers)
+        assert resp.status_code == 200
+        assert [c['id'] for c in resp.json['candidates']] == [by_name.id, by_notes.id]
+
+        # Every term has to match, in any column
+        resp = client.get(f"/api/candidates?search=Zephyrine{tag} oka", headers=auth_headers)
+        assert [c['id'] for c in resp.json['candidates']] == [by_name.id]
+
+        # Short terms cannot use trigrams and fall back to LIKE
+        resp = client.get(f"/api/candidates?search=Zephyrine{tag} nn", headers=auth_headers)
+        assert [c['id'] for c in resp.json['candidates']] == [by_notes.id]
+
+        # Structured agent search only looks at the named column
+        results = AgentTools().search_candidates(first_name=f"zephyrine{tag}")
+        assert [c['id'] for c in results] == [by_name.id]
+
+        # Triggers keep the index in sync with updates
+        by_name.last_name = f"Quillfeather{tag}"
+        db_session.commit()
+        results = AgentTools().search_candidates(query=f"quillfeather{tag}")
+        assert [c['id'] for c in results] == [by_name.id]
+    finally:
+        db_session.query(Candidate).filter(Candidate.id.in_([by_name.id, by_notes.id])).delete()
+        db_session.commit()
+
+    resp = client.get(f"/api/candidates?search=Zephyrine{tag}", headers=auth_headers)
+    assert resp.json['candidates'] == []
@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from database import EmailTracking, Interview
+from seed_data import scale_database, seed_scale
+
+PARAMS = dict(candidates=300, interviews=900, tracking=1200, campaigns=7, seed=3, chunk_rows=250)
+
+
+def _dump(engine):
+    with engine.connect() as conn:
+        return {
+            table: conn.exec_driver_sql(f"SELECT * FROM {table} ORDER BY id").fetchall()
+            for table in ('candidates', 'interviews', 'email_tracking')
+        }
+
+
+def test_scale_seed_is_deterministic_and_resumable(tmp_path):
+    complete = scale_database(tmp_path / 'complete.db', **PARAMS)
+    expected = _dump(complete)
+    complete.dispose()
+    assert [len(rows) for rows in expected.values()] == [300, 900, 1200]
+
+    class Interrupted(Exception):
+        pass
+
+    def interrupt(table, done, total):
+        if table == 'interviews' and done >= 500:
+            raise Interrupted
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'resumed.db'}")
+    with pytest.raises(Interrupted):
+        seed_scale(engine, progress=interrupt, **PARAMS)
+    assert seed_scale(engine, **PARAMS) == {'candidates': 300, 'interviews': 900, 'tracking': 1200}
+    assert _dump(engine) == expected
+
+    with pytest.raises(ValueError, match='different parameters'):
+        seed_scale(engine, **{**PARAMS, 'seed': 4})
+    engine.dispose()
+
+
+def test_scale_seed_distributions(tmp_path):
+    engine = scale_database(tmp_path / 'scale.db', **PARAMS)
+    with engine.connect() as conn:
+        emails = conn.exec_driver_sql("SELECT COUNT(DISTINCT email) FROM candidates").scalar()
+        campaigns = conn.exec_driver_sql("SELECT COUNT(DISTINCT campaign_id) FROM email_tracking").scalar()
+        opened = conn.exec_driver_sql(
+            "SELECT COUNT(*) FROM email_tracking WHERE status IN ('opened', 'clicked')"
+        ).scalar()
+        orphans = conn.exec_driver_sql(
+            "SELECT COUNT(*) FROM email_tracking t LEFT JOIN candidates c ON c.email = t.recipient_email "
+            "WHERE c.id IS NULL"
+        ).scalar()
+    engine.dispose()
+    assert emails == 300
+    assert campaigns <= 7
+    assert 0.15 < opened / 1200 < 0.35
+    assert orphans == 0
+
+
+def test_seeded_datetimes_match_orm_equality_lookups(tmp_path):
+    engine = scale_database(tmp_path / 'lookup.db', **PARAMS)
+    with Session(engine) as session:
+        interview = session.query(Interview).order_by(Interview.id).first()
+        assert session.query(Interview).filter(
+            Interview.candidate_id == interview.candidate_id,
+            Interview.interview_date == interview.interview_date,
+        ).one().id == interview.id
+        sent = session.query(EmailTracking).order_by(EmailTracking.id).first()
+        assert session.query(EmailTracking).filter(EmailTracking.created_at == sent.created_at).count() >= 1
+    engine.dispose()
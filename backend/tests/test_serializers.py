@@ -0,0 +1,44 @@
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from database import Candidate, Interview
+from serializers import FastJSONProvider, serialize_candidates, serialize_interviews
+
+
+def test_projections_match_to_dict(client, auth_headers, db_session):
+    tag = uuid.uuid4().hex[:8]
+    candidate = Candidate(first_name="Proj", last_name=f"Ection{tag}", email=f"proj-{tag}@example.com",
+                          notes="ünïcode notes")
+    db_session.add(candidate)
+    db_session.flush()
+    start = datetime(2032, 2, 3, 9, 30, 15, 120000)
+    interviews = [
+        Interview(candidate_id=candidate.id, interview_date=start + timedelta(days=i), status="scheduled")
+        for i in range(2)
+    ]
+    db_session.add_all(interviews)
+    db_session.commit()
+    try:
+        provider = FastJSONProvider(client.application)
+        ids = [i.id for i in interviews]
+        query = db_session.query(Interview).filter(Interview.id.in_(ids)).order_by(Interview.id)
+        expected = [i.to_dict() for i in query]
+        assert json.loads(provider.dumps(serialize_interviews(query))) == expected
+
+        query = db_session.query(Candidate).filter_by(id=candidate.id)
+        assert json.loads(provider.dumps(serialize_candidates(query))) == [candidate.to_dict()]
+
+        resp = client.get(
+            f"/api/schedule/calendar?start_date=2032-02-03&end_date=2032-02-06", headers=auth_headers
+        )
+        assert resp.status_code == 200
+        calendar = resp.json['calendar']
+        assert [day for day in calendar if any(i['id'] in ids for i in calendar[day])] == ['2032-02-03', '2032-02-04']
+        assert calendar['2032-02-03'][0]['interview_date'] == start.isoformat()
+        assert calendar['2032-02-03'][0]['candidate']['email'] == candidate.email
+    finally:
+        for interview in interviews:
+            db_session.delete(interview)
+        db_session.delete(candidate)
+        db_session.commit()
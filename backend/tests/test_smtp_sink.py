@@ -0,0 +1,146 @@
+import uuid
+
+import pytest
+
+import tasks
+from config import Config
+from database import CampaignLink, EmailTracking, TrackingRollup
+from smtp_sink import Faults, SMTPSink
+
+
+@pytest.fixture
+def make_sink(monkeypatch):
+    sinks = []
+
+    def start(faults=None):
+        sink = SMTPSink(tls=True, keep_messages=True, faults=faults).start()
+        sinks.append(sink)
+        # smtplib verifies the sink's self-signed certificate like a real one
+        monkeypatch.setenv('SSL_CERT_FILE', sink.certfile)
+        monkeypatch.setattr(Config, 'SMTP_SERVER', '127.0.0.1')
+        monkeypatch.setattr(Config, 'SMTP_PORT', sink.port)
+        monkeypatch.setattr(Config, 'EMAIL_PASSWORD', 'sink-password')
+        monkeypatch.setattr(Config, 'RATE_LIMIT_DELAY', 0)
+        monkeypatch.setattr(tasks.send_campaign_task, 'update_state', lambda **kwargs: None)
+        return sink
+
+    yield start
+    for sink in sinks:
+        sink.stop()
+
+
+@pytest.fixture
+def sink(make_sink):
+    return make_sink()
+
+
+@pytest.fixture
+def backoffs(monkeypatch):
+    """Backoff sleeps taken by send_campaign_task, recorded instead of slept (RATE_LIMIT_DELAY is 0)"""
+    slept = []
+    monkeypatch.setattr(tasks.time, 'sleep', lambda seconds: seconds and slept.append(seconds))
+    return slept
+
+
+def _send(campaign_id, count):
+    recipients = [{'Name': f"Ada Lovelace{i}", 'Email': f"ada{i}@example.com"} for i in range(count)]
+    return tasks.send_campaign_task(
+        campaign_id, 'sender@example.com', 'Hello', recipients,
+        html_template='<p>Hi {Name}</p>', plain_template='Hi {Name}',
+    )
+
+
+@pytest.fixture
+def campaign_id(db_session):
+    campaign_id = f"sink-{uuid.uuid4().hex[:8]}"
+    yield campaign_id
+    for model in (EmailTracking, TrackingRollup, CampaignLink):
+        db_session.query(model).filter_by(campaign_id=campaign_id).delete()
+    db_session.commit()
+
+
+def test_send_campaign_task_delivers_through_sink(sink, campaign_id, db_session):
+    recipients = [{'Name': f"Ada Lovelace{i}", 'Email': f"ada{i}@example.com"} for i in range(3)]
+    result = tasks.send_campaign_task(
+        campaign_id, 'sender@example.com', 'Hello', recipients,
+        html_template='<p>Hi {Name}</p>', plain_template='Hi {Name}',
+    )
+
+    assert (result['successful'], result['failed']) == (3, 0)
+    assert sink.stats()['connections'] == 1
+    assert [m['to'] for m in sink.messages] == [[r['Email']] for r in recipients]
+    assert b'X-Campaign-ID: ' + campaign_id.encode() in sink.messages[0]['data']
+    assert db_session.query(EmailTracking).filter_by(campaign_id=campaign_id).count() == 3
+
+
+def test_temporary_failures_are_retried_on_a_new_connection(make_sink, campaign_id, backoffs):
+    sink = make_sink(Faults(script=['451', 'ok', '421', 'ok']))
+    result = _send(campaign_id, 2)
+
+    assert (result['successful'], result['failed']) == (2, 0)
+    assert backoffs == [1, 1]
+    assert sink.stats()['injected']['451'] == sink.stats()['injected']['421'] == 1
+    assert sink.stats()['connections'] == 3
+    assert [m['to'] for m in sink.messages] == [['ada0@example.com'], ['ada1@example.com']]
+
+
+def test_disconnect_after_data_is_retried(make_sink, campaign_id, backoffs):
+    sink = make_sink(Faults(script=['ok', 'disconnect']))
+    result = _send(campaign_id, 2)
+
+    assert (result['successful'], result['failed']) == (2, 0)
+    assert backoffs == [1]
+    assert sink.message_count == 2
+
+
+def test_permanent_rejection_fails_the_recipient_without_retry(make_sink, campaign_id, backoffs):
+    sink = make_sink(Faults(script=['550']))
+    result = _send(campaign_id, 2)
+
+    assert (result['successful'], result['failed']) == (1, 1)
+    assert result['results'][0]['status'] == 'failed'
+    assert backoffs == []
+    assert sink.stats()['connections'] == 1
+    assert [m['to'] for m in sink.messages] == [['ada1@example.com']]
+
+
+def test_per_connection_cap_forces_reconnects(make_sink, campaign_id, backoffs):
+    sink = make_sink(Faults(max_per_connection=2))
+    result = _send(campaign_id, 5)
+
+    assert (result['successful'], result['failed']) == (5, 0)
+    assert sink.stats()['connections'] == 3
+    assert sink.stats()['injected']['cap'] == 2
+    assert backoffs == [1, 1]
+
+
+def test_random_faults_are_reproducible():
+    def outcomes(seed):
+        faults = Faults(p421=0.1, p451=0.2, p550=0.05, disconnect=0.05, seed=seed)
+        return [faults.next_outcome(i) for i in range(200)]
+
+    assert outcomes(7) == outcomes(7)
+    assert outcomes(7) != outcomes(8)
+    assert {'ok', '421', '451', '550', 'disconnect'} == set(outcomes(7))
+    with pytest.raises(ValueError):
+        Faults(script=['452'])
+
+
+def test_results_are_capped_per_status(sink, campaign_id, monkeypatch):
+    monkeypatch.setattr(Config, 'CAMPAIGN_RESULTS_LIMIT', 2)
+    result = _send(campaign_id, 5)
+
+    assert (result['successful'], result['failed']) == (5, 0)
+    assert [r['email'] for r in result['results']] == ['ada0@example.com', 'ada1@example.com']
+    assert result['results_omitted'] == 3
+    assert 'memory_profile' not in result
+
+
+def test_memory_profile_is_reported_when_enabled(sink, campaign_id, monkeypatch):
+    monkeypatch.setattr(Config, 'CAMPAIGN_MEMORY_PROFILE', True)
+    monkeypatch.setattr(Config, 'CAMPAIGN_MEMORY_PROFILE_EVERY', 2)
+    result = _send(campaign_id, 5)
+
+    assert result['successful'] == 5
+    assert [c['messages'] for c in result['memory_profile']['checkpoints']] == [0, 2, 4, 5]
+    assert all(c['top'] for c in result['memory_profile']['checkpoints'][1:])
@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, Candidate
+from write_queue import WriteQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'writes.db'}")
+    Base.metadata.create_all(engine, tables=[Candidate.__table__])
+    factory = sessionmaker(bind=engine)
+    queue = WriteQueue(session_factory=factory, max_batch=100, max_delay=0.01)
+    queue.count = lambda: factory().query(func.count(Candidate.id)).scalar()
+    yield queue
+    engine.dispose()
+
+
+def _insert(index):
+    def job(session):
+        candidate = Candidate(first_name="Queued", last_name=str(index), email=f"queued-{index}@example.com")
+        session.add(candidate)
+        session.flush()
+        return candidate.id
+    return job
+
+
+def test_concurrent_writes_are_group_committed(queue):
+    results = []
+    threads = [threading.Thread(target=lambda i=i: results.append(queue.run(_insert(i), timeout=10)))
+               for i in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(results)) == 40
+    assert queue.count() == 40
+    assert queue.jobs_written == 40
+    assert queue.batches < 40
+
+
+def test_failing_job_only_fails_its_caller(queue):
+    def duplicate(session):
+        session.add(Candidate(first_name="Dup", last_name="Dup", email="queued-0@example.com"))
+        session.flush()
+
+    futures = [queue.submit(_insert(0)), queue.submit(duplicate), queue.submit(_insert(1))]
+    assert futures[0].result(timeout=10)
+    with pytest.raises(Exception):
+        futures[1].result(timeout=10)
+    assert futures[2].result(timeout=10)
+    assert queue.count() == 2
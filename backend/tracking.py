@@ -0,0 +1,254 @@
+"""
+Open and click tracking.
+
+Links in a campaign template are rewritten once, when the campaign is
+prepared, into rows of ``campaign_links``. Each recipient's copy only swaps a
+placeholder for its tracking ID, so per-recipient work is a plain string
+replace. Opens and clicks are queued in an in-process buffer and written to
+the database in batches by a background thread, keeping the pixel and
+redirect endpoints free of synchronous database writes.
+"""
+import html
+import logging
+import os
+import re
+import threading
+from collections import deque, defaultdict
+from datetime import datetime
+from functools import lru_cache
+
+from analytics import RollupDeltas
+from config import Config
+from database import get_session, session_scope, dialect_insert, EmailTracking, CampaignLink, EmailClick
+from write_queue import run_write
+
+logger = logging.getLogger(__name__)
+
+# Replaced with the recipient's tracking ID when each message is built.
+TRACKING_ID_PLACEHOLDER = "__TRACKING_ID__"
+
+# <a ... href="http(s)://..."> – only absolute web links are tracked.
+_HREF_RE = re.compile(
+    r"""(<a\b[^>]*?\bhref\s*=\s*)(["'])(https?://[^"']+)\2""",
+    re.IGNORECASE,
+)
+
+# Max tracking IDs per IN (...) query when applying a batch.
+_LOOKUP_CHUNK_SIZE = 500
+
+
+def prepare_campaign_links(campaign_id, html_template, api_base=None):
+    """
+    Rewrite the links of a campaign template to go through the click endpoint.
+
+    One ``CampaignLink`` row is stored per link occurrence. Links containing
+    template variables (e.g. ``{MeetLink}``) differ per recipient and are left
+    untouched, as are ``mailto:`` and other non-web links.
+
+    Returns the rewritten template; links carry ``TRACKING_ID_PLACEHOLDER``
+    which ``apply_tracking_id`` fills in per recipient.
+    """
+    if not html_template:
+        return html_template
+
+    matches = [m for m in _HREF_RE.finditer(html_template) if '{' not in m.group(3)]
+    if not matches:
+        return html_template
+
+    api_base = (api_base or Config.API_BASE_URL).rstrip('/')
+
+    with session_scope() as session:
+        # Upsert, so a retried send of the same campaign reuses its link rows
+        stmt = dialect_insert(CampaignLink, session.get_bind().dialect.name).values([
+            {'campaign_id': campaign_id, 'position': position, 'url': html.unescape(m.group(3))}
+            for position, m in enumerate(matches)
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['campaign_id', 'position'], set_={'url': stmt.excluded.url}
+        ).returning(CampaignLink.position, CampaignLink.id)
+        ids_by_position = dict(session.execute(stmt).all())
+        link_ids = [ids_by_position[position] for position in range(len(matches))]
+
+    parts = []
+    last_end = 0
+    for match, link_id in zip(matches, link_ids):
+        parts.append(html_template[last_end:match.start()])
+        quote = match.group(2)
+        parts.append(
+            f"{match.group(1)}{quote}{api_base}/api/click/{link_id}/{TRACKING_ID_PLACEHOLDER}{quote}"
+        )
+        last_end = match.end()
+    parts.append(html_template[last_end:])
+
+    logger.info(f"Prepared {len(link_ids)} tracked links for campaign {campaign_id}")
+    return ''.join(parts)
+
+
+def apply_tracking_id(html_body, tracking_id):
+    """Fill in the recipient token on links rewritten by prepare_campaign_links."""
+    if not html_body:
+        return html_body
+    return html_body.replace(TRACKING_ID_PLACEHOLDER, tracking_id)
+
+
+@lru_cache(maxsize=Config.TRACKING_LINK_CACHE_SIZE)
+def _load_link_url(link_id):
+    # Raising (instead of returning None) keeps unknown IDs out of the cache.
+    session = get_session()
+    try:
+        row = session.query(CampaignLink.url).filter(CampaignLink.id == link_id).first()
+    finally:
+        session.close()
+    if row is None:
+        raise LookupError(link_id)
+    return row[0]
+
+
+def resolve_link(link_id):
+    """Return the destination URL for a tracked link, or None if unknown."""
+    try:
+        return _load_link_url(link_id)
+    except LookupError:
+        return None
+
+
+class TrackingBuffer:
+    """
+    Thread-safe queue of open/click events, flushed to the database in batches.
+
+    Events are written by a daemon thread every ``flush_interval`` seconds, or
+    sooner once ``max_batch`` events are queued. A ``flush_interval`` of 0
+    writes each event synchronously, which is mostly useful for debugging.
+    Events still queued when a process dies are lost; for tracking pixels
+    that trade-off is preferred over a database write per request.
+    """
+
+    def __init__(self, flush_interval=None, max_batch=None):
+        self.flush_interval = Config.TRACKING_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.max_batch = max_batch or Config.TRACKING_FLUSH_MAX_BATCH
+        self._events = deque()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def record_open(self, tracking_id, ip_address=None, user_agent=None, at=None):
+        self._append(('open', tracking_id, None, at or datetime.utcnow(), ip_address, user_agent))
+
+    def record_click(self, tracking_id, link_id, ip_address=None, user_agent=None, at=None):
+        self._append(('click', tracking_id, link_id, at or datetime.utcnow(), ip_address, user_agent))
+
+    def pending(self):
+        return len(self._events)
+
+    def _append(self, event):
+        self._events.append(event)
+        if self.flush_interval <= 0:
+            self.flush()
+            return
+        self._ensure_worker()
+        if len(self._events) >= self.max_batch:
+            self._wakeup.set()
+
+    def _ensure_worker(self):
+        # Checked against the PID so forked workers (gunicorn, Celery) start their own thread.
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='tracking-buffer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Tracking buffer flush failed: {str(e)}")
+
+    def flush(self):
+        """Write all queued events. Returns the number of events processed."""
+        with self._flush_lock:
+            events = []
+            while True:
+                try:
+                    events.append(self._events.popleft())
+                except IndexError:
+                    break
+            if not events:
+                return 0
+            try:
+                run_write(lambda session: _apply_events(session, events))
+            except Exception as e:
+                logger.error(f"Dropped {len(events)} tracking events: {str(e)}")
+                raise
+            return len(events)
+
+
+def _apply_events(session, events):
+    """Apply a batch of open/click events and their rollup counters in one transaction."""
+    by_tracking_id = defaultdict(list)
+    for event in events:
+        by_tracking_id[event[1]].append(event)
+
+    tracking_ids = list(by_tracking_id)
+    records = {}
+    for i in range(0, len(tracking_ids), _LOOKUP_CHUNK_SIZE):
+        chunk = tracking_ids[i:i + _LOOKUP_CHUNK_SIZE]
+        for record in session.query(EmailTracking).filter(EmailTracking.tracking_id.in_(chunk)):
+            records[record.tracking_id] = record
+
+    clicks = []
+    deltas = RollupDeltas()
+    for tracking_id, record_events in by_tracking_id.items():
+        record = records.get(tracking_id)
+        if record is None:
+            continue
+        for kind, _, link_id, at, ip_address, user_agent in record_events:
+            if kind == 'open':
+                record.open_count = (record.open_count or 0) + 1
+                if not record.opened_at:
+                    record.opened_at = at
+                    deltas.add(record.campaign_id, at, opens=1, unique_opens=1)
+                    if record.created_at:
+                        deltas.add_time_to_open(record.campaign_id, (at - record.created_at).total_seconds())
+                else:
+                    deltas.add(record.campaign_id, at, opens=1)
+                deltas.add_distinct(record.campaign_id, 'open', at, record.recipient_email.lower())
+                if record.status != 'clicked':
+                    record.status = 'opened'
+                # Only opens describe who fetched the message; a link scanner's
+                # click must not reclassify a human open (or the reverse)
+                record.ip_address = ip_address
+                record.user_agent = user_agent
+                # Queue the row for (re-)classification by enrichment.py
+                record.enriched_at = None
+            else:
+                record.click_count = (record.click_count or 0) + 1
+                if not record.clicked_at:
+                    record.clicked_at = at
+                    deltas.add(record.campaign_id, at, clicks=1, unique_clicks=1)
+                else:
+                    deltas.add(record.campaign_id, at, clicks=1)
+                deltas.add_distinct(record.campaign_id, 'click', at, record.recipient_email.lower())
+                record.status = 'clicked'
+                clicks.append(EmailClick(
+                    tracking_id=tracking_id,
+                    link_id=link_id,
+                    clicked_at=at,
+                    ip_address=ip_address,
+                    user_agent=user_agent,
+                ))
+
+    if clicks:
+        session.add_all(clicks)
+    deltas.apply(session)
+
+
+# Process-wide buffer shared by the tracking endpoints.
+tracking_buffer = TrackingBuffer()
@@ -0,0 +1,152 @@
+"""
+Optional single-writer queue for SQLite.
+
+SQLite allows one writer at a time. With many threads each committing its
+own small transaction, writers queue up on the database lock (and fail with
+``database is locked`` once ``busy_timeout`` runs out) and every commit pays
+for its own WAL sync.
+
+With ``WRITE_QUEUE=1`` writes submitted through ``run_write`` are handed to
+one writer thread per process instead. The writer drains whatever has been
+queued (up to ``WRITE_QUEUE_MAX_BATCH`` jobs, waiting at most
+``WRITE_QUEUE_MAX_DELAY`` seconds for more to arrive) and applies the batch
+in a single transaction: one lock acquisition and one commit for many
+writes. Reads are unaffected and stay concurrent under WAL.
+
+If a batch fails, it is rolled back and its jobs are replayed one
+transaction each, so one bad write only fails its own caller. Jobs must
+therefore only touch the database through the session they are given, and
+should return plain values rather than ORM objects (the session is closed
+once the batch commits).
+
+Other processes (gunicorn workers, Celery) each have their own writer and
+still contend on the file lock; ``busy_timeout`` covers that.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from config import Config
+from database import get_session, session_scope
+
+logger = logging.getLogger(__name__)
+
+
+def enabled():
+    return Config.WRITE_QUEUE
+
+
+class WriteQueue:
+    """Funnels write jobs (``fn(session) -> result``) to one group-committing thread"""
+
+    def __init__(self, session_factory=None, max_batch=None, max_delay=None):
+        self.session_factory = session_factory or get_session
+        self.max_batch = max_batch or Config.WRITE_QUEUE_MAX_BATCH
+        self.max_delay = Config.WRITE_QUEUE_MAX_DELAY if max_delay is None else max_delay
+        self._jobs = deque()
+        self._wakeup = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.batches = 0
+        self.jobs_written = 0
+
+    def submit(self, fn):
+        """Queue ``fn`` and return a Future for its result"""
+        future = Future()
+        self._jobs.append((fn, future))
+        self._ensure_worker()
+        self._wakeup.set()
+        return future
+
+    def run(self, fn, timeout=None):
+        """Queue ``fn`` and wait until its batch has committed"""
+        return self.submit(fn).result(timeout)
+
+    def pending(self):
+        return len(self._jobs)
+
+    def _ensure_worker(self):
+        # Checked against the PID so forked workers (gunicorn, Celery) start their own thread.
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='write-queue', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            while self._jobs:
+                if self.max_delay and len(self._jobs) < self.max_batch:
+                    # Let concurrent writers join this commit
+                    time.sleep(self.max_delay)
+                batch = []
+                while self._jobs and len(batch) < self.max_batch:
+                    batch.append(self._jobs.popleft())
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    logger.error(f"Write queue batch failed: {str(e)}")
+
+    def _write(self, batch):
+        batch = [(fn, future) for fn, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        session = self.session_factory()
+        try:
+            results = [fn(session) for fn, _ in batch]
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            logger.warning(f"Write queue batch of {len(batch)} failed, replaying individually: {str(e)}")
+            for job in batch:
+                self._write_one(*job)
+            return
+        finally:
+            session.close()
+
+        self.batches += 1
+        self.jobs_written += len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _write_one(self, fn, future):
+        session = self.session_factory()
+        try:
+            result = fn(session)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            future.set_exception(e)
+            return
+        finally:
+            session.close()
+        self.batches += 1
+        self.jobs_written += 1
+        future.set_result(result)
+
+
+# Process-wide queue used by run_write() when WRITE_QUEUE is enabled.
+write_queue = WriteQueue()
+
+
+def run_write(fn):
+    """
+    Apply ``fn(session)`` in a committed transaction and return its result:
+    through the write queue when enabled, otherwise in its own session.
+    """
+    if enabled():
+        return write_queue.run(fn)
+    with session_scope() as session:
+        return fn(session)